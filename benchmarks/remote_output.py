@@ -0,0 +1,197 @@
+"""
+Compare the bytes TermOS writes to a terminal with remote mode off and on, through a local pty.
+
+Each session runs TermOS in a pseudo-terminal, standing in for an SSH connection, and types
+into it as a user would: dragging a Notepad window across the screen by its title bar, then
+opening and closing quick settings from the taskbar clock. Everything TermOS writes is read
+from the pty and counted. TermOS's own count, which the performance overlay shows per second,
+is reported alongside to check it agrees.
+
+Run with `uv run python benchmarks/remote_output.py [--budget BYTES ...]`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import fcntl
+import json
+import os
+import pty
+import struct
+import subprocess
+import sys
+import termios
+import threading
+import time
+from argparse import ArgumentParser
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import Any, NamedTuple
+
+# Running a script only puts its own folder on the path, so add the repo root to import `termos`
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+SCREEN_SIZE = (200, 60)
+DRAG_DISTANCE = 100
+DRAG_RATE = 60
+"""Mouse moves per second while dragging, about what a terminal reports."""
+READY_TIMEOUT = 60.0
+
+
+class Session(NamedTuple):
+    label: str
+    seconds: float
+    bytes_read: int
+    """Bytes read from the pty while the user was interacting."""
+    total_bytes_read: int
+    report: dict[str, Any]
+    """What TermOS counted itself, over the whole session."""
+    output: bytes
+
+
+class PtyReader(threading.Thread):
+    def __init__(self, fd: int) -> None:
+        super().__init__(daemon=True)
+        self.fd = fd
+        self.output = bytearray()
+
+    def run(self) -> None:
+        while True:
+            try:
+                data = os.read(self.fd, 65536)
+            except OSError:
+                # EIO once TermOS has exited and the pty has closed
+                return
+            if not data:
+                return
+            self.output += data
+
+
+def run_child(home: Path, remote: bool) -> None:
+    """Run TermOS in the pty, reporting where to click once a window is open."""
+    import termos.termos
+    from termos.components.taskbar import Clock
+    from termos.termos import TermOS
+
+    class ScriptedTermOS(TermOS):
+        # Relative paths are from the subclass's module, so make them absolute
+        CSS_PATH = [
+            Path(termos.termos.__file__).with_name(path) if path == 'style.tcss' else path for path in TermOS.CSS_PATH
+        ]
+
+        # Textual calls each class's handler, so TermOS's on_mount still runs
+        def on_mount(self) -> None:
+            self.run_worker(self.open_windows())
+
+        async def open_windows(self) -> None:
+            await asyncio.sleep(1)
+            manifests = {manifest.name: manifest for manifest in self.os_apps}
+            manifests['Notepad'].launch(self)
+            await asyncio.sleep(1)
+            window = self.windows[-1]
+            window.offset = (10, 5)
+            await asyncio.sleep(0.5)
+            targets = {
+                'title_bar': [*window.title_bar.region.offset + (2, 0)],
+                'clock': [*self.query_one(Clock).region.offset],
+            }
+            (home / 'ready.json').write_text(json.dumps(targets))
+
+    app = ScriptedTermOS(remote=remote)
+    app.run()
+    report = {'bytes_written': app.remote_output.bytes_written, 'frames_written': app.remote_output.frames_written}
+    (home / 'report.json').write_text(json.dumps(report))
+
+
+def mouse(fd: int, button: int, x: int, y: int, release: bool = False) -> None:
+    os.write(fd, f'\x1b[<{button};{x + 1};{y + 1}{"m" if release else "M"}'.encode())
+
+
+def run_session(label: str, remote: bool, budget: int | None = None) -> Session:
+    with TemporaryDirectory() as directory:
+        home = Path(directory)
+        env = {**os.environ, 'TERM': 'xterm-256color', 'COLORTERM': 'truecolor'}
+        for variable in 'SSH_CONNECTION', 'SSH_TTY':
+            env.pop(variable, None)
+        # TEMP, which holds the user's folders, is left as it is, so apps boot as they would for the user
+        for variable in 'XDG_CACHE_HOME', 'XDG_CONFIG_HOME', 'XDG_STATE_HOME':
+            env[variable] = str(home / variable)
+        if budget is not None:
+            settings = home / 'XDG_CONFIG_HOME' / 'termos' / 'settings.json'
+            settings.parent.mkdir(parents=True)
+            settings.write_text(json.dumps({'remote_byte_budget': budget}))
+
+        master, slave = pty.openpty()
+        width, height = SCREEN_SIZE
+        fcntl.ioctl(slave, termios.TIOCSWINSZ, struct.pack('HHHH', height, width, 0, 0))
+        process = subprocess.Popen(
+            [sys.executable, __file__, '--child', 'on' if remote else 'off', str(home)],
+            stdin=slave, stdout=slave, stderr=slave, env=env, start_new_session=True,
+        )
+        os.close(slave)
+        reader = PtyReader(master)
+        reader.start()
+        try:
+            ready = home / 'ready.json'
+            deadline = time.monotonic() + READY_TIMEOUT
+            while not ready.exists():
+                if time.monotonic() > deadline or process.poll() is not None:
+                    raise RuntimeError(f'TermOS did not open a window:\n{reader.output.decode(errors="replace")[-2000:]}')
+                time.sleep(0.1)
+            targets = json.loads(ready.read_text())
+
+            start, start_bytes = time.monotonic(), len(reader.output)
+            x, y = targets['title_bar']
+            mouse(master, 0, x, y)
+            for step in range(1, DRAG_DISTANCE + 1):
+                time.sleep(1 / DRAG_RATE)
+                mouse(master, 32, x + step, y)
+            mouse(master, 0, x + DRAG_DISTANCE, y, release=True)
+            time.sleep(1)
+            for _ in range(2):
+                mouse(master, 0, *targets['clock'])
+                mouse(master, 0, *targets['clock'], release=True)
+                time.sleep(3)
+            seconds, bytes_read = time.monotonic() - start, len(reader.output) - start_bytes
+
+            os.write(master, b'\x11')  # ctrl+q
+            process.wait(timeout=30)
+        finally:
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+            reader.join(timeout=5)
+            os.close(master)
+        report_path = home / 'report.json'
+        report = json.loads(report_path.read_text()) if report_path.exists() else {}
+        output = bytes(reader.output)
+    return Session(label, seconds, bytes_read, len(output), report, output)
+
+
+def main() -> None:
+    parser = ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--budget', type=int, nargs='*', default=[], help='also run remote mode with these byte budgets')
+    parser.add_argument('--child', nargs=2, metavar=('MODE', 'HOME'), help='run TermOS in the pty (used internally)')
+    args = parser.parse_args()
+    if args.child:
+        mode, home = args.child
+        run_child(Path(home), mode == 'on')
+        return
+
+    sessions = [run_session('remote off', remote=False), run_session('remote on', remote=True)]
+    sessions += [run_session(f'remote on, {budget} B/s', remote=True, budget=budget) for budget in args.budget]
+    print(f'{"session":<26}{"bytes":>12}{"KiB/s":>10}{"saved":>8}{"frames":>9}{"counted":>12}{"read":>12}')
+    baseline = sessions[0].bytes_read
+    for session in sessions:
+        saved = 1 - session.bytes_read / baseline if baseline else 0.0
+        print(
+            f'{session.label:<26}{session.bytes_read:>12,}{session.bytes_read / session.seconds / 1024:>10.1f}'
+            f'{saved:>8.0%}{session.report.get("frames_written", 0):>9}'
+            f'{session.report.get("bytes_written", 0):>12,}{session.total_bytes_read:>12,}'
+        )
+    print('\n"bytes" and "KiB/s" cover the drag and quick settings; "counted" is what TermOS counted')
+    print('itself over the whole session, and "read" what was read from the pty.')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,289 @@
+"""
+Drive TermOS headlessly through scripted scenarios, reporting latency, frames and peak memory.
+
+Each scenario boots TermOS with `App.run_test()` and works it through the pilot as a user
+would, timing every step until TermOS has finished handling it. Scenarios run once with
+`tracemalloc` for their peak memory, which also warms up imports, then `--repeat` times for
+step latencies, the CPU time the steps took and frames rendered.
+
+Results are compared with the baseline saved by `--save-baseline` (machine specific, so not
+committed), and the run exits with an error if any scenario regressed beyond the tolerance.
+
+Run with `uv run python benchmarks/scenarios.py [--repeat N] [--save-baseline] [scenario ...]`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tracemalloc
+from argparse import ArgumentParser
+from contextlib import asynccontextmanager, contextmanager
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter, process_time
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterator
+
+# Running a script only puts its own folder on the path, so add the repo root to import `termos`
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from textual.pilot import Pilot
+from textual.widgets import ListView, Static
+
+from termos.apps import OSApp
+from termos.components.quick_settings import QuickSettings
+from termos.components.start_menu import StartMenu
+from termos.components.taskbar import Clock, StartButton
+from termos.termos import TermOS, WarmStart
+
+SCREEN_SIZE = (200, 60)
+BASELINE = Path(__file__).with_name('baseline.json')
+LATENCY_SLACK = 0.002
+"""Seconds a latency may grow by regardless of the tolerance, as tiny ones are mostly noise."""
+MEMORY_SLACK = 256 * 1024
+IDLE_PERIOD = 1.0
+
+
+class BenchmarkApp(OSApp):
+    NAME = 'Benchmark'
+    ICON = '⏱'
+
+    @staticmethod
+    def launch(os: TermOS) -> None:
+        BenchmarkApp(os).create_window(Static('benchmark'), width=30, height=8)
+
+
+class Measurement:
+    """What one scenario measured over all its runs."""
+
+    def __init__(self) -> None:
+        self.latencies: list[float] = []
+        self.cpu_time = 0.0
+        self.frames = 0
+        self.runs = 0
+        self.peak_memory = 0
+
+    @asynccontextmanager
+    async def boot(self, warm_start: WarmStart | None = None) -> AsyncIterator[Pilot]:
+        app = TermOS(warm_start)
+        display = app._display
+
+        def counted_display(screen, renderable) -> None:
+            # Headless apps skip writing, but everything up to it is done
+            if renderable is not None and not app._batch_count:
+                self.frames += 1
+            display(screen, renderable)
+
+        app._display = counted_display
+        async with app.run_test(size=SCREEN_SIZE) as pilot:
+            await pilot.pause()
+            yield pilot
+            for process in [*app.processes]:
+                await process.kill()
+
+    @contextmanager
+    def timed(self) -> Iterator[None]:
+        start, cpu_start = perf_counter(), process_time()
+        yield
+        self.latencies.append(perf_counter() - start)
+        self.cpu_time += process_time() - cpu_start
+
+    async def step(self, pilot: Pilot, action: Callable[[], Awaitable[Any] | None]) -> None:
+        """Time `action` until the app has handled everything it caused."""
+        with self.timed():
+            result = action()
+            if result is not None:
+                await result
+            await pilot.pause()
+
+    def percentile(self, percent: int) -> float:
+        if len(self.latencies) < 2:
+            return self.latencies[0] if self.latencies else 0.0
+        return statistics.quantiles(self.latencies, n=100, method='inclusive')[percent - 1]
+
+    def summary(self) -> dict[str, float]:
+        return {
+            'p50_ms': self.percentile(50) * 1000,
+            'p90_ms': self.percentile(90) * 1000,
+            'p99_ms': self.percentile(99) * 1000,
+            'cpu_ms': self.cpu_time / max(1, self.runs) * 1000,
+            'frames': self.frames / max(1, self.runs),
+            'peak_memory_kib': self.peak_memory / 1024,
+        }
+
+
+async def launch_apps(measure: Measurement) -> None:
+    """Open every app from the start menu."""
+    async with measure.boot() as pilot:
+        app = pilot.app
+        for index in range(len(app.os_apps)):
+            async def launch() -> None:
+                await pilot.click(StartButton)
+                app.query_one(StartMenu).query_one(ListView).index = index
+                await pilot.press('enter')
+            await measure.step(pilot, launch)
+
+
+async def open_windows(measure: Measurement, count: int = 20) -> None:
+    async with measure.boot() as pilot:
+        for _ in range(count):
+            await measure.step(pilot, lambda: BenchmarkApp.launch(pilot.app))
+
+
+async def drag_window(measure: Measurement) -> None:
+    """Drag a window by its title bar to the far side of the screen and back."""
+    async with measure.boot() as pilot:
+        BenchmarkApp.launch(pilot.app)
+        await pilot.pause()
+        window = pilot.app.windows[0]
+        await pilot.mouse_down(window.title_bar, offset=(2, 0))
+        start = window.region.offset + (2, 0)
+        width = SCREEN_SIZE[0] - window.region.width
+        for x in [*range(0, width, 8), *range(width, 0, -8)]:
+            await measure.step(pilot, lambda: pilot.hover(offset=(start.x + x, start.y + x // 8)))
+        await pilot.mouse_up()
+
+
+async def toggle_quick_settings(measure: Measurement, count: int = 5) -> None:
+    """Open and close quick settings from the taskbar clock, waiting for it to slide in and out."""
+    async with measure.boot() as pilot:
+        for _ in range(count):
+            async def toggle() -> None:
+                await pilot.click(Clock)
+                await pilot.wait_for_scheduled_animations()
+            await measure.step(pilot, toggle)
+            await measure.step(pilot, toggle)
+        assert not pilot.app.query_one(QuickSettings).visible
+
+
+async def switch_themes(measure: Measurement, count: int = 6) -> None:
+    """Switch themes with a few windows open, including back to themes used before."""
+    async with measure.boot() as pilot:
+        app = pilot.app
+        for _ in range(3):
+            BenchmarkApp.launch(app)
+        themes = [theme for theme in app.available_themes if theme != app.theme][:count // 2] + [app.theme]
+        for theme in [*themes, *themes]:
+            def switch() -> None:
+                app.theme = theme
+            await measure.step(pilot, switch)
+
+
+async def idle(measure: Measurement, seconds: int = 5, low_power: bool = False) -> None:
+    """Leave a desktop with clocks, a focused editor and the task manager alone, for CPU time."""
+    async with measure.boot() as pilot:
+        app = pilot.app
+        manifests = {manifest.name: manifest for manifest in app.os_apps}
+        for name in 'Clock', 'Clock', 'Task Manager', 'Notepad':
+            manifests[name].launch(app)
+        await pilot.pause()
+        app.low_power = low_power
+        await pilot.pause()
+        for _ in range(seconds):
+            await measure.step(pilot, lambda: asyncio.sleep(IDLE_PERIOD))
+
+
+async def idle_low_power(measure: Measurement) -> None:
+    """As `idle`, in the low power mode TermOS switches to after the idle timeout."""
+    await idle(measure, low_power=True)
+
+
+async def restart(measure: Measurement, count: int = 5) -> None:
+    """Restart as quick settings' Restart does, timing each boot to its first frame."""
+    warm_start = None
+    for _ in range(count):
+        with measure.timed():
+            async with measure.boot(warm_start) as pilot:
+                warm_start = pilot.app.warm_start()
+
+
+SCENARIOS: dict[str, Callable[[Measurement], Awaitable[None]]] = {
+    'launch_apps': launch_apps,
+    'open_windows': open_windows,
+    'drag_window': drag_window,
+    'toggle_quick_settings': toggle_quick_settings,
+    'switch_themes': switch_themes,
+    'idle': idle,
+    'idle_low_power': idle_low_power,
+    'restart': restart,
+}
+
+
+async def measure(scenario: Callable[[Measurement], Awaitable[None]], repeat: int) -> Measurement:
+    measurement = Measurement()
+    tracemalloc.start()
+    try:
+        await scenario(Measurement())
+        measurement.peak_memory = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    for _ in range(repeat):
+        await scenario(measurement)
+        measurement.runs += 1
+    return measurement
+
+
+def regressions(results: dict[str, dict[str, float]], baseline: dict[str, dict[str, float]], tolerance: float) -> list[str]:
+    found = []
+    for name, result in results.items():
+        expected = baseline.get(name)
+        if expected is None:
+            continue
+        for metric, value in result.items():
+            if metric not in expected:
+                continue
+            slack = {'frames': 1, 'peak_memory_kib': MEMORY_SLACK / 1024}.get(metric, LATENCY_SLACK * 1000)
+            limit = expected[metric] * (1 + tolerance) + slack
+            if value > limit:
+                found.append(f'{name} {metric}: {value:.2f}, baseline {expected[metric]:.2f} (limit {limit:.2f})')
+    return found
+
+
+def main() -> None:
+    parser = ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('scenarios', nargs='*', help=f'scenarios to run, by default all of: {", ".join(SCENARIOS)}')
+    parser.add_argument('--repeat', type=int, default=3, help='times each scenario is run for latencies')
+    parser.add_argument('--baseline', type=Path, default=BASELINE, help='baseline to compare with or save')
+    parser.add_argument('--save-baseline', action='store_true', help='save the results as the baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='fraction a metric may exceed its baseline by')
+    args = parser.parse_args()
+    for name in args.scenarios:
+        if name not in SCENARIOS:
+            parser.error(f'unknown scenario {name!r}')
+
+    results = {}
+    # TermOS's settings, session and caches, so the benchmark neither reads nor changes the user's. TEMP,
+    # which holds the user's folders, is left as it is, so apps boot as they would for the user
+    with TemporaryDirectory() as home:
+        for variable in 'XDG_CACHE_HOME', 'XDG_CONFIG_HOME', 'XDG_STATE_HOME':
+            os.environ[variable] = os.path.join(home, variable)
+        print(
+            f'{"scenario":<24}{"steps":>7}{"p50 ms":>10}{"p90 ms":>10}{"p99 ms":>10}'
+            f'{"CPU ms":>10}{"frames":>9}{"peak KiB":>11}'
+        )
+        for name in args.scenarios or SCENARIOS:
+            measurement = asyncio.run(measure(SCENARIOS[name], args.repeat))
+            results[name] = summary = measurement.summary()
+            print(
+                f'{name:<24}{len(measurement.latencies):>7}{summary["p50_ms"]:>10.2f}{summary["p90_ms"]:>10.2f}'
+                f'{summary["p99_ms"]:>10.2f}{summary["cpu_ms"]:>10.1f}{summary["frames"]:>9.0f}'
+                f'{summary["peak_memory_kib"]:>11.0f}'
+            )
+
+    if args.save_baseline:
+        baseline = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+        args.baseline.write_text(json.dumps({**baseline, **results}, indent=2) + '\n')
+        print(f'saved baseline to {args.baseline}')
+    elif args.baseline.exists():
+        found = regressions(results, json.loads(args.baseline.read_text()), args.tolerance)
+        if found:
+            print('\nREGRESSIONS against the baseline:', *found, sep='\n  ', file=sys.stderr)
+            sys.exit(1)
+        print(f'\nno regressions against {args.baseline}')
+
+
+if __name__ == '__main__':
+    main()
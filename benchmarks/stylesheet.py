@@ -0,0 +1,102 @@
+"""
+Benchmark parsing and applying the stylesheet, with and without the compiled rule cache.
+
+Every app is opened first, so the stylesheet holds the CSS of each app and widget.
+Run with `uv run python benchmarks/stylesheet.py [--repeat N]`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+from argparse import ArgumentParser
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from typing import Callable
+
+# Running a script only puts its own folder on the path, so add the repo root to import `termos`
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from textual.css.stylesheet import Stylesheet
+
+from termos.stylesheet import CachedStylesheet, rule_cache
+from termos.termos import TermOS
+
+
+def best_of(repeat: int, setup: Callable[[], Stylesheet], run: Callable[[Stylesheet], None]) -> float:
+    times = []
+    for _ in range(repeat):
+        stylesheet = setup()
+        start = perf_counter()
+        run(stylesheet)
+        times.append(perf_counter() - start)
+    return min(times)
+
+
+async def run(repeat: int) -> None:
+    app = TermOS()
+    async with app.run_test(size=(200, 60)) as pilot:
+        for manifest in app.os_apps:
+            manifest.launch(app)
+        await pilot.pause()
+        source = app.stylesheet.source.copy()
+        variables = app.get_css_variables()
+
+        def stylesheet(cls: type[Stylesheet]) -> Callable[[], Stylesheet]:
+            def setup() -> Stylesheet:
+                new = cls(variables=variables)
+                new.source = source.copy()
+                return new
+            return setup
+
+        def from_disk() -> Stylesheet:
+            rule_cache._rules.clear()
+            return stylesheet(CachedStylesheet)()
+
+        parse = Stylesheet.parse
+        uncached = best_of(repeat, stylesheet(Stylesheet), parse)
+        rule_cache.save()
+        disk = best_of(repeat, from_disk, parse)
+        memory = best_of(repeat, stylesheet(CachedStylesheet), parse)
+
+        start = perf_counter()
+        for _ in range(repeat):
+            app.stylesheet.update(app)
+        apply = (perf_counter() - start) / repeat
+
+        themes = [theme for theme in app.available_themes if theme != app.theme][:2]
+        start = perf_counter()
+        for theme in themes:
+            app.theme = theme
+            await pilot.pause()
+        first_switch = (perf_counter() - start) / len(themes)
+        start = perf_counter()
+        for theme in themes:
+            app.theme = theme
+            await pilot.pause()
+        repeat_switch = (perf_counter() - start) / len(themes)
+
+    print(f'{len(source)} CSS sources, {sum(len(css.content) for css in source.values())} characters')
+    print(f'parse without cache   {uncached * 1000:8.2f} ms')
+    print(f'parse from disk cache {disk * 1000:8.2f} ms')
+    print(f'parse from memory     {memory * 1000:8.2f} ms')
+    print(f'apply to every node   {apply * 1000:8.2f} ms')
+    print(f'switch to a new theme {first_switch * 1000:8.2f} ms')
+    print(f'switch back to theme  {repeat_switch * 1000:8.2f} ms')
+
+
+def main() -> None:
+    parser = ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5, help='times each measurement is repeated')
+    args = parser.parse_args()
+    # TermOS's settings, session and caches, so the benchmark neither reads nor changes the user's
+    with TemporaryDirectory() as home:
+        for variable in 'XDG_CACHE_HOME', 'XDG_CONFIG_HOME', 'XDG_STATE_HOME':
+            os.environ[variable] = os.path.join(home, variable)
+        asyncio.run(run(args.repeat))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""
+Benchmark opening and closing many windows, which exercises the taskbar's incremental tab updates.
+
+Run with `uv run python benchmarks/taskbar_windows.py [--windows N]`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+from argparse import ArgumentParser
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+# Running a script only puts its own folder on the path, so add the repo root to import `termos`
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from textual.widgets import Static
+
+from termos.apps import OSApp
+from termos.components.taskbar import Taskbar
+from termos.termos import TermOS
+
+
+class BenchmarkApp(OSApp):
+    NAME = 'Benchmark'
+    ICON = '⏱'
+
+    @staticmethod
+    def launch(os: TermOS) -> None:
+        BenchmarkApp(os).create_window(Static('benchmark'), width=20, height=3)
+
+
+async def run(window_count: int) -> None:
+    app = TermOS()
+    async with app.run_test(size=(200, 50)) as pilot:
+        taskbar = app.query_one(Taskbar)
+
+        start = perf_counter()
+        for _ in range(window_count):
+            BenchmarkApp.launch(app)
+            await pilot.pause()
+        open_time = perf_counter() - start
+        assert len(taskbar.tabs) == window_count
+
+        start = perf_counter()
+        for window in list(app.windows):
+            window.post_message(window.Closed(window))
+            await pilot.pause()
+        close_time = perf_counter() - start
+        assert not taskbar.tabs
+
+    print(f'opened {window_count} windows in {open_time * 1000:.1f} ms ({open_time / window_count * 1000:.2f} ms/window)')
+    print(f'closed {window_count} windows in {close_time * 1000:.1f} ms ({close_time / window_count * 1000:.2f} ms/window)')
+
+
+def main() -> None:
+    parser = ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--windows', type=int, default=200, help='number of windows to open and close')
+    args = parser.parse_args()
+    # TermOS's settings, session and caches, so the benchmark neither reads nor changes the user's
+    with TemporaryDirectory() as home:
+        for variable in 'XDG_CACHE_HOME', 'XDG_CONFIG_HOME', 'XDG_STATE_HOME':
+            os.environ[variable] = os.path.join(home, variable)
+        asyncio.run(run(args.windows))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,8 +1,41 @@
-def main() -> None:
+from argparse import ArgumentParser, BooleanOptionalAction
+from pathlib import Path
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = ArgumentParser(prog='termos', description='An operating system in your terminal')
+    parser.add_argument(
+        '--profile-startup',
+        metavar='REPORT',
+        nargs='?',
+        const='termos-startup.json',
+        type=Path,
+        help='boot once, write a JSON startup profile to REPORT and print a summary',
+    )
+    parser.add_argument(
+        '--remote',
+        action=BooleanOptionalAction,
+        help='send only what changes on screen, within a byte budget, for slow links (default: on over SSH)',
+    )
+    args = parser.parse_args(argv)
+
+    if args.profile_startup is not None:
+        from .profiling import tracer
+        tracer.enable()
+        with tracer.phase('import termos'):
+            from .termos import TermOS
+        TermOS().run()
+        tracer.finish()
+        tracer.dump(args.profile_startup)
+        print(tracer.summary())
+        print(f'\nStartup profile written to {args.profile_startup}')
+        return
+
     from .termos import TermOS
-    app_return = True
-    while app_return is not None:
-        app_return = TermOS().run()
+    app = TermOS(remote=args.remote)
+    # Restarts reuse what the previous instance loaded
+    while app.run() is not None:
+        app = TermOS(app.warm_start(), remote=args.remote)
 
 
 if __name__ == '__main__':
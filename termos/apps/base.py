@@ -1,13 +1,22 @@
 from __future__ import annotations
 
 import abc
+import ast
+import asyncio
+import json
+import sys
 from importlib import import_module
 from pathlib import Path
-from typing import Generator, TYPE_CHECKING
+from types import ModuleType
+from typing import Any, Callable, Generator, NamedTuple, TYPE_CHECKING
 
 from textual.widget import Widget
 
+from termos.apps.instrumentation import AppStats
+from termos.apps.process import AppProcess
 from termos.components.window import Window
+from termos.paths import cache_dir, recovery_dir
+from termos.settings import WINDOW_GEOMETRY
 
 if TYPE_CHECKING:
     from termos.termos import TermOS
@@ -17,9 +26,19 @@ class OSApp(abc.ABC):
     NAME: str = 'Unnamed App'
     ICON: str = '❓'
     DESCRIPTION: str = ''
+    RUN_IN_PROCESS: bool = False
+    """Run work passed to `compute` in a dedicated worker process rather than a thread.
+
+    Only that work is isolated: the app's widgets still run on TermOS's event loop.
+    """
 
     def __init__(self, os: TermOS):
         self.os = os
+        self.stats = AppStats()
+        # Started by the first `compute`, so launching the app doesn't wait on a new interpreter
+        self.process: AppProcess | None = None
+        if self.RUN_IN_PROCESS:
+            self.process = AppProcess(self.NAME, on_exit=self.on_process_exit)
         self.os.processes.append(self)
         self.os.on_app_launched(self.__class__)
 
@@ -28,6 +47,19 @@ class OSApp(abc.ABC):
     def launch(os: TermOS) -> None:
         pass
 
+    @classmethod
+    def restore(cls, os: TermOS, state: Any) -> None:
+        """Reopen a window from the last session, given what `window_state` returned for it."""
+        cls.launch(os)
+
+    def window_state(self, window: Window) -> Any:
+        """What `restore` needs to reopen `window` at the next boot. Must be JSON serialisable."""
+        return None
+
+    @classmethod
+    def recover(cls, os: TermOS) -> None:
+        """Reopen work left unsaved when TermOS last stopped. Called at boot if the app's `recovery_dir` isn't empty."""
+
     def create_window(
         self,
         content: Widget,
@@ -42,18 +74,62 @@ class OSApp(abc.ABC):
         if icon is Ellipsis:
             icon = self.ICON
 
-        window = Window(self, content, classes, title, icon, width, height)
+        restoring = self.os.session.restoring
+        if restoring is not None:
+            width, height = restoring['width'], restoring['height']
+            geometry = restoring
+        else:
+            geometry = self.os.settings.get(WINDOW_GEOMETRY).get(self.NAME, {})
+        window = Window(
+            self, content, classes, title, icon, width, height,
+            offset=tuple(geometry.get('offset', (0, 0))), maximised=geometry.get('maximised', False),
+        )
+        if restoring is not None:
+            # Mounted by the session, in stacking order
+            self.os.session.created(window)
+            return window
         self.os.query_one('#window-container').mount(window)
         window.focus()
         return window
 
+    async def compute(self, function: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Run a slow function without blocking the desktop.
+
+        With `RUN_IN_PROCESS` the function runs in the app's worker process, so it must be
+        picklable (i.e. defined at module level), as must its arguments and result.
+        """
+        if self.process is None:
+            return await asyncio.to_thread(function, *args, **kwargs)
+        return await self.process.call(function, *args, **kwargs)
+
+    def cancel_compute(self) -> None:
+        """Abandon work running in the worker process. A fresh worker starts on the next `compute`."""
+        if self.process is not None:
+            self.process.kill()
+
+    def on_process_exit(self, exit_code: int | None) -> None:
+        """Called when the worker process dies without being stopped by the app."""
+        self.os.notify(
+            f'Its worker process exited with code {exit_code} and will restart when needed.',
+            title=f'{self.NAME} crashed',
+            severity='error',
+        )
+
     async def on_window_close(self, window: Window) -> None:
         await window.remove()
         # Kill the app if it has no remaining windows open
-        if not any(window.parent_app is self for window in self.os.windows):
+        if not self.os.window_manager.has_windows(self):
             await self.kill()
 
     async def kill(self) -> None:
+        for window in self.os.window_manager.windows_of(self):
+            # Minimised windows from the last session aren't mounted until their tab is clicked
+            mounted = window not in self.os.session.deferred
+            self.os.forget_window(window)
+            if mounted:
+                await window.remove()
+        if self.process is not None:
+            await self.process.stop()
         self.os.processes.remove(self)
         self.os.on_app_killed(self.__class__)
 
@@ -65,22 +141,133 @@ def tcss_paths() -> Generator[Path, None, None]:
             yield app_dir
 
 
-def apps() -> Generator[type[OSApp], None, None]:
-    for app_dir in Path(__file__).parent.iterdir():
-        app_dir: Path
-        if not app_dir.is_dir():
-            continue
-        init_file = app_dir / '__init__.py'
-        if not init_file.is_file():
+class AppManifest(NamedTuple):
+    """Everything the desktop needs to know about an app without importing it."""
+
+    name: str
+    icon: str
+    description: str
+    module: str
+    entry_point: str
+
+    def load(self) -> type[OSApp]:
+        return getattr(import_module(self.module), self.entry_point)
+
+    def launch(self, os: TermOS) -> None:
+        self.load().launch(os)
+
+    def has_recovery_data(self) -> bool:
+        """Whether the app left work to recover, checked without importing it."""
+        folder = recovery_dir(self.name)
+        return folder.is_dir() and any(folder.iterdir())
+
+
+MANIFEST_CACHE = 'app-manifest.json'
+
+
+def _app_dirs() -> Generator[Path, None, None]:
+    for app_dir in sorted(Path(__file__).parent.iterdir()):
+        if app_dir.is_dir() and (app_dir / '__init__.py').is_file():
+            yield app_dir
+
+
+def _cache_key(app_dir: Path) -> list[list[Any]]:
+    """The name and mtime of each of an app's source files, which changes when one is added, removed or edited."""
+    # Not the directory's mtime, which importing the app changes by creating __pycache__
+    return [
+        [file.name, file.stat().st_mtime_ns]
+        for file in sorted([*app_dir.glob('*.py'), *app_dir.glob('*.tcss')])
+    ]
+
+
+def app_versions() -> dict[str, list[list[Any]]]:
+    """A key for each app package, which changes whenever any of its source files do."""
+    return {app_dir.name: _cache_key(app_dir) for app_dir in _app_dirs()}
+
+
+def dependent_packages(changed: set[str]) -> set[str]:
+    """The imported app packages using any of the `changed` ones, directly or indirectly, and those."""
+    def package_of(module: str) -> str | None:
+        parts = module.split('.')
+        return parts[2] if len(parts) > 2 and parts[:2] == ['termos', 'apps'] else None
+
+    uses: dict[str, set[str]] = {}
+    for name, module in [*sys.modules.items()]:
+        package = package_of(name)
+        if package is None or module is None:
             continue
+        used = uses.setdefault(package, set())
+        for value in [*vars(module).values()]:
+            other = package_of(value.__name__ if isinstance(value, ModuleType) else getattr(value, '__module__', None) or '')
+            if other is not None and other != package:
+                used.add(other)
+
+    result = set(changed)
+    while more := {package for package, used in uses.items() if package not in result and used & result}:
+        result |= more
+    return result
+
+
+def _scan_app_dir(app_dir: Path) -> list[AppManifest]:
+    """Read app metadata straight from the source, so no app code runs during discovery."""
+    manifests = []
+    for file in sorted(app_dir.glob('*.py')):
         try:
-            module = import_module(f'termos.apps.{app_dir.name}.__init__')
-        except ImportError:
+            tree = ast.parse(file.read_text(encoding='utf-8'), filename=str(file))
+        except (OSError, SyntaxError):
             continue
 
-        for name in dir(module):
-            if name.startswith('_'):
+        module = f'termos.apps.{app_dir.name}'
+        if file.stem != '__init__':
+            module += f'.{file.stem}'
+
+        for node in tree.body:
+            if not isinstance(node, ast.ClassDef):
+                continue
+            if not any(
+                isinstance(base, ast.Name) and base.id == 'OSApp'
+                or isinstance(base, ast.Attribute) and base.attr == 'OSApp'
+                for base in node.bases
+            ):
                 continue
-            obj = getattr(module, name)
-            if issubclass(obj, OSApp):
-                yield obj
+
+            fields = {'NAME': OSApp.NAME, 'ICON': OSApp.ICON, 'DESCRIPTION': OSApp.DESCRIPTION}
+            for statement in node.body:
+                if (
+                    isinstance(statement, ast.Assign)
+                    and len(statement.targets) == 1
+                    and isinstance(statement.targets[0], ast.Name)
+                    and statement.targets[0].id in fields
+                    and isinstance(statement.value, ast.Constant)
+                ):
+                    fields[statement.targets[0].id] = statement.value.value
+
+            manifests.append(AppManifest(
+                fields['NAME'], fields['ICON'], fields['DESCRIPTION'], module, node.name
+            ))
+    return manifests
+
+
+def apps() -> Generator[AppManifest, None, None]:
+    cache_file = cache_dir() / MANIFEST_CACHE
+    try:
+        cache = json.loads(cache_file.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        cache = {}
+
+    new_cache = {}
+    for app_dir in _app_dirs():
+        key = _cache_key(app_dir)
+        entry = cache.get(app_dir.name)
+        if entry is not None and entry['key'] == key:
+            manifests = [AppManifest(*manifest) for manifest in entry['apps']]
+        else:
+            manifests = _scan_app_dir(app_dir)
+        new_cache[app_dir.name] = {'key': key, 'apps': [list(manifest) for manifest in manifests]}
+        yield from manifests
+
+    if new_cache != cache:
+        try:
+            cache_file.write_text(json.dumps(new_cache), encoding='utf-8')
+        except OSError:
+            pass
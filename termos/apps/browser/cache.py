@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from contextlib import suppress
+from pathlib import Path
+from typing import NamedTuple
+
+from termos.paths import cache_dir
+
+DISK_CACHE_SIZE = 64 * 1024 * 1024
+"""Bytes of HTTP response bodies to keep on disk."""
+MEMORY_CACHE_SIZE = 8 * 1024 * 1024
+"""Characters of converted Markdown to keep in memory."""
+
+
+class CacheStats:
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+
+    def __repr__(self) -> str:
+        return f'CacheStats(hits={self.hits}, misses={self.misses}, hit_rate={self.hit_rate:.0%})'
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def record(self, hit: bool) -> None:
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+
+class MarkdownCache:
+    """Least recently used cache of converted pages, bounded by their total length."""
+
+    def __init__(self, max_size: int = MEMORY_CACHE_SIZE) -> None:
+        self.max_size = max_size
+        self.size = 0
+        self.pages: OrderedDict[str, str] = OrderedDict()
+        self.stats = CacheStats()
+
+    def get(self, url: str) -> str | None:
+        markdown = self.pages.get(url)
+        self.stats.record(markdown is not None)
+        if markdown is not None:
+            self.pages.move_to_end(url)
+        return markdown
+
+    def put(self, url: str, markdown: str) -> None:
+        self.discard(url)
+        if len(markdown) > self.max_size:
+            return
+        self.pages[url] = markdown
+        self.size += len(markdown)
+        while self.size > self.max_size:
+            _, evicted = self.pages.popitem(last=False)
+            self.size -= len(evicted)
+
+    def discard(self, url: str) -> None:
+        markdown = self.pages.pop(url, None)
+        if markdown is not None:
+            self.size -= len(markdown)
+
+
+class CachedResponse(NamedTuple):
+    body: str
+    etag: str | None
+    last_modified: str | None
+
+    def validators(self) -> dict[str, str]:
+        """Headers which turn a request for this response into a conditional one."""
+        headers = {}
+        if self.etag is not None:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified is not None:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    """Disk cache of response bodies and their validators, evicting the least recently used beyond `max_size` bytes.
+
+    The size of each entry is read from the directory once, ordered by when it was last used,
+    and kept up to date from then on, so eviction doesn't need to list the directory again.
+    Methods do blocking file IO, so call them from a thread.
+    """
+
+    def __init__(self, directory: Path, max_size: int = DISK_CACHE_SIZE) -> None:
+        self.directory = directory
+        self.max_size = max_size
+        self.stats = CacheStats()
+        self.size = 0
+        self._entries: OrderedDict[Path, int] | None = None
+        """Bytes in each entry, least recently used first, or None until first needed."""
+        self._lock = threading.Lock()
+
+    def _index(self) -> OrderedDict[Path, int]:
+        if self._entries is None:
+            entries = []
+            with suppress(OSError):
+                for path in self.directory.iterdir():
+                    try:
+                        stat = path.stat()
+                    except OSError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, path))
+            self._entries = OrderedDict((path, size) for _, size, path in sorted(entries))
+            self.size = sum(self._entries.values())
+        return self._entries
+
+    def _path(self, url: str) -> Path:
+        return self.directory / hashlib.sha256(url.encode()).hexdigest()
+
+    def get(self, url: str) -> CachedResponse | None:
+        path = self._path(url)
+        try:
+            with path.open(encoding='utf-8') as file:
+                metadata = json.loads(file.readline())
+                body = file.read()
+        except (OSError, ValueError):
+            return None
+        if metadata.get('url') != url:
+            return None
+        os.utime(path)  # the mtime orders entries by when they were last used, for the next session
+        with self._lock:
+            entries = self._index()
+            if path in entries:
+                entries.move_to_end(path)
+        return CachedResponse(body, metadata.get('etag'), metadata.get('last_modified'))
+
+    def put(self, url: str, body: str, etag: str | None, last_modified: str | None) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        metadata = json.dumps({'url': url, 'etag': etag, 'last_modified': last_modified})
+        path = self._path(url)
+        temporary = path.with_suffix('.tmp')
+        try:
+            temporary.write_text(f'{metadata}\n{body}', encoding='utf-8')
+            size = temporary.stat().st_size
+            temporary.replace(path)
+        except OSError:
+            return
+        with self._lock:
+            entries = self._index()
+            self.size += size - entries.pop(path, 0)
+            entries[path] = size
+            self._evict()
+
+    def _evict(self) -> None:
+        entries = self._index()
+        while self.size > self.max_size and entries:
+            path, size = entries.popitem(last=False)
+            path.unlink(missing_ok=True)
+            self.size -= size
+
+
+response_cache = ResponseCache(cache_dir() / 'browser')
+markdown_cache = MarkdownCache()
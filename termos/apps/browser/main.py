@@ -1,42 +1,127 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+import asyncio
+from typing import Any, TYPE_CHECKING
 
-import httpx
 from markdownify import markdownify
-from textual import work
+from textual import on, work
 from textual.app import ComposeResult
 from textual.containers import HorizontalGroup
 from textual.widget import Widget
 from textual.widgets import MarkdownViewer, Input, Button
 
 from termos.apps import OSApp
+from termos.apps.browser.cache import markdown_cache, response_cache
 
 if TYPE_CHECKING:
+    from termos.components.window import Window
     from termos.termos import TermOS
 
+PREVIEW_SIZE = 32 * 1024
+"""Characters of HTML to convert and show while the rest of the page is still downloading."""
+
 
 class BrowserWidget(Widget):
-    def __init__(self, session: httpx.AsyncClient) -> None:
+    def __init__(self, browser: Browser, history: list[str] | None = None, history_index: int = -1) -> None:
         super().__init__()
-        self.session = session
+        self.browser = browser
+        self.history: list[str] = history or []
+        self.history_index = history_index
 
     def compose(self) -> ComposeResult:
         with HorizontalGroup():
-            yield Button('Toggle sidebar', variant='primary')
+            yield Button('←', id='back', disabled=True)
+            yield Button('→', id='forward', disabled=True)
+            yield Button('Toggle sidebar', variant='primary', id='toggle-sidebar')
             yield Input(placeholder='https://example.com', classes='url-input')
         yield MarkdownViewer(open_links=False)
 
+    def on_mount(self) -> None:
+        if 0 <= self.history_index < len(self.history):
+            self.go_to(self.history_index)
+
     def on_input_submitted(self, message: Input.Submitted) -> None:
-        self.fetch_web_page(message.value)
+        del self.history[self.history_index + 1:]
+        self.history.append(message.value)
+        self.go_to(len(self.history) - 1, revalidate=True)
+
+    def go_to(self, history_index: int, revalidate: bool = False) -> None:
+        self.history_index = history_index
+        url = self.history[history_index]
+        self.query_one(Input).value = url
+        self.query_one('#back', Button).disabled = history_index <= 0
+        self.query_one('#forward', Button).disabled = history_index >= len(self.history) - 1
+        self.fetch_web_page(url, revalidate)
 
     @work(exclusive=True, exit_on_error=False)
-    async def fetch_web_page(self, url: str) -> None:
-        response = await self.session.get(url)
-        markdown = markdownify(response.text)
-        await self.query_one(MarkdownViewer).document.update(markdown)
+    async def fetch_web_page(self, url: str, revalidate: bool = True) -> None:
+        document = self.query_one(MarkdownViewer).document
+
+        # going back and forward shows the page as it was, without touching the network
+        if not revalidate and (markdown := markdown_cache.get(url)) is not None:
+            await document.update(markdown)
+            return
+
+        cached = await asyncio.to_thread(response_cache.get, url)
+        headers = cached.validators() if cached is not None else {}
+        html: list[str] = []
+        size = 0
+        shown_preview = False
+        converting = False
+
+        try:
+            async with self.browser.os.network.stream('GET', url, self.browser.NAME, headers=headers) as response:
+                not_modified = cached is not None and response.status_code == 304
+                response_cache.stats.record(not_modified)
+                if not_modified:
+                    html.append(cached.body)
+                    markdown = markdown_cache.get(url)
+                    if markdown is not None:
+                        await document.update(markdown)
+                        return
+                else:
+                    async for chunk in response.aiter_text():
+                        html.append(chunk)
+                        size += len(chunk)
+                        if not shown_preview and size >= PREVIEW_SIZE:
+                            # show the first screenful without waiting for the whole page
+                            shown_preview = True
+                            converting = True
+                            preview = await self.browser.compute(markdownify, ''.join(html))
+                            converting = False
+                            await document.update(preview)
+
+            body = ''.join(html)
+            converting = True
+            markdown = await self.browser.compute(markdownify, body)
+            converting = False
+        except asyncio.CancelledError:
+            # a new URL was submitted; don't leave the worker busy converting the old page
+            if converting:
+                self.browser.cancel_compute()
+            raise
+
+        markdown_cache.put(url, markdown)
+        await document.update(markdown)
 
-    def on_button_pressed(self) -> None:
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if response.status_code == 200 and (etag or last_modified):
+            await asyncio.to_thread(response_cache.put, url, body, etag, last_modified)
+        self.log.info(http_cache=response_cache.stats, markdown_cache=markdown_cache.stats)
+
+    @on(Button.Pressed, '#back')
+    def go_back(self) -> None:
+        if self.history_index > 0:
+            self.go_to(self.history_index - 1)
+
+    @on(Button.Pressed, '#forward')
+    def go_forward(self) -> None:
+        if self.history_index < len(self.history) - 1:
+            self.go_to(self.history_index + 1)
+
+    @on(Button.Pressed, '#toggle-sidebar')
+    def toggle_sidebar(self) -> None:
         viewer = self.query_one(MarkdownViewer)
         viewer.show_table_of_contents = not viewer.show_table_of_contents
 
@@ -45,16 +130,19 @@ class Browser(OSApp):
     NAME = 'Browser'
     ICON = '🌐'
     DESCRIPTION = 'Read web pages using Markdown'
-
-    def __init__(self, os: TermOS) -> None:
-        super().__init__(os)
-        self.client = httpx.AsyncClient(follow_redirects=True)
-
-    async def kill(self) -> None:
-        await self.client.aclose()
-        await super().kill()
+    RUN_IN_PROCESS = True
 
     @staticmethod
     def launch(os: TermOS) -> None:
         instance = Browser(os)
-        instance.create_window(BrowserWidget(instance.client), 'browser', width=150, height=40)
+        instance.create_window(BrowserWidget(instance), 'browser', width=150, height=40)
+
+    @classmethod
+    def restore(cls, os: TermOS, state: dict[str, Any] | None) -> None:
+        instance = Browser(os)
+        history, history_index = (state['history'], state['index']) if state else ([], -1)
+        instance.create_window(BrowserWidget(instance, history, history_index), 'browser', width=150, height=40)
+
+    def window_state(self, window: Window) -> dict[str, Any]:
+        content: BrowserWidget = window.content
+        return {'history': content.history, 'index': content.history_index}
@@ -2,8 +2,6 @@
 An App to show the current time.
 """
 
-from datetime import datetime
-
 from textual.app import ComposeResult
 from textual.widget import Widget
 from textual.widgets import Digits
@@ -13,16 +11,16 @@ from termos.termos import TermOS
 
 
 class ClockWidget(Widget):
+    app: TermOS
+
     def compose(self) -> ComposeResult:
         yield Digits('')
 
     def on_mount(self) -> None:
-        self.update_clock()
-        self.set_interval(1, self.update_clock)
+        self.app.ticker.subscribe(self, '%T', self.query_one(Digits).update)
 
-    def update_clock(self) -> None:
-        clock = datetime.now().time()
-        self.query_one(Digits).update(f'{clock:%T}')
+    def on_unmount(self) -> None:
+        self.app.ticker.unsubscribe(self)
 
 
 class Clock(OSApp):
@@ -0,0 +1,284 @@
+from __future__ import annotations
+
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, NamedTuple, TYPE_CHECKING
+
+from rich.segment import Segment
+from rich.style import Style
+from textual import events, work
+from textual.binding import Binding
+from textual.geometry import Size
+from textual.message import Message
+from textual.reactive import reactive
+from textual.scroll_view import ScrollView
+from textual.strip import Strip
+
+if TYPE_CHECKING:
+    from termos.file_watcher import Change
+
+SCAN_BATCH_SIZE = 512
+"""Directory entries to read before handing them to the UI."""
+
+
+class FileEntry(NamedTuple):
+    name: str
+    size: int
+    modified: float
+
+    @classmethod
+    def from_stat(cls, name: str, stat: os.stat_result) -> FileEntry:
+        return cls(name, stat.st_size, stat.st_mtime)
+
+
+SORT_KEYS = {
+    'name': lambda entry: entry.name.casefold(),
+    'size': lambda entry: entry.size,
+    'modified': lambda entry: entry.modified,
+}
+
+
+class FileIndex:
+    """The files of one folder, kept as plain tuples so sorting and filtering never touch widgets."""
+
+    def __init__(self) -> None:
+        self.entries: dict[str, FileEntry] = {}
+        self.sort_by = 'name'
+        self.reverse = False
+        self.filter = ''
+        self._view: list[FileEntry] | None = None
+
+    def __len__(self) -> int:
+        return len(self.view)
+
+    @property
+    def view(self) -> list[FileEntry]:
+        """Entries matching the filter, in sort order. Rebuilt lazily after any change."""
+        if self._view is None:
+            needle = self.filter.casefold()
+            entries = [entry for entry in self.entries.values() if needle in entry.name.casefold()]
+            entries.sort(key=SORT_KEYS[self.sort_by], reverse=self.reverse)
+            self._view = entries
+        return self._view
+
+    def invalidate(self) -> None:
+        self._view = None
+
+    def add(self, entries: Iterable[FileEntry]) -> None:
+        for entry in entries:
+            self.entries[entry.name] = entry
+        self.invalidate()
+
+    def remove(self, name: str) -> None:
+        if self.entries.pop(name, None) is not None:
+            self.invalidate()
+
+    def clear(self) -> None:
+        self.entries.clear()
+        self.invalidate()
+
+    def set_order(self, sort_by: str, reverse: bool = False) -> None:
+        self.sort_by = sort_by
+        self.reverse = reverse
+        self.invalidate()
+
+    def set_filter(self, text: str) -> None:
+        self.filter = text
+        self.invalidate()
+
+
+def scan_folder(folder: Path, suffix: str) -> Iterable[list[FileEntry]]:
+    """Read a folder in batches with `os.scandir`, which reuses the stat info from the directory listing."""
+    batch = []
+    with os.scandir(folder) as entries:
+        for entry in entries:
+            if not entry.name.endswith(suffix):
+                continue
+            try:
+                if not entry.is_file():
+                    continue
+                stat = entry.stat()
+            except OSError:
+                continue
+            batch.append(FileEntry.from_stat(entry.name, stat))
+            if len(batch) >= SCAN_BATCH_SIZE:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+class FileList(ScrollView, can_focus=True):
+    """A virtualised list of files: only the rows on screen are ever rendered.
+
+    The folder is read once when mounted, then kept up to date from the OS file watcher.
+    """
+
+    DEFAULT_CSS = '''
+    FileList {
+        height: 1fr;
+        min-height: 3;
+    }
+    '''
+
+    BINDINGS = [
+        Binding('up', 'cursor_up', 'Up', show=False),
+        Binding('down', 'cursor_down', 'Down', show=False),
+        Binding('enter', 'select', 'Open', show=False),
+    ]
+
+    cursor = reactive(0)
+
+    class Selected(Message):
+        def __init__(self, file_list: FileList, path: Path) -> None:
+            super().__init__()
+            self.file_list = file_list
+            self.path = path
+
+        @property
+        def control(self) -> FileList:
+            return self.file_list
+
+    def __init__(
+        self,
+        folder: Path,
+        suffix: str = '.txt',
+        select: str | None = None,
+        id: str | None = None,
+        classes: str | None = None,
+    ) -> None:
+        super().__init__(id=id, classes=classes)
+        self.folder = folder
+        self.suffix = suffix
+        self.select_when_scanned = select
+        self.index = FileIndex()
+        self.scanning = True
+        # Files removed while a scan is running, which the scan may still report
+        self._removed_while_scanning: set[str] = set()
+
+    def on_mount(self) -> None:
+        self.app.file_watcher.watch(self.folder, self.apply_changes)
+        self.scan()
+
+    def on_unmount(self) -> None:
+        self.app.file_watcher.unwatch(self.folder, self.apply_changes)
+
+    @work(thread=True, exclusive=True)
+    def scan(self) -> None:
+        self.app.call_from_thread(self.set_scanning, True)
+        try:
+            for batch in scan_folder(self.folder, self.suffix):
+                self.app.call_from_thread(self.add_entries, batch)
+        finally:
+            self.app.call_from_thread(self.set_scanning, False)
+
+    def set_scanning(self, scanning: bool) -> None:
+        self.scanning = scanning
+        self._removed_while_scanning.clear()
+        if scanning:
+            self.index.clear()
+        self.update_view()
+        if not scanning and self.select_when_scanned is not None:
+            self.select_name(self.select_when_scanned)
+            self.select_when_scanned = None
+
+    def add_entries(self, entries: Iterable[FileEntry]) -> None:
+        self.index.add(entry for entry in entries if entry.name not in self._removed_while_scanning)
+        self.update_view()
+
+    def apply_changes(self, changes: list[Change]) -> None:
+        """Update the listing from file watcher changes, instead of reading the whole folder again."""
+        for change in changes:
+            if change.kind == 'rescan':
+                self.scan()
+                return
+            if change.old_path is not None and change.old_path.parent == self.folder:
+                self._forget(change.old_path.name)
+            if change.path.parent != self.folder or not change.path.name.endswith(self.suffix):
+                continue
+            if change.stat is None:
+                self._forget(change.path.name)
+            else:
+                self._removed_while_scanning.discard(change.path.name)
+                self.index.add([FileEntry.from_stat(change.path.name, change.stat)])
+        self.update_view()
+
+    def _forget(self, name: str) -> None:
+        self.index.remove(name)
+        if self.scanning:
+            self._removed_while_scanning.add(name)
+
+    def sort(self, sort_by: str, reverse: bool = False) -> None:
+        self.index.set_order(sort_by, reverse)
+        self.update_view()
+
+    def filter(self, text: str) -> None:
+        self.index.set_filter(text)
+        self.cursor = 0
+        self.update_view()
+
+    def update_view(self) -> None:
+        self.virtual_size = Size(self.size.width, len(self.index))
+        self.cursor = min(self.cursor, max(0, len(self.index) - 1))
+        self.refresh()
+
+    @property
+    def selected(self) -> FileEntry | None:
+        view = self.index.view
+        return view[self.cursor] if 0 <= self.cursor < len(view) else None
+
+    def watch_cursor(self, old: int, new: int) -> None:
+        self.refresh()
+        if new < self.scroll_offset.y:
+            self.scroll_to(y=new, animate=False)
+        elif new >= self.scroll_offset.y + self.scrollable_content_region.height:
+            self.scroll_to(y=new - self.scrollable_content_region.height + 1, animate=False)
+
+    def render_line(self, y: int) -> Strip:
+        width = self.scrollable_content_region.width
+        row = self.scroll_offset.y + y
+        view = self.index.view
+
+        if not view:
+            if y == 0:
+                text = 'Loading...' if self.scanning else f'No {self.suffix} files found.'.replace('  ', ' ')
+                return Strip([Segment(text.ljust(width), self.rich_style)], width).crop(0, width)
+            return Strip.blank(width, self.rich_style)
+        if row >= len(view):
+            return Strip.blank(width, self.rich_style)
+
+        entry = view[row]
+        details = f'{entry.size:>9,} B  {datetime.fromtimestamp(entry.modified):%d/%m/%y %H:%M}'
+        name = entry.name[:max(0, width - len(details) - 2)]
+        text = f'{name:<{max(0, width - len(details))}}{details}'
+        style = self.rich_style
+        if row == self.cursor:
+            style += Style(reverse=True, bold=self.has_focus)
+        return Strip([Segment(text, style)], width).crop(0, width)
+
+    def on_resize(self) -> None:
+        self.update_view()
+
+    def on_click(self, event: events.Click) -> None:
+        row = self.scroll_offset.y + event.y
+        if 0 <= row < len(self.index):
+            self.cursor = row
+            self.action_select()
+
+    def select_name(self, name: str) -> None:
+        names = [entry.name for entry in self.index.view]
+        if name in names:
+            self.cursor = names.index(name)
+            self.action_select()
+
+    def action_cursor_up(self) -> None:
+        self.cursor = max(0, self.cursor - 1)
+
+    def action_cursor_down(self) -> None:
+        self.cursor = max(0, min(len(self.index) - 1, self.cursor + 1))
+
+    def action_select(self) -> None:
+        entry = self.selected
+        if entry is not None:
+            self.post_message(self.Selected(self, self.folder / entry.name))
@@ -1,48 +1,64 @@
 from __future__ import annotations
 
-import os
 from pathlib import Path
+from time import perf_counter
 from typing import TYPE_CHECKING
 
-from textual import on
+from rich.text import Text
+from textual import on, work
 from textual.app import ComposeResult
-from textual.containers import Center, HorizontalScroll
+from textual.containers import Center, HorizontalGroup, HorizontalScroll
 from textual.widget import Widget
-from textual.widgets import TextArea, Button, Label, Static, Input
+from textual.widgets import TextArea, Button, Label, Static, Input, Select, OptionList
+from textual.widgets.option_list import Option
 
 from termos.apps import OSApp
+from termos.apps.fileManager.listing import FileList
+from termos.apps.fileManager.preview import FilePreview
+from termos.apps.fileManager.search import SearchResult, content_index
+from termos.paths import termos_folders
 
 if TYPE_CHECKING:
     from termos.termos import TermOS
 
 
+def listing_controls() -> ComposeResult:
+    """Filter and sort controls shared by the folder views."""
+    with HorizontalGroup(classes="listing-controls"):
+        yield Input(placeholder="Filter...", classes="filter-input")
+        yield Select(
+            [
+                ("Name", "name"),
+                ("Name (Z-A)", "name desc"),
+                ("Largest", "size desc"),
+                ("Newest", "modified desc"),
+            ],
+            value="name",
+            allow_blank=False,
+            classes="sort-select",
+        )
+
 
 class BinWidget(Widget):
-    """Displays buttons for each .txt file in the main folder and shows file content when clicked."""
+    """Lists the .txt files in a folder and shows file content when selected."""
 
-    def __init__(self):
+    def __init__(self, select: str | None = None):
         super().__init__()
-        self.root = Path(os.environ['TEMP']) / 'TermOS'
-        self.main_folder = self.root / 'mainFolder'
-        self.bin_folder = self.root / 'Bin'
-        self.main_folder.mkdir(parents=True, exist_ok=True)  # ✅ Ensure folder exists
-        self.bin_folder.mkdir(parents=True, exist_ok=True)  # ✅ Ensure folder exists
+        self.select = select
+        self.main_folder, self.bin_folder = termos_folders()
+        self.root = self.main_folder.parent
         self.file_content_display = Static(id="file-content")  # ✅ Area to display file content
+        self.file_preview = FilePreview()
         self.selected_file = None
 
     def compose(self) -> ComposeResult:
-        """Dynamically create buttons for each .txt file in mainFolder."""
+        """List the .txt files in the Bin, which are read in the background."""
         yield Label("🚮Bin")
-
-        files = list(self.bin_folder.glob("*.txt"))  # ✅ Get all .txt files
-
-        if files:
-            for file in files:
-                yield Button(file.name, id=f"file-{file.stem}", classes="file-btn")  # ✅ Create file buttons
-        else:
-            yield Label("No .txt files found.")
+        yield from listing_controls()
+        yield FileList(self.bin_folder, select=self.select)
 
         yield self.file_content_display  # ✅ Add file content display area
+        yield self.file_preview
         yield Button("Back", id="back-btn")  # ✅ Back button
         yield Button("Recover", id="recover-btn")  # ✅ Delete button
         yield Button("Clear", id="clear-btn")  # ✅ Delete button
@@ -50,10 +66,9 @@ class BinWidget(Widget):
     @on(Button.Pressed, "#clear-btn")
     def clear_bin(self) -> None:
         """Delete all files in the Bin folder."""
+        self.clear_selection()
         for file in self.bin_folder.glob("*.txt"):
-            file.unlink()  # ✅ Delete file
-            self.remove()
-            self.parent.mount(FileManagerWidget())  # ✅ Restore FileManager UI
+            file.unlink(missing_ok=True)  # ✅ Delete file, the listing updates itself
 
 
     @on(Button.Pressed, "#back-btn")
@@ -66,52 +81,61 @@ class BinWidget(Widget):
     def move_to_bin(self) -> None:
         """Move the selected file to the Bin folder."""
         if self.selected_file:
-            self.selected_file.rename(self.main_folder / self.selected_file.name)  # ✅ Move file to Bin
-            self.remove()
-            self.parent.mount(FileManagerWidget())  # ✅ Restore FileManager UI
+            selected_file = self.selected_file
+            self.clear_selection()  # ✅ Release the previewed file first
+            selected_file.rename(self.main_folder / selected_file.name)  # ✅ Move file back
 
 
-    @on(Button.Pressed)
-    def display_file_content(self, event: Button.Pressed) -> None:
-        """Displays content of the selected .txt file."""
-        button = event.button
-        if "file-btn" in button.classes:  # ✅ Ensure it's a file button
-            self.selected_file = self.bin_folder / str(button.label)  # Get file path
+    def clear_selection(self) -> None:
+        self.selected_file = None
+        self.file_preview.close()
+        self.file_content_display.update("")
 
-            try:
-                content = self.selected_file.read_text(encoding="utf-8")  # ✅ Read file content
-                self.file_content_display.update(f"📄 **{button.label}**\n\n{content}")  # ✅ Display content
-            except Exception as e:
-                self.file_content_display.update(f"❌ Error reading file: {e}")  # Handle errors
+    @on(FileList.Selected)
+    def display_file_content(self, event: FileList.Selected) -> None:
+        """Previews the selected .txt file, mapping it rather than reading it all."""
+        self.selected_file = event.path
+
+        try:
+            file = self.file_preview.open(event.path)  # ✅ Only visible lines are read
+        except OSError as e:
+            self.file_preview.close()
+            self.file_content_display.update(f"❌ Error reading file: {e}")  # Handle errors
+        else:
+            kind = "binary, shown as hex" if file.binary else "text"
+            self.file_content_display.update(f"📄 {event.path.name} ({file.size:,} bytes, {kind})")
+
+    @on(Input.Changed, ".filter-input")
+    def filter_files(self, event: Input.Changed) -> None:
+        self.query_one(FileList).filter(event.value)
+
+    @on(Select.Changed, ".sort-select")
+    def sort_files(self, event: Select.Changed) -> None:
+        sort_by, _, order = event.value.partition(" ")
+        self.query_one(FileList).sort(sort_by, reverse=order == "desc")
 
 class MFWidget(Widget):
-    """Displays buttons for each .txt file in the main folder and shows file content when clicked."""
+    """Lists the .txt files in a folder and shows file content when selected."""
 
-    def __init__(self):
+    def __init__(self, select: str | None = None):
         super().__init__()
-        self.root = Path(os.environ['TEMP']) / 'TermOS'
-        self.main_folder = self.root / 'mainFolder'
-        self.bin_folder = self.root / 'Bin'
-        self.main_folder.mkdir(parents=True, exist_ok=True)  # ✅ Ensure folder exists
-        self.bin_folder.mkdir(parents=True, exist_ok=True)  # ✅ Ensure folder exists
+        self.select = select
+        self.main_folder, self.bin_folder = termos_folders()
+        self.root = self.main_folder.parent
         self.file_content_display = Static(id="file-content")  # ✅ Area to display file content
+        self.file_preview = FilePreview()
         self.selected_file = None
         self.filename_input = None
         self.content_input = None
 
     def compose(self) -> ComposeResult:
-        """Dynamically create buttons for each .txt file in mainFolder."""
+        """List the .txt files in mainFolder, which are read in the background."""
         yield Label("📂Main Folder")
-
-        files = list(self.main_folder.glob("*.txt"))  # ✅ Get all .txt files
-
-        if files:
-            for file in files:
-                yield Button(file.name, id=f"file-{file.stem}", classes="file-btn")  # ✅ Create file buttons
-        else:
-            yield Label("No .txt files found.")
+        yield from listing_controls()
+        yield FileList(self.main_folder, select=self.select)
 
         yield self.file_content_display  # ✅ Add file content display area
+        yield self.file_preview
         yield Button("Back", id="back-btn")  # ✅ Back button
         yield Button("Delete", id="bin-btn")  # ✅ Delete button
         yield Button("Add", id="add-btn")  # ✅ Delete button
@@ -119,6 +143,8 @@ class MFWidget(Widget):
     @on(Button.Pressed, "#add-btn")
     def add_file(self) -> None:
         """Displays input fields for new file creation."""
+        if self.filename_input is not None:
+            return
         self.filename_input = Input(placeholder="Enter file name")
         self.content_input = Input(placeholder="Enter file content")
         self.mount(self.filename_input)
@@ -152,17 +178,20 @@ class MFWidget(Widget):
         try:
             file_path.write_text(content, encoding="utf-8")
             self.file_content_display.update(f"✅ File '{filename}' created successfully.")
-            self.remove()
-            self.parent.mount(FileManagerWidget())
+            self.close_new_file_form()
         except Exception as e:
             self.file_content_display.update(f"❌ Error creating file: {e}")
 
     def cancel_file_creation(self) -> None:
         """Cancels the file creation process."""
-        self.filename_input.remove()
-        self.content_input.remove()
-        self.remove()
-        self.parent.mount(FileManagerWidget())
+        self.close_new_file_form()
+
+    def close_new_file_form(self) -> None:
+        """Removes the file creation inputs, the new file shows up in the listing by itself."""
+        for widget in (self.filename_input, self.content_input, *self.query("#save-btn, #cancel-btn")):
+            if widget is not None:
+                widget.remove()
+        self.filename_input = self.content_input = None
 
 
     @on(Button.Pressed, "#back-btn")
@@ -175,23 +204,38 @@ class MFWidget(Widget):
     def move_to_bin(self) -> None:
         """Move the selected file to the Bin folder."""
         if self.selected_file:
-            self.selected_file.rename(self.bin_folder / self.selected_file.name)  # ✅ Move file to Bin
-            self.remove()
-            self.parent.mount(FileManagerWidget())  # ✅ Restore FileManager UI
+            selected_file = self.selected_file
+            self.clear_selection()  # ✅ Release the previewed file first
+            selected_file.rename(self.bin_folder / selected_file.name)  # ✅ Move file to Bin
 
 
-    @on(Button.Pressed)
-    def display_file_content(self, event: Button.Pressed) -> None:
-        """Displays content of the selected .txt file."""
-        button = event.button
-        if "file-btn" in button.classes:  # ✅ Ensure it's a file button
-            self.selected_file = self.main_folder / str(button.label)  # Get file path
+    def clear_selection(self) -> None:
+        self.selected_file = None
+        self.file_preview.close()
+        self.file_content_display.update("")
 
-            try:
-                content = self.selected_file.read_text(encoding="utf-8")  # ✅ Read file content
-                self.file_content_display.update(f"📄 **{button.label}**\n\n\"\"\"{content}\"\"\"")  # ✅ Display content
-            except Exception as e:
-                self.file_content_display.update(f"❌ Error reading file: {e}")  # Handle errors
+    @on(FileList.Selected)
+    def display_file_content(self, event: FileList.Selected) -> None:
+        """Previews the selected .txt file, mapping it rather than reading it all."""
+        self.selected_file = event.path
+
+        try:
+            file = self.file_preview.open(event.path)  # ✅ Only visible lines are read
+        except OSError as e:
+            self.file_preview.close()
+            self.file_content_display.update(f"❌ Error reading file: {e}")  # Handle errors
+        else:
+            kind = "binary, shown as hex" if file.binary else "text"
+            self.file_content_display.update(f"📄 {event.path.name} ({file.size:,} bytes, {kind})")
+
+    @on(Input.Changed, ".filter-input")
+    def filter_files(self, event: Input.Changed) -> None:
+        self.query_one(FileList).filter(event.value)
+
+    @on(Select.Changed, ".sort-select")
+    def sort_files(self, event: Select.Changed) -> None:
+        sort_by, _, order = event.value.partition(" ")
+        self.query_one(FileList).sort(sort_by, reverse=order == "desc")
 
 
 class FileManagerWidget(Widget):
@@ -200,6 +244,9 @@ class FileManagerWidget(Widget):
     def compose(self) -> ComposeResult:
         yield Button('Main Folder', variant='primary', id='fmbtn')
         yield Button('Bin', variant='primary', id='binbtn')
+        yield Input(placeholder="🔍 Search file contents...", id="search")
+        yield Static(id="search-status")
+        yield OptionList(id="search-results")
 
     @on(Button.Pressed, "#fmbtn")
     def open_fm(self) -> None:
@@ -213,12 +260,58 @@ class FileManagerWidget(Widget):
         self.remove_children()  # ✅ Clear previous widgets
         self.mount(BinWidget())  # ✅ Mount BinWidget (corrected usage!)
 
+    @on(Input.Changed, "#search")
+    def search_changed(self, event: Input.Changed) -> None:
+        self.search(event.value)
+
+    @work(thread=True, exclusive=True, group="search")
+    def search(self, query: str) -> None:
+        """Searches the content index off the event loop, as typing may outpace it."""
+        start = perf_counter()
+        results = content_index.search(query)
+        self.app.call_from_thread(self.show_results, query, results, perf_counter() - start)
+
+    def show_results(self, query: str, results: list[SearchResult], elapsed: float) -> None:
+        if query != self.query_one("#search", Input).value:
+            return  # ✅ A newer search is on its way
+        status = f"{len(results)} matches in {elapsed * 1000:.1f} ms" if query.strip() else ""
+        if query.strip() and not content_index.ready.is_set():
+            status += " (still indexing)"
+        self.query_one("#search-status", Static).update(status)
+
+        options = self.query_one("#search-results", OptionList)
+        options.clear_options()
+        options.add_options([
+            Option(
+                Text.assemble((result.path.name, "bold"), f"  {result.path.parent.name}\n", (result.snippet, "dim")),
+                id=str(result.path),
+            )
+            for result in results
+        ])
+
+    @on(OptionList.OptionSelected, "#search-results")
+    def open_result(self, event: OptionList.OptionSelected) -> None:
+        """Open the folder holding the selected match, with the file selected."""
+        path = Path(event.option.id)
+        main_folder, bin_folder = termos_folders()
+        self.remove_children()
+        self.mount(BinWidget(select=path.name) if path.parent == bin_folder else MFWidget(select=path.name))
+
+
 class FileManager(OSApp):
     NAME = 'File Manager'
     ICON = '📂'
     DESCRIPTION = 'File management utility'
 
+    def __init__(self, os: TermOS) -> None:
+        super().__init__(os)
+        content_index.attach(os, termos_folders())
+
+    async def kill(self) -> None:
+        content_index.detach()
+        await super().kill()
+
     @staticmethod
     def launch(os: TermOS) -> None:
         instance = FileManager(os)
-        instance.create_window(FileManagerWidget(), 'notepad', width=50, height=20)
\ No newline at end of file
+        instance.create_window(FileManagerWidget(), 'file-manager', width=60, height=30)
@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+import codecs
+import mmap
+import os
+import threading
+from array import array
+from itertools import accumulate, islice, repeat
+from operator import add
+from pathlib import Path
+from time import monotonic
+
+from rich.segment import Segment
+from rich.style import Style
+from textual import work
+from textual.geometry import Size
+from textual.scroll_view import ScrollView
+from textual.strip import Strip
+from textual.worker import get_current_worker
+
+SNIFF_SIZE = 8 * 1024
+"""Bytes from the start of a file used to decide whether it is text."""
+MAX_LINE_BYTES = 4 * 1024
+"""Bytes of each line decoded for display, so a single huge line can't stall rendering."""
+INDEX_CHUNK_SIZE = 1024 * 1024
+"""Bytes scanned for line breaks at a time."""
+INDEX_UPDATE_INTERVAL = 0.1
+"""Seconds between updates of the scrollable height while indexing in the background."""
+MAX_HEX_ROW_BYTES = 16
+MAX_READ_SIZE = 4 * 1024 * 1024
+"""Bytes up to which a file is read into memory rather than mapped."""
+
+# Control characters would be interpreted by the terminal, so they're shown as placeholders
+CONTROL_CHARACTERS = {code: '\N{REPLACEMENT CHARACTER}' for code in [*range(32), 127] if code != ord('\t')}
+
+
+def is_binary(sample: bytes) -> bool:
+    if b'\0' in sample:
+        return True
+    try:
+        # Not final, so a multi-byte character cut off by the end of the sample isn't an error
+        codecs.getincrementaldecoder('utf-8')().decode(sample, final=False)
+    except UnicodeDecodeError:
+        return True
+    return False
+
+
+class MappedFile:
+    """A file's contents, with the offsets of its lines found on demand.
+
+    Files up to `MAX_READ_SIZE` are read into memory, and larger ones memory-mapped read-only.
+    Reading a mapping past the end of a file another program has since truncated would crash
+    TermOS with SIGBUS, so each read of a mapped file first checks its size.
+
+    Line offsets are indexed lazily: `ensure_lines` only scans as far as the lines asked for,
+    and `index_chunk` may be called from a worker thread to index the rest in the background.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._fd: int | None = None
+        with path.open('rb') as file:
+            if file.seek(0, 2) <= MAX_READ_SIZE:
+                file.seek(0)
+                self.data = file.read()
+            else:
+                self.data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+                self._fd = os.dup(file.fileno())
+        self.size = len(self.data)
+        self.binary = is_binary(self.data[:SNIFF_SIZE])
+        self.line_starts = array('q', [0])
+        self.indexed = self.size == 0
+        self._scanned = 0
+        self._lock = threading.Lock()
+
+    def _readable(self, end: int) -> int:
+        """`end`, or the end of the file if it has been truncated to before it."""
+        if self._fd is not None:
+            self.size = min(self.size, os.fstat(self._fd).st_size)
+        return min(end, self.size)
+
+    @property
+    def line_count(self) -> int:
+        """Lines found so far, which is every line once `indexed` is true."""
+        return len(self.line_starts)
+
+    def ensure_lines(self, count: int) -> None:
+        """Index until at least `count` lines are known, or the end of the file."""
+        while len(self.line_starts) < count and not self.indexed:
+            self.index_chunk()
+
+    def index_chunk(self) -> None:
+        """Find the lines starting in the next `INDEX_CHUNK_SIZE` bytes."""
+        with self._lock:
+            if self.indexed:
+                return
+            position = self._scanned
+            end = self._readable(position + INDEX_CHUNK_SIZE)
+            pieces = self.data[position:end].split(b'\n')
+            # Each line break starts a line one byte after it, all without a Python-level loop
+            line_lengths = map(add, map(len, pieces[:-1]), repeat(1))
+            self.line_starts.extend(islice(accumulate(line_lengths, initial=position), 1, None))
+            self._scanned = max(position, end)
+            if self._scanned >= self.size:
+                if self.line_starts[-1] == self.size:
+                    self.line_starts.pop()  # the file ends with a line break
+                self.indexed = True
+
+    def line(self, number: int) -> str:
+        self.ensure_lines(number + 2)
+        if number >= len(self.line_starts):
+            return ''  # the file was truncated since the preview's height was set
+        start = self.line_starts[number]
+        end = self.line_starts[number + 1] if number + 1 < len(self.line_starts) else self.size
+        end = self._readable(min(end, start + MAX_LINE_BYTES))
+        return bytes(self.data[start:max(start, end)]).rstrip(b'\r\n').decode('utf-8', 'replace')
+
+    def hex_row_count(self, row_bytes: int) -> int:
+        return -(-self.size // row_bytes)
+
+    def hex_row(self, number: int, row_bytes: int) -> str:
+        offset = number * row_bytes
+        chunk = bytes(self.data[offset:max(offset, self._readable(offset + row_bytes))])
+        hex_bytes = ' '.join(f'{byte:02x}' for byte in chunk)
+        text = ''.join(chr(byte) if 32 <= byte < 127 else '.' for byte in chunk)
+        return f'{offset:08x}  {hex_bytes:<{row_bytes * 3 - 1}}  {text}'
+
+    def close(self) -> None:
+        with self._lock:
+            if isinstance(self.data, mmap.mmap):
+                self.data.close()
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+            self.data = b''
+            self.indexed = True
+
+
+class FilePreview(ScrollView):
+    """Shows a file without decoding all of it: only the visible lines are, and large files are memory-mapped.
+
+    Binary files are shown as a hex dump.
+    """
+
+    DEFAULT_CSS = '''
+    FilePreview {
+        height: 1fr;
+        min-height: 3;
+    }
+    '''
+
+    def __init__(self, id: str | None = None) -> None:
+        super().__init__(id=id)
+        self.file: MappedFile | None = None
+
+    def open(self, path: Path) -> MappedFile:
+        """Preview `path`, raising `OSError` if it can't be opened."""
+        self.close()
+        self.file = MappedFile(path)
+        self.scroll_to(0, 0, animate=False)
+        self.update_size()
+        if not self.file.binary:
+            self.index_lines(self.file)
+        return self.file
+
+    def close(self) -> None:
+        """Stop previewing, releasing the file (which can't be moved on Windows while mapped)."""
+        self.workers.cancel_group(self, 'preview-index')
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+        self.update_size()
+
+    def on_unmount(self) -> None:
+        self.close()
+
+    @work(thread=True, exclusive=True, group='preview-index')
+    def index_lines(self, file: MappedFile) -> None:
+        worker = get_current_worker()
+        last_update = monotonic()
+        while not file.indexed and not worker.is_cancelled:
+            file.index_chunk()
+            if file.indexed or monotonic() - last_update > INDEX_UPDATE_INTERVAL:
+                last_update = monotonic()
+                if not worker.is_cancelled:
+                    self.app.call_from_thread(self.update_size)
+
+    @property
+    def hex_row_bytes(self) -> int:
+        """Bytes per hex row, a multiple of 4 which fits the width: each byte takes 4 cells, plus 12 for the offset."""
+        fitting = (self.scrollable_content_region.width - 12) // 4
+        return min(MAX_HEX_ROW_BYTES, max(4, fitting // 4 * 4))
+
+    def update_size(self) -> None:
+        if self.file is None:
+            rows = 0
+        elif self.file.binary:
+            rows = self.file.hex_row_count(self.hex_row_bytes)
+        else:
+            rows = self.file.line_count
+        self.virtual_size = Size(self.size.width, rows)
+        self.refresh()
+
+    def on_resize(self) -> None:
+        self.update_size()
+
+    def render_line(self, y: int) -> Strip:
+        width = self.scrollable_content_region.width
+        row = self.scroll_offset.y + y
+        file = self.file
+        if file is None or row >= self.virtual_size.height:
+            return Strip.blank(width, self.rich_style)
+
+        if file.binary:
+            text, style = file.hex_row(row, self.hex_row_bytes), self.rich_style + Style(dim=True)
+        else:
+            text, style = file.line(row).expandtabs().translate(CONTROL_CHARACTERS), self.rich_style
+        return Strip([Segment(text, style)]).crop_extend(0, width, self.rich_style)
@@ -0,0 +1,450 @@
+from __future__ import annotations
+
+import heapq
+import json
+import math
+import mmap
+import os
+import queue
+import re
+import struct
+import threading
+from array import array
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Callable, Iterable, NamedTuple, TYPE_CHECKING
+
+from termos.apps.fileManager.preview import SNIFF_SIZE, is_binary
+from termos.paths import cache_dir
+
+if TYPE_CHECKING:
+    from termos.file_watcher import Change, FileWatcher
+    from termos.termos import TermOS
+
+MAX_INDEXED_BYTES = 4 * 1024 * 1024
+"""Bytes read from the start of each file for indexing."""
+MAX_PREFIX_TERMS = 256
+"""Indexed words the last, partly typed, word of a query may expand to."""
+SNIPPET_CONTEXT = 40
+"""Characters shown either side of a match."""
+
+MAGIC = b'TOSIDX02'
+HEADER = struct.Struct('<8s7Q')
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+TOKEN = re.compile(r'\w\w+')
+
+def tokenize(text: str) -> list[str]:
+    return TOKEN.findall(text.casefold())
+
+
+class IndexedFile(NamedTuple):
+    path: str
+    mtime_ns: int
+    size: int
+    length: int
+    """Words in the indexed text, for ranking."""
+
+
+class SearchResult(NamedTuple):
+    path: Path
+    score: float
+    snippet: str
+
+
+class Segment:
+    """An index written to disk, memory-mapped and searched without loading it.
+
+    Layout after the header, each section 8-byte aligned:
+        documents   JSON list of `IndexedFile` fields
+        term starts (terms + 1) uint64 offsets into the term text
+        posting starts (terms + 1) uint64 offsets into the postings
+        term text   the sorted terms, UTF-8, concatenated
+        documents   uint32 document numbers containing each term, in term order
+        counts      uint16 times each term appears in those documents
+    """
+
+    def __init__(self, path: Path) -> None:
+        with path.open('rb') as file:
+            self.data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, *offsets = HEADER.unpack_from(self.data)
+            if magic != MAGIC:
+                raise ValueError(f'{path} is not a search index')
+            (
+                documents_end, self.term_count, starts_offset, postings_starts_offset,
+                text_offset, postings_offset, counts_offset,
+            ) = offsets
+            view = memoryview(self.data)
+            self.documents = [IndexedFile(*fields) for fields in json.loads(bytes(view[HEADER.size:documents_end]))]
+            self.term_starts = view[starts_offset:postings_starts_offset].cast('Q')
+            self.posting_starts = view[postings_starts_offset:text_offset].cast('Q')
+            self.text = view[text_offset:postings_offset]
+            self.postings = view[postings_offset:counts_offset].cast('I')
+            self.counts = view[counts_offset:].cast('H')
+        except Exception:
+            self.close()
+            raise
+
+    def close(self) -> None:
+        for name in ('term_starts', 'posting_starts', 'text', 'postings', 'counts'):
+            view = self.__dict__.pop(name, None)
+            if view is not None:
+                view.release()
+        self.data.close()
+
+    def term(self, number: int) -> bytes:
+        return bytes(self.text[self.term_starts[number]:self.term_starts[number + 1]])
+
+    def lower_bound(self, term: bytes) -> int:
+        """The number of the first term not less than `term`."""
+        low, high = 0, self.term_count
+        while low < high:
+            middle = (low + high) // 2
+            if self.term(middle) < term:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def find(self, term: str) -> range:
+        encoded = term.encode()
+        start = self.lower_bound(encoded)
+        found = start < self.term_count and self.term(start) == encoded
+        return range(start, start + found)
+
+    def find_prefix(self, prefix: str) -> range:
+        encoded = prefix.encode()
+        # 0xff never appears in UTF-8, so sorts after every term with this prefix
+        return range(self.lower_bound(encoded), self.lower_bound(encoded + b'\xff'))
+
+    def postings_of(self, number: int) -> Iterable[tuple[int, int]]:
+        start, end = self.posting_starts[number], self.posting_starts[number + 1]
+        return zip(self.postings[start:end], self.counts[start:end])
+
+    def terms(self) -> Iterable[tuple[str, Iterable[tuple[int, int]]]]:
+        for number in range(self.term_count):
+            yield self.term(number).decode(), self.postings_of(number)
+
+
+def _align(file, alignment: int = 8) -> int:
+    position = file.tell()
+    padding = -position % alignment
+    file.write(b'\0' * padding)
+    return position + padding
+
+
+def write_segment(path: Path, documents: list[IndexedFile], postings: dict[str, list[tuple[int, int]]]) -> None:
+    terms = sorted(postings)
+    encoded_terms = [term.encode() for term in terms]
+    term_starts = array('Q', [0])
+    posting_starts = array('Q', [0])
+    posting_documents = array('I')
+    posting_counts = array('H')
+    for term, encoded in zip(terms, encoded_terms):
+        term_starts.append(term_starts[-1] + len(encoded))
+        for document, count in postings[term]:
+            posting_documents.append(document)
+            posting_counts.append(min(count, 0xffff))
+        posting_starts.append(len(posting_documents))
+
+    with path.open('wb') as file:
+        file.write(b'\0' * HEADER.size)
+        file.write(json.dumps([list(document) for document in documents], separators=(',', ':')).encode())
+        documents_end = file.tell()
+        starts_offset = _align(file)
+        file.write(term_starts.tobytes())
+        postings_starts_offset = file.tell()
+        file.write(posting_starts.tobytes())
+        text_offset = file.tell()
+        file.write(b''.join(encoded_terms))
+        postings_offset = _align(file)
+        file.write(posting_documents.tobytes())
+        counts_offset = file.tell()
+        file.write(posting_counts.tobytes())
+        file.seek(0)
+        file.write(HEADER.pack(
+            MAGIC, documents_end, len(terms), starts_offset, postings_starts_offset,
+            text_offset, postings_offset, counts_offset,
+        ))
+
+
+class SearchIndex:
+    """A persistent inverted index of the words in the files of some folders, ranked with BM25.
+
+    The index on disk is a memory-mapped `Segment`. Files indexed since it was written are
+    kept in memory and merged into a new segment by `save`. Indexing runs on a background
+    thread, driven by a scan when the first user attaches and then by file watcher changes.
+    Searches may run on any thread.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.folders: list[Path] = []
+        self.documents: list[IndexedFile | None] = []
+        self.by_path: dict[str, int] = {}
+        self.total_length = 0
+        self.segment: Segment | None = None
+        self.memory_postings: defaultdict[str, dict[int, int]] = defaultdict(dict)
+        self.dirty = False
+        self.ready = threading.Event()
+        self._lock = threading.RLock()
+        self._jobs: queue.SimpleQueue[Callable[[], None]] = queue.SimpleQueue()
+        self._thread: threading.Thread | None = None
+        self._users = 0
+        self._watcher: FileWatcher | None = None
+        self._os: TermOS | None = None
+
+    def attach(self, os: TermOS, folders: list[Path]) -> None:
+        """Start keeping the index of `folders` up to date. Call `detach` when no longer needed."""
+        self._users += 1
+        if self._users > 1:
+            return
+        self.folders = folders
+        self._os = os
+        self._watcher = watcher = os.file_watcher
+        for folder in folders:
+            watcher.watch(folder, self.on_changes)
+        self._submit(self._load)
+        self._submit(self._scan)
+        self._submit(self.save)
+
+    def detach(self) -> None:
+        self._users = max(0, self._users - 1)
+        if self._users or self._watcher is None:
+            return
+        for folder in self.folders:
+            self._watcher.unwatch(folder, self.on_changes)
+        self._watcher = None
+        self._submit(self.save)
+
+    def on_changes(self, changes: list[Change]) -> None:
+        self._submit(lambda: self._apply(changes))
+
+    def _submit(self, job: Callable[[], None]) -> None:
+        self._jobs.put(job)
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run_jobs, name='search-index', daemon=True)
+            self._thread.start()
+
+    def _run_jobs(self) -> None:
+        while True:
+            job = self._jobs.get()
+            # A file which can't be read, or a job which fails, mustn't stop the jobs after it
+            try:
+                job()
+            except OSError:
+                pass
+            except Exception as error:
+                self._report(error)
+
+    def _report(self, error: Exception) -> None:
+        if self._os is None:
+            return
+        try:
+            self._os.call_from_thread(
+                self._os.notify, f'{type(error).__name__}: {error}', title="Couldn't update the search index",
+                severity='error',
+            )
+        except RuntimeError:
+            pass  # TermOS has stopped
+
+    def _load(self) -> None:
+        with self._lock:
+            if self.segment is not None or not self.path.exists():
+                return
+            try:
+                self.segment = Segment(self.path)
+            except (OSError, ValueError):
+                return  # rebuilt by the scan
+            self.documents = [*self.segment.documents]
+            self.by_path = {document.path: number for number, document in enumerate(self.documents)}
+            self.total_length = sum(document.length for document in self.documents)
+
+    def _scan(self) -> None:
+        found = set()
+        listed = set()
+        for folder in self.folders:
+            try:
+                with os.scandir(folder) as entries:
+                    paths = [entry.path for entry in entries if entry.is_file()]
+            except OSError:
+                continue
+            listed.add(str(folder))
+            found.update(paths)
+            for path in paths:
+                self._index_file(Path(path))
+        # Files in a folder which couldn't be listed may still be there
+        for path in [*self.by_path]:
+            if path not in found and os.path.dirname(path) in listed:
+                self.remove_file(path)
+        self.ready.set()
+
+    def _apply(self, changes: list[Change]) -> None:
+        for change in changes:
+            if change.kind == 'rescan':
+                self._scan()
+                continue
+            if change.old_path is not None:
+                self.remove_file(str(change.old_path))
+            if change.stat is None:
+                self.remove_file(str(change.path))
+            else:
+                self._index_file(change.path)
+
+    def _index_file(self, path: Path) -> None:
+        """Like `update_file`, but a file which can't be read is skipped rather than stopping the others."""
+        try:
+            self.update_file(path)
+        except FileNotFoundError:
+            self.remove_file(str(path))
+        except OSError:
+            pass
+
+    def update_file(self, path: Path) -> None:
+        """Index `path` if it has changed since it was last indexed."""
+        stat = path.stat()
+        key = str(path)
+        with self._lock:
+            number = self.by_path.get(key)
+            if number is not None:
+                document = self.documents[number]
+                if (document.mtime_ns, document.size) == (stat.st_mtime_ns, stat.st_size):
+                    return
+
+        with path.open('rb') as file:
+            data = file.read(MAX_INDEXED_BYTES)
+        words = Counter() if is_binary(data[:SNIFF_SIZE]) else Counter(tokenize(data.decode('utf-8', 'replace')))
+
+        with self._lock:
+            self.remove_file(key)
+            number = len(self.documents)
+            document = IndexedFile(key, stat.st_mtime_ns, stat.st_size, sum(words.values()))
+            self.documents.append(document)
+            self.by_path[key] = number
+            self.total_length += document.length
+            for word, count in words.items():
+                self.memory_postings[word][number] = count
+            self.dirty = True
+
+    def remove_file(self, path: str) -> None:
+        with self._lock:
+            number = self.by_path.pop(path, None)
+            if number is None:
+                return
+            self.total_length -= self.documents[number].length
+            # Postings of removed documents are skipped when searching, and dropped by `save`
+            self.documents[number] = None
+            self.dirty = True
+
+    def _postings(self, term: str, prefix: bool = False) -> dict[int, int]:
+        """Live documents containing `term` (or a word starting with it), with how often."""
+        documents = self.documents
+        counts: dict[int, int] = {}
+        if self.segment is not None:
+            segment = self.segment
+            numbers = segment.find_prefix(term) if prefix else segment.find(term)
+            for number in numbers[:MAX_PREFIX_TERMS]:
+                for document, count in segment.postings_of(number):
+                    if documents[document] is not None:
+                        counts[document] = counts.get(document, 0) + count
+        words = [word for word in self.memory_postings if word.startswith(term)][:MAX_PREFIX_TERMS] if prefix else [term]
+        for word in words:
+            for document, count in self.memory_postings.get(word, {}).items():
+                if documents[document] is not None:
+                    counts[document] = counts.get(document, 0) + count
+        return counts
+
+    def search(self, query: str, limit: int = 50) -> list[SearchResult]:
+        """Files containing every word of `query`, best first. The last word also matches words it starts."""
+        terms = tokenize(query)
+        if not terms:
+            return []
+        with self._lock:
+            postings = [
+                self._postings(term, prefix=index == len(terms) - 1 and not query[-1:].isspace())
+                for index, term in enumerate(terms)
+            ]
+            postings.sort(key=len)
+            candidates = set(postings[0])
+            for counts in postings[1:]:
+                candidates.intersection_update(counts)
+            if not candidates:
+                return []
+
+            live = len(self.by_path)
+            average_length = self.total_length / live if live else 1
+            weights = [math.log(1 + (live - len(counts) + 0.5) / (len(counts) + 0.5)) for counts in postings]
+
+            def score(document: int) -> float:
+                length_norm = K1 * (1 - B + B * self.documents[document].length / (average_length or 1))
+                return sum(
+                    weight * counts[document] * (K1 + 1) / (counts[document] + length_norm)
+                    for weight, counts in zip(weights, postings)
+                )
+
+            best = heapq.nlargest(limit, candidates, key=score)
+            results = [(Path(self.documents[document].path), score(document)) for document in best]
+        return [SearchResult(path, score, snippet(path, terms)) for path, score in results]
+
+    def save(self) -> None:
+        """Merge the memory-held changes and the segment into a new segment on disk.
+
+        Only the index thread changes the index, so the merge runs without the lock, which is
+        just held to swap the new segment in.
+        """
+        if not self.dirty:
+            return
+        renumbered: dict[int, int] = {}
+        documents = []
+        for number, document in enumerate(self.documents):
+            if document is not None:
+                renumbered[number] = len(documents)
+                documents.append(document)
+
+        postings: defaultdict[str, list[tuple[int, int]]] = defaultdict(list)
+        if self.segment is not None:
+            for term, entries in self.segment.terms():
+                postings[term].extend(
+                    (renumbered[document], count) for document, count in entries if document in renumbered
+                )
+        for term, entries in self.memory_postings.items():
+            postings[term].extend(
+                (renumbered[document], count) for document, count in entries.items() if document in renumbered
+            )
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = self.path.with_suffix('.tmp')
+        write_segment(temporary, documents, {term: entries for term, entries in postings.items() if entries})
+        with self._lock:
+            # Windows can't replace a file which is mapped
+            if self.segment is not None:
+                self.segment.close()
+            temporary.replace(self.path)
+            self.segment = Segment(self.path)
+            self.documents = documents
+            self.by_path = {document.path: number for number, document in enumerate(documents)}
+            self.memory_postings.clear()
+            self.dirty = False
+
+
+def snippet(path: Path, terms: list[str]) -> str:
+    """The text around the first match of any of `terms` in the file, on one line."""
+    pattern = re.compile(rb'\b(?:' + '|'.join(re.escape(term) for term in terms).encode() + rb')', re.IGNORECASE)
+    try:
+        with path.open('rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            match = pattern.search(data, 0, MAX_INDEXED_BYTES)
+            if match is None:
+                return ''
+            start = max(0, match.start() - SNIPPET_CONTEXT * 4)
+            before = data[start:match.start()].decode('utf-8', 'ignore')[-SNIPPET_CONTEXT:]
+            after = data[match.start():match.end() + SNIPPET_CONTEXT * 4].decode('utf-8', 'ignore')
+    except (OSError, ValueError):
+        return ''
+    text = before + after[:match.end() - match.start() + SNIPPET_CONTEXT]
+    return ' '.join(text.split())
+
+
+content_index = SearchIndex(cache_dir() / 'file-index.bin')
@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import asyncio
+import tracemalloc
+from collections import defaultdict
+from contextvars import ContextVar
+from pathlib import Path
+from time import perf_counter, thread_time
+from typing import TYPE_CHECKING
+
+from textual.message_pump import MessagePump
+
+from termos.components.window import Window
+
+if TYPE_CHECKING:
+    from textual.message import Message
+
+APPS_DIR = Path(__file__).parent
+
+
+class AppStats:
+    """Message handling totals for one app, gathered while instrumentation is enabled."""
+
+    def __init__(self) -> None:
+        self.messages = 0
+        self.handler_time = 0.0
+        self.cpu_time = 0.0
+        self.max_latency = 0.0
+
+    @property
+    def average_latency(self) -> float:
+        return self.handler_time / self.messages if self.messages else 0.0
+
+    def record(self, wall_time: float, cpu_time: float) -> None:
+        self.messages += 1
+        self.handler_time += wall_time
+        self.cpu_time += cpu_time
+        self.max_latency = max(self.max_latency, wall_time)
+
+
+# The task currently timing a message, so messages dispatched from inside a handler aren't counted twice
+_dispatching_task: ContextVar[asyncio.Task | None] = ContextVar('_dispatching_task', default=None)
+
+
+class Instrumentation:
+    """Attributes every message handled on the UI event loop to the app owning the target widget.
+
+    Widgets belong to the app of the window they are inside; anything outside a window
+    (taskbar, start menu, ...) is counted as the desktop. Textual has no public hook for
+    this, so enabling instrumentation wraps `MessagePump._dispatch_message`.
+    """
+
+    def __init__(self) -> None:
+        self.desktop = AppStats()
+        self._users = 0
+        self._original_dispatch = None
+        self._started_tracemalloc = False
+
+    @property
+    def enabled(self) -> bool:
+        return self._users > 0
+
+    def enable(self) -> None:
+        self._users += 1
+        if self._users > 1:
+            return
+
+        self._started_tracemalloc = not tracemalloc.is_tracing()
+        if self._started_tracemalloc:
+            tracemalloc.start()
+
+        original_dispatch = self._original_dispatch = MessagePump._dispatch_message
+        stats_for = self.stats_for
+
+        async def _dispatch_message(pump: MessagePump, message: Message) -> None:
+            task = asyncio.current_task()
+            if _dispatching_task.get() is task:
+                return await original_dispatch(pump, message)
+
+            token = _dispatching_task.set(task)
+            wall_start = perf_counter()
+            cpu_start = thread_time()
+            try:
+                return await original_dispatch(pump, message)
+            finally:
+                _dispatching_task.reset(token)
+                stats_for(pump).record(perf_counter() - wall_start, thread_time() - cpu_start)
+
+        MessagePump._dispatch_message = _dispatch_message
+
+    def disable(self) -> None:
+        self._users = max(0, self._users - 1)
+        if self._users == 0 and self._original_dispatch is not None:
+            MessagePump._dispatch_message = self._original_dispatch
+            self._original_dispatch = None
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+
+    def stats_for(self, node: MessagePump) -> AppStats:
+        while node is not None:
+            if isinstance(node, Window):
+                return node.parent_app.stats
+            node = getattr(node, 'parent', None)
+        return self.desktop
+
+    @staticmethod
+    def memory_by_package() -> dict[str, int]:
+        """Bytes currently allocated by code in each app package, e.g. `termos.apps.browser`."""
+        memory: dict[str, int] = defaultdict(int)
+        if not tracemalloc.is_tracing():
+            return memory
+        for statistic in tracemalloc.take_snapshot().statistics('filename'):
+            path = Path(statistic.traceback[0].filename)
+            if path.is_relative_to(APPS_DIR) and path.parent != APPS_DIR:
+                memory[f'termos.apps.{path.relative_to(APPS_DIR).parts[0]}'] += statistic.size
+        return memory
+
+
+instrumentation = Instrumentation()
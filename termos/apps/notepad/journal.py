@@ -0,0 +1,309 @@
+from __future__ import annotations
+
+import atexit
+import json
+import os
+import queue
+import threading
+from pathlib import Path
+from time import monotonic
+from typing import Any, Iterable, NamedTuple, TextIO
+from uuid import uuid4
+
+from termos.apps.notepad.piece_table import Buffer, Piece, PieceTable
+
+FSYNC_INTERVAL = 1.0
+"""Seconds between syncs of journals being written to, so a burst of typing costs a single fsync."""
+COMPACT_RECORDS = 1000
+"""Edits journaled after which the buffer is written to a fresh snapshot, keeping recovery quick."""
+COMPACT_SIZE = 1024 * 1024
+"""Characters journaled after which the buffer is written to a fresh snapshot."""
+READ_CHUNK_SIZE = 256 * 1024
+FLUSH_TIMEOUT = 5.0
+
+SNAPSHOT_SUFFIX = '.snapshot'
+JOURNAL_SUFFIX = '.journal'
+
+
+class Journal:
+    """An append-only record of the edits to one buffer, so it can be rebuilt after a crash.
+
+    Each buffer has a snapshot, holding its text or naming the unchanged file it was opened
+    from, and a journal of the edits since, each replacing a range of characters. Both are
+    created on the first edit and are written by `journal_writer` on a background thread:
+    methods here only queue work, so they're safe to call while typing. Once enough has been
+    journaled, `compact` writes a new snapshot and starts an empty journal.
+
+    Both editors report each edit with `replace`. A buffer constructed with `text` also keeps
+    its text up to date on the writer thread, to snapshot when compacting.
+    """
+
+    def __init__(
+        self,
+        folder: Path,
+        meta: dict[str, Any],
+        text: str | None = None,
+        file: Path | None = None,
+        id: str | None = None,
+        generation: int = 0,
+    ) -> None:
+        self.id = id or uuid4().hex
+        self.snapshot_path = folder / f'{self.id}{SNAPSHOT_SUFFIX}'
+        self.journal_path = folder / f'{self.id}{JOURNAL_SUFFIX}'
+        self.error: OSError | None = None
+        """The last error writing the journal, which means the buffer may not be recoverable."""
+        self._records = 0
+        self._size = 0
+        # Used only by the writer thread
+        self._meta = dict(meta)
+        self._text = text
+        self._file: dict[str, Any] | None = None
+        if file is not None:
+            # Taken now, so the file changing before the first edit is noticed on recovery
+            stat = file.stat()
+            self._file = {'path': str(file), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+        self._generation = generation
+        self._handle: TextIO | None = None
+        self._dirty = False
+        self._closed = False
+
+    @property
+    def needs_compaction(self) -> bool:
+        return self._records > COMPACT_RECORDS or self._size > COMPACT_SIZE
+
+    def replace(self, start: int, end: int, text: str) -> None:
+        """Journal replacing the characters between two offsets with `text`."""
+        self._records += 1
+        self._size += len(text)
+        journal_writer.submit(self, 'replace', start, end, text)
+
+    def update_meta(self, **meta: Any) -> None:
+        """Record details of the buffer other than its text, such as its language."""
+        journal_writer.submit(self, 'meta', meta)
+
+    def compact(self, pieces: list[Piece] | None = None) -> None:
+        """Replace the snapshot and journal with a snapshot of the buffer as it is now.
+
+        Buffers given text at construction are snapshotted from it. Others pass a copy of
+        their piece table's pieces, which never change, so they're read on the writer thread.
+        """
+        self._records = self._size = 0
+        journal_writer.submit(self, 'compact', pieces)
+
+    def close(self) -> None:
+        """Stop journaling and sync, keeping the files so the buffer is recovered at the next boot."""
+        journal_writer.submit(self, 'close')
+
+    def discard(self) -> None:
+        """Stop journaling and delete the files, once the buffer is saved or abandoned."""
+        journal_writer.submit(self, 'discard')
+
+    # The rest runs on the writer thread
+
+    def _start(self, chunks: Iterable[str]) -> None:
+        """Write a snapshot of `chunks` (or of `_file`) and an empty journal to follow it."""
+        self._close_handle()
+        self._generation += 1
+        self.snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+        header = {'generation': self._generation, 'meta': self._meta, 'file': self._file}
+        temporary = self.snapshot_path.with_suffix('.tmp')
+        with temporary.open('w', encoding='utf-8', errors='surrogatepass', newline='') as snapshot:
+            snapshot.write(json.dumps(header) + '\n')
+            for chunk in chunks:
+                snapshot.write(chunk)
+            snapshot.flush()
+            os.fsync(snapshot.fileno())
+        temporary.replace(self.snapshot_path)
+        # The generation tells recovery to ignore an old journal left by a crash just after the above
+        with temporary.open('w', encoding='utf-8', newline='') as journal:
+            journal.write(json.dumps({'generation': self._generation}) + '\n')
+            journal.flush()
+            os.fsync(journal.fileno())
+        temporary.replace(self.journal_path)
+        self._handle = self.journal_path.open('a', encoding='utf-8', newline='')
+
+    def _append(self, record: Any) -> None:
+        if self._handle is None:
+            self._start([] if self._file is not None else [self._text or ''])
+        self._handle.write(json.dumps(record, separators=(',', ':')) + '\n')
+        self._dirty = True
+
+    def _on_replace(self, start: int, end: int, text: str) -> None:
+        # The first edit snapshots the text before it
+        self._append((start, end, text))
+        if self._text is not None:
+            self._text = self._text[:start] + text + self._text[end:]
+
+    def _on_meta(self, meta: dict[str, Any]) -> None:
+        self._meta.update(meta)
+        if self._handle is not None:
+            self._append({'meta': meta})
+
+    def _on_compact(self, pieces: list[Piece] | None) -> None:
+        self._file = None
+        self._start([self._text or ''] if pieces is None else (piece.text for piece in pieces))
+
+    def _on_close(self) -> None:
+        if self._handle is not None:
+            self._handle.flush()
+            os.fsync(self._handle.fileno())
+        self._close_handle()
+        self._closed = True
+
+    def _on_discard(self) -> None:
+        self._close_handle()
+        self._closed = True
+        self.snapshot_path.unlink(missing_ok=True)
+        self.journal_path.unlink(missing_ok=True)
+
+    def _flush(self) -> None:
+        if self._handle is not None:
+            self._handle.flush()
+
+    def _sync(self) -> None:
+        if self._handle is not None:
+            os.fsync(self._handle.fileno())
+        self._dirty = False
+
+    def _close_handle(self) -> None:
+        if self._handle is not None:
+            try:
+                self._handle.close()
+            except OSError:
+                pass
+            self._handle = None
+        self._dirty = False
+
+
+class Recovered(NamedTuple):
+    id: str
+    generation: int
+    meta: dict[str, Any]
+    table: PieceTable
+    stale: bool
+    """Whether the file the edits were made to has changed since, so they may be misplaced."""
+
+
+def pending_journals(folder: Path) -> list[Path]:
+    """Snapshots of buffers left unsaved when TermOS last stopped."""
+    return sorted(folder.glob(f'*{SNAPSHOT_SUFFIX}')) if folder.is_dir() else []
+
+
+def recover(snapshot_path: Path) -> Recovered:
+    """Rebuild a buffer from its snapshot and the edits journaled after it.
+
+    This reads the whole buffer, so call it from a thread. Raises `OSError` or `ValueError` if
+    the snapshot, or the file it names, can't be read. A journal cut off by a crash is replayed
+    up to its last complete edit.
+    """
+    table = PieceTable()
+    with snapshot_path.open(encoding='utf-8', errors='surrogatepass', newline='') as snapshot:
+        header = json.loads(snapshot.readline())
+        file = header['file']
+        while file is None and (chunk := snapshot.read(READ_CHUNK_SIZE)):
+            table.append(Buffer(chunk))
+
+    stale = False
+    if file is not None:
+        path = Path(file['path'])
+        stat = path.stat()
+        stale = (stat.st_size, stat.st_mtime_ns) != (file['size'], file['mtime_ns'])
+        # Read as `LargeFileEditor` reads it, so the journaled offsets line up
+        with path.open(encoding='utf-8', errors='replace', newline='') as base:
+            while chunk := base.read(READ_CHUNK_SIZE):
+                table.append(Buffer(chunk))
+
+    meta = header['meta']
+    journal_path = snapshot_path.with_suffix(JOURNAL_SUFFIX)
+    try:
+        with journal_path.open(encoding='utf-8', newline='') as journal:
+            if json.loads(journal.readline() or '{}').get('generation') == header['generation']:
+                for line in journal:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        break
+                    if isinstance(record, dict):
+                        meta.update(record['meta'])
+                    else:
+                        start, end, text = record
+                        table.delete(start, end)
+                        table.insert(start, text)
+    except FileNotFoundError:
+        pass
+    return Recovered(snapshot_path.stem, header['generation'], meta, table, stale)
+
+
+class JournalWriter:
+    """The thread writing every journal, so the UI never waits on the disk.
+
+    Everything queued while the thread was busy is written in one batch, and journals are
+    synced at most once per `FSYNC_INTERVAL`, or when `flush` asks.
+    """
+
+    def __init__(self) -> None:
+        self._queue: queue.SimpleQueue[tuple[Journal | None, str, tuple[Any, ...]]] = queue.SimpleQueue()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def submit(self, journal: Journal, operation: str, *args: Any) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='journal-writer', daemon=True)
+                self._thread.start()
+                atexit.register(self.flush)
+        self._queue.put((journal, operation, args))
+
+    def flush(self) -> None:
+        """Block until everything queued so far has been written and synced."""
+        if self._thread is None or not self._thread.is_alive():
+            return
+        done = threading.Event()
+        self._queue.put((None, '', (done,)))
+        done.wait(FLUSH_TIMEOUT)
+
+    def _run(self) -> None:
+        unsynced: set[Journal] = set()
+        last_sync = monotonic()
+        while True:
+            timeout = max(0.0, last_sync + FSYNC_INTERVAL - monotonic()) if unsynced else None
+            try:
+                batch = [self._queue.get(timeout=timeout)]
+            except queue.Empty:
+                batch = []
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            waiting = []
+            for journal, operation, args in batch:
+                if journal is None:
+                    waiting.append(args[0])
+                    continue
+                if journal._closed:
+                    continue
+                try:
+                    getattr(journal, f'_on_{operation}')(*args)
+                except OSError as error:
+                    journal.error = error
+                    journal._close_handle()
+                (unsynced.add if journal._dirty else unsynced.discard)(journal)
+
+            for journal in unsynced:
+                journal._flush()
+            if unsynced and (waiting or monotonic() - last_sync >= FSYNC_INTERVAL):
+                for journal in unsynced:
+                    try:
+                        journal._sync()
+                    except OSError as error:
+                        journal.error = error
+                        journal._close_handle()
+                unsynced.clear()
+                last_sync = monotonic()
+            for done in waiting:
+                done.set()
+
+
+journal_writer = JournalWriter()
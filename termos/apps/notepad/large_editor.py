@@ -0,0 +1,347 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Iterable, NamedTuple
+
+from pygments.lexer import Lexer
+from pygments.lexers import get_lexer_by_name
+from pygments.util import ClassNotFound
+from rich.style import Style
+from rich.syntax import PygmentsSyntaxTheme
+from rich.text import Text
+from textual import events, work
+from textual.binding import Binding
+from textual.geometry import Region, Size
+from textual.message import Message
+from textual.reactive import reactive
+from textual.scroll_view import ScrollView
+from textual.strip import Strip
+
+from termos.apps.fileManager.preview import CONTROL_CHARACTERS
+from termos.apps.notepad.piece_table import Buffer, Piece, PieceTable
+
+LOAD_CHUNK_SIZE = 256 * 1024
+"""Characters read at a time when loading a file."""
+TAB = '    '
+MAX_MERGED_TYPING = 64
+"""Characters typed in a row which are undone together."""
+
+
+def write_text(path: Path, texts: Iterable[str]) -> None:
+    """Write `texts` to a temporary file, then move it over `path`, so a crash can't leave it half written.
+
+    Programs reading `path` meanwhile, such as a File Manager preview, see the old or new file whole.
+    """
+    temporary = path.with_name(f'.{path.name}.tmp')
+    with temporary.open('w', encoding='utf-8', newline='') as file:
+        file.writelines(texts)
+    temporary.replace(path)
+
+
+class Edit(NamedTuple):
+    """An insertion or deletion, holding only the text it changed."""
+
+    inserted: bool
+    offset: int
+    text: str
+
+
+class LargeFileEditor(ScrollView, can_focus=True):
+    """A plain text editor for files too big for `TextArea`.
+
+    Text lives in a `PieceTable`, so loading appends the file's chunks as they're read and
+    edits (and their undo history) only hold the text typed or deleted. Only the lines on
+    screen are rendered and syntax highlighted, each time starting the lexer at the top of
+    the screen.
+    """
+
+    DEFAULT_CSS = '''
+    LargeFileEditor {
+        height: 1fr;
+        background: $surface;
+    }
+    '''
+
+    BINDINGS = [
+        Binding('up', 'move(-1, 0)', show=False),
+        Binding('down', 'move(1, 0)', show=False),
+        Binding('left', 'move(0, -1)', show=False),
+        Binding('right', 'move(0, 1)', show=False),
+        Binding('pageup', 'page(-1)', show=False),
+        Binding('pagedown', 'page(1)', show=False),
+        Binding('home', 'line_edge(False)', show=False),
+        Binding('end', 'line_edge(True)', show=False),
+        Binding('ctrl+home', 'document_edge(False)', show=False),
+        Binding('ctrl+end', 'document_edge(True)', show=False),
+        Binding('backspace', 'delete_left', show=False),
+        Binding('delete', 'delete_right', show=False),
+        Binding('enter', 'insert("\\n")', show=False),
+        Binding('ctrl+z', 'undo', 'Undo', show=False),
+        Binding('ctrl+y', 'redo', 'Redo', show=False),
+    ]
+
+    cursor: reactive[tuple[int, int]] = reactive((0, 0), always_update=True)
+    """The line and column of the cursor."""
+    language: reactive[str | None] = reactive(None)
+
+    class Changed(Message):
+        def __init__(self, editor: LargeFileEditor, edit: Edit) -> None:
+            super().__init__()
+            self.editor = editor
+            self.edit = edit
+            """The edit made, which for an undo is the reverse of the edit undone."""
+
+    class Loaded(Message):
+        def __init__(self, editor: LargeFileEditor) -> None:
+            super().__init__()
+            self.editor = editor
+
+    class Saved(Message):
+        def __init__(self, editor: LargeFileEditor, path: Path, pieces: list[Piece]) -> None:
+            super().__init__()
+            self.editor = editor
+            self.path = path
+            self.pieces = pieces
+            """The text written, which differs from the editor's if it was edited while saving."""
+
+    def __init__(self, theme: str = 'monokai', id: str | None = None) -> None:
+        super().__init__(id=id)
+        self.table = PieceTable()
+        self.loading_file = False
+        self.undo_stack: list[Edit] = []
+        self.redo_stack: list[Edit] = []
+        self.theme = PygmentsSyntaxTheme(theme)
+        self._lexer: Lexer | None = None
+        self._longest_line = 0
+        # Highlighted lines on screen, keyed by line number, until the next edit or scroll
+        self._highlighted: dict[int, Text] = {}
+
+    @property
+    def text(self) -> str:
+        return self.table.text()
+
+    def load(self, path: Path) -> None:
+        self.table = PieceTable()
+        self.undo_stack.clear()
+        self.redo_stack.clear()
+        self.loading_file = True
+        self.cursor = (0, 0)
+        self._invalidate()
+        self._load(path)
+
+    def load_table(self, table: PieceTable) -> None:
+        """Edit text which is already in memory, such as a recovered buffer."""
+        self.workers.cancel_group(self, 'load')
+        self.table = table
+        self.undo_stack.clear()
+        self.redo_stack.clear()
+        self.loading_file = False
+        self.cursor = (0, 0)
+        self._invalidate()
+
+    @work(thread=True, exclusive=True, group='load')
+    def _load(self, path: Path) -> None:
+        try:
+            with path.open(encoding='utf-8', errors='replace', newline='') as file:
+                while chunk := file.read(LOAD_CHUNK_SIZE):
+                    # The chunk's line breaks are found here, off the event loop
+                    self.app.call_from_thread(self._append, Buffer(chunk))
+        except OSError as error:
+            self.app.call_from_thread(self.notify, str(error), title="Couldn't open file", severity='error')
+        finally:
+            self.app.call_from_thread(self._finish_loading)
+
+    def _append(self, buffer: Buffer) -> None:
+        self.table.append(buffer)
+        self._invalidate()
+
+    def _finish_loading(self) -> None:
+        self.loading_file = False
+        self.post_message(self.Loaded(self))
+
+    def save(self, path: Path) -> None:
+        # Pieces never change once made, so edits made while saving can't affect what's written
+        self._save(path, [*self.table.pieces])
+
+    @work(thread=True, exclusive=True, group='save')
+    def _save(self, path: Path, pieces: list[Piece]) -> None:
+        try:
+            write_text(path, (piece.text for piece in pieces))
+        except OSError as error:
+            self.app.call_from_thread(self.notify, str(error), title="Couldn't save file", severity='error')
+        else:
+            self.post_message(self.Saved(self, path, pieces))
+
+    def watch_language(self, language: str | None) -> None:
+        try:
+            self._lexer = get_lexer_by_name(language, stripnl=False, ensurenl=False) if language else None
+        except ClassNotFound:
+            self._lexer = None
+        self._invalidate()
+
+    def watch_cursor(self, cursor: tuple[int, int]) -> None:
+        line, column = cursor
+        x = len(self._display(self.table.line(line)[:column]))
+        self.scroll_to_region(Region(x, line, 1, 1), animate=False, force=True)
+        self.refresh()
+
+    def watch_scroll_y(self, old: float, new: float) -> None:
+        super().watch_scroll_y(old, new)
+        self._highlighted.clear()
+
+    def _invalidate(self) -> None:
+        self._highlighted.clear()
+        self.virtual_size = Size(max(self._longest_line + 1, self.size.width), self.table.line_count)
+        self.refresh()
+
+    def on_resize(self) -> None:
+        self._invalidate()
+
+    @staticmethod
+    def _display(text: str) -> str:
+        return text.replace('\t', TAB).translate(CONTROL_CHARACTERS)
+
+    def _highlight_screen(self) -> None:
+        """Highlight every line on screen, lexing them together so tokens spanning lines are right."""
+        first = int(self.scroll_y)
+        last = min(first + self.size.height, self.table.line_count)
+        lines = [self._display(self.table.line(line)) for line in range(first, last)]
+        if self._lexer is None:
+            self._highlighted = {first + number: Text(line, self.rich_style) for number, line in enumerate(lines)}
+            return
+
+        highlighted = [Text(style=self.rich_style)]
+        for token_type, value in self._lexer.get_tokens('\n'.join(lines)):
+            token_style = self.theme.get_style_for_token(token_type)
+            style = Style(color=token_style.color, bold=token_style.bold, italic=token_style.italic)
+            for number, part in enumerate(value.split('\n')):
+                if number:
+                    highlighted.append(Text(style=self.rich_style))
+                highlighted[-1].append(part, style)
+        self._highlighted = {first + number: line for number, line in enumerate(highlighted[:len(lines)])}
+
+    def render_line(self, y: int) -> Strip:
+        scroll_x, scroll_y = self.scroll_offset
+        line = scroll_y + y
+        width = self.scrollable_content_region.width
+        if line >= self.table.line_count:
+            return Strip.blank(width, self.rich_style)
+
+        if line not in self._highlighted:
+            self._highlight_screen()
+        display = self._highlighted[line].copy()
+        if len(display) > self._longest_line:
+            self._longest_line = len(display)
+            self.call_later(self._invalidate)
+
+        cursor_line, cursor_column = self.cursor
+        if line == cursor_line and self.has_focus:
+            x = len(self._display(self.table.line(line)[:cursor_column]))
+            if x >= len(display):
+                display.append(' ' * (x - len(display) + 1))
+            display.stylize(Style(reverse=True), x, x + 1)
+
+        strip = Strip(list(display.render(self.app.console)), display.cell_len)
+        return strip.crop_extend(scroll_x, scroll_x + width, self.rich_style)
+
+    def on_focus(self) -> None:
+        self.refresh()
+
+    def on_blur(self) -> None:
+        self.refresh()
+
+    def on_click(self, event: events.Click) -> None:
+        line = min(self.scroll_offset.y + event.y, self.table.line_count - 1)
+        cell = self.scroll_offset.x + event.x
+        text = self.table.line(line)
+        column = 0
+        while column < len(text) and len(self._display(text[:column + 1])) <= cell:
+            column += 1
+        self.cursor = (line, column)
+
+    def on_key(self, event: events.Key) -> None:
+        if event.is_printable and event.character:
+            event.stop()
+            event.prevent_default()
+            self.action_insert(event.character)
+
+    def on_paste(self, event: events.Paste) -> None:
+        # However large, a paste becomes a single buffer
+        event.stop()
+        self.action_insert(event.text)
+
+    @property
+    def cursor_offset(self) -> int:
+        return self.table.location_to_offset(*self.cursor)
+
+    def _apply(self, edit: Edit, record: bool = True) -> None:
+        if edit.inserted:
+            self.table.insert(edit.offset, edit.text)
+            self.cursor = self.table.offset_to_location(edit.offset + len(edit.text))
+        else:
+            self.table.delete(edit.offset, edit.offset + len(edit.text))
+            self.cursor = self.table.offset_to_location(edit.offset)
+        if record:
+            self._record(edit)
+        self._invalidate()
+        self.post_message(self.Changed(self, edit))
+
+    def _record(self, edit: Edit) -> None:
+        self.redo_stack.clear()
+        previous = self.undo_stack[-1] if self.undo_stack else None
+        if (
+            previous is not None and previous.inserted and edit.inserted and '\n' not in edit.text
+            and edit.offset == previous.offset + len(previous.text) and len(previous.text) < MAX_MERGED_TYPING
+        ):
+            self.undo_stack[-1] = Edit(True, previous.offset, previous.text + edit.text)
+        else:
+            self.undo_stack.append(edit)
+
+    def action_insert(self, text: str) -> None:
+        self._apply(Edit(True, self.cursor_offset, text))
+
+    def action_delete_left(self) -> None:
+        offset = self.cursor_offset
+        if offset > 0:
+            # Delete a whole \r\n line ending at once
+            start = offset - 2 if self.table.text(offset - 2, offset) == '\r\n' else offset - 1
+            self._apply(Edit(False, start, self.table.text(start, offset)))
+
+    def action_delete_right(self) -> None:
+        offset = self.cursor_offset
+        if offset < len(self.table):
+            end = offset + 2 if self.table.text(offset, offset + 2) == '\r\n' else offset + 1
+            self._apply(Edit(False, offset, self.table.text(offset, end)))
+
+    def action_undo(self) -> None:
+        if self.undo_stack:
+            edit = self.undo_stack.pop()
+            self._apply(Edit(not edit.inserted, edit.offset, edit.text), record=False)
+            self.redo_stack.append(edit)
+
+    def action_redo(self) -> None:
+        if self.redo_stack:
+            edit = self.redo_stack.pop()
+            self._apply(edit, record=False)
+            self.undo_stack.append(edit)
+
+    def action_move(self, lines: int, columns: int) -> None:
+        line, column = self.cursor
+        if columns:
+            offset = self.cursor_offset + columns
+            self.cursor = self.table.offset_to_location(offset)
+            if self.table.text(offset - 1, offset + 1) == '\r\n':
+                self.action_move(0, columns)
+            return
+        line = max(0, min(line + lines, self.table.line_count - 1))
+        self.cursor = (line, min(column, len(self.table.line(line))))
+
+    def action_page(self, direction: int) -> None:
+        self.action_move(direction * max(1, self.scrollable_content_region.height - 1), 0)
+
+    def action_line_edge(self, end: bool) -> None:
+        line, _ = self.cursor
+        self.cursor = (line, len(self.table.line(line)) if end else 0)
+
+    def action_document_edge(self, end: bool) -> None:
+        self.cursor = self.table.offset_to_location(len(self.table)) if end else (0, 0)
@@ -1,31 +1,321 @@
 from __future__ import annotations
 
+import asyncio
+from pathlib import Path
 from typing import TYPE_CHECKING
 
+from textual import on, work
 from textual.app import ComposeResult
-from textual.containers import Center
+from textual.containers import Center, HorizontalGroup
+from textual.css.query import NoMatches
 from textual.widget import Widget
-from textual.widgets import TextArea, Label, Select
+from textual.widgets import TextArea, Label, Select, Button, Input
 
 from termos.apps import OSApp
+from termos.apps.fileManager.listing import FileList
+from termos.apps.notepad.journal import (
+    SNAPSHOT_SUFFIX, Journal, Recovered, journal_writer, pending_journals, recover,
+)
+from termos.apps.notepad.large_editor import LargeFileEditor, write_text
+from termos.apps.notepad.text_area import JournaledTextArea
+from termos.paths import recovery_dir, termos_folders
 
 if TYPE_CHECKING:
+    from termos.components.window import Window
     from termos.termos import TermOS
 
+LARGE_FILE_SIZE = 1024 * 1024
+"""Files bigger than this, in bytes, are opened in large file mode."""
+
+LANGUAGES = {
+    '.py': 'python', '.md': 'markdown', '.json': 'json', '.toml': 'toml', '.yaml': 'yaml', '.yml': 'yaml',
+    '.html': 'html', '.css': 'css', '.js': 'javascript', '.rs': 'rust', '.go': 'go', '.sql': 'sql',
+    '.java': 'java', '.sh': 'bash', '.xml': 'xml',
+}
+
 
 class NotepadWidget(Widget):
+    """A text editor, whose unsaved changes are journaled so they survive TermOS stopping.
+
+    Pass `snapshot` to reopen a buffer left unsaved when TermOS last stopped, or `path` to
+    open a file.
+    """
+
+    def __init__(self, snapshot: Path | None = None, path: Path | None = None) -> None:
+        super().__init__()
+        self.path: Path | None = None
+        self.modified = False
+        self.languages: set[str] = set()
+        self.snapshot = snapshot
+        self.open_path = path
+        self.journal_folder = recovery_dir(Notepad.NAME)
+        self.journal: Journal | None = None
+
     def compose(self) -> ComposeResult:
         with Center():
-            yield Label('<new file>')
-        editor = TextArea.code_editor()
+            yield Label('<new file>', id='title')
+        editor = JournaledTextArea.code_editor()
+        self.languages = editor.available_languages
         yield editor
         yield Select(
-            ((lang, lang) for lang in editor.available_languages),
+            ((lang, lang) for lang in sorted(self.languages)),
             prompt='Select language...',
         )
+        with HorizontalGroup(classes='buttons'):
+            yield Input(placeholder='File name', id='file-name')
+            yield Button('Open', id='open')
+            yield Button('Save', variant='primary', id='save')
+
+    async def on_mount(self) -> None:
+        if self.snapshot is not None:
+            self.recover_buffer(self.snapshot)
+            return
+        if self.open_path is not None:
+            await self.open_file(self.open_path)
+        if self.journal is None:
+            self.start_journal()
+
+    @property
+    def journal_id(self) -> str | None:
+        """The journal holding this buffer's unsaved changes, if any, once mounted or when recovering."""
+        if self.journal is not None:
+            return self.journal.id
+        return self.snapshot.stem if self.snapshot is not None else None
+
+    @property
+    def editor(self) -> TextArea | LargeFileEditor:
+        return self.query_one('TextArea, LargeFileEditor')
 
     def on_select_changed(self, message: Select.Changed) -> None:
-        self.query_one(TextArea).language = message.value
+        self.editor.language = None if message.value is Select.BLANK else message.value
+        if self.journal is not None:
+            self.journal.update_meta(language=self.editor.language)
+
+    def set_language(self, language: str | None) -> None:
+        if language not in self.languages:
+            language = None
+        self.editor.language = language
+        select = self.query_one(Select)
+        with self.prevent(Select.Changed):
+            if language is None:
+                select.clear()
+            else:
+                select.value = language
+
+    def update_title(self) -> None:
+        title = self.path.name if self.path is not None else '<new file>'
+        if isinstance(self.editor, LargeFileEditor):
+            title += ' (large file)'
+        self.query_one('#title', Label).update(f'{title} *' if self.modified else title)
+
+    @on(Button.Pressed, '#open')
+    async def toggle_open_list(self) -> None:
+        """Show the files in the main folder to pick one, listing them the first time."""
+        try:
+            open_list = self.query_one('#open-list', FileList)
+        except NoMatches:
+            open_list = FileList(termos_folders()[0], suffix='', id='open-list')
+            await self.mount(open_list, before=self.editor)
+        else:
+            open_list.toggle_class('hidden')
+        if not open_list.has_class('hidden'):
+            open_list.focus()
+
+    @on(FileList.Selected, '#open-list')
+    async def open_selected(self, message: FileList.Selected) -> None:
+        message.stop()
+        self.query_one('#open-list').add_class('hidden')
+        await self.open_file(message.path)
+        # After the open list has been hidden, which moves focus out of it
+        self.call_after_refresh(self.editor.focus)
+
+    async def open_file(self, path: Path) -> None:
+        """Open `path`, in large file mode if it is bigger than `LARGE_FILE_SIZE`."""
+        try:
+            size = path.stat().st_size
+        except OSError as error:
+            self.notify(str(error), title="Couldn't open file", severity='error')
+            return
+        large = size > LARGE_FILE_SIZE
+        language = LANGUAGES.get(path.suffix)
+        await self.swap_editor(large)
+
+        if large:
+            self.editor.load(path)
+        else:
+            try:
+                text = await asyncio.to_thread(path.read_text, encoding='utf-8', errors='replace')
+            except OSError as error:
+                self.notify(str(error), title="Couldn't open file", severity='error')
+                return
+            with self.editor.prevent(TextArea.Changed):
+                self.editor.load_text(text)
+
+        self.path = path
+        self.modified = False
+        self.query_one('#file-name', Input).value = path.name
+        self.set_language(language)
+        self.update_title()
+        self.start_journal()
+
+    async def swap_editor(self, large: bool) -> None:
+        """Use a `LargeFileEditor` for large files and a `TextArea` otherwise."""
+        if isinstance(self.editor, LargeFileEditor) == large:
+            return
+        await self.editor.remove()
+        await self.mount(LargeFileEditor() if large else JournaledTextArea.code_editor(), before=self.query_one(Select))
+
+    @on(Button.Pressed, '#save')
+    async def save(self) -> None:
+        name = self.query_one('#file-name', Input).value.strip()
+        if not name:
+            self.notify('Enter a file name to save as', severity='warning')
+            return
+        if not Path(name).suffix:
+            name += '.txt'
+        path = termos_folders()[0] / Path(name).name
+
+        editor = self.editor
+        if isinstance(editor, LargeFileEditor):
+            if editor.loading_file:
+                self.notify('Wait for the file to finish loading', severity='warning')
+                return
+            editor.save(path)  # posts Saved once written
+            return
+        try:
+            await asyncio.to_thread(write_text, path, [editor.text])
+        except OSError as error:
+            self.notify(str(error), title="Couldn't save file", severity='error')
+            return
+        self.saved(path)
+
+    @on(LargeFileEditor.Saved)
+    def large_file_saved(self, message: LargeFileEditor.Saved) -> None:
+        # Edits made while saving are still unsaved, and journaled against the old text
+        self.saved(message.path, clean=message.pieces == message.editor.table.pieces)
+
+    def saved(self, path: Path, clean: bool = True) -> None:
+        self.path = path
+        if clean:
+            self.modified = False
+            self.start_journal()
+        self.update_title()
+        self.notify(f'Saved {path.name}')
+
+    def text_changed(self) -> None:
+        if not self.modified:
+            self.modified = True
+            self.update_title()
+        if self.journal is not None and self.journal.error is not None:
+            self.notify(
+                f"Unsaved changes can't be recovered if TermOS stops: {self.journal.error}",
+                title="Couldn't journal changes",
+                severity='warning',
+            )
+            self.end_journal(discard=True)
+
+    @on(TextArea.Changed)
+    def text_area_changed(self, message: TextArea.Changed) -> None:
+        self.text_changed()
+
+    @on(JournaledTextArea.Replaced)
+    def text_area_replaced(self, message: JournaledTextArea.Replaced) -> None:
+        if self.journal is not None:
+            self.journal.replace(message.start, message.end, message.text)
+            if self.journal.needs_compaction:
+                self.journal.compact()
+
+    @on(LargeFileEditor.Changed)
+    def large_file_changed(self, message: LargeFileEditor.Changed) -> None:
+        self.text_changed()
+        if self.journal is not None:
+            edit = message.edit
+            if edit.inserted:
+                self.journal.replace(edit.offset, edit.offset, edit.text)
+            else:
+                self.journal.replace(edit.offset, edit.offset + len(edit.text), '')
+            # Until loaded, the pieces hold only part of the file
+            if self.journal.needs_compaction and not message.editor.loading_file:
+                self.journal.compact([*message.editor.table.pieces])
+
+    def start_journal(self, recovered: Recovered | None = None) -> None:
+        """Journal edits from the current text on, replacing the journal of the previous text.
+
+        A large file's journal refers to the file it was opened from or saved to, rather than
+        copying it. A recovered buffer keeps its journal, which is compacted straight away.
+        """
+        self.end_journal(discard=True)
+        editor = self.editor
+        large = isinstance(editor, LargeFileEditor)
+        meta = {'path': self.path and str(self.path), 'language': editor.language}
+        try:
+            if recovered is not None:
+                self.journal = Journal(
+                    self.journal_folder, meta, text=None if large else editor.text,
+                    id=recovered.id, generation=recovered.generation,
+                )
+                self.journal.compact([*editor.table.pieces] if large else None)
+            elif large:
+                self.journal = Journal(self.journal_folder, meta, file=self.path)
+            else:
+                self.journal = Journal(self.journal_folder, meta, text=editor.text)
+        except OSError as error:
+            self.notify(
+                f"Unsaved changes can't be recovered if TermOS stops: {error}",
+                title="Couldn't journal changes",
+                severity='warning',
+            )
+
+    def end_journal(self, discard: bool) -> None:
+        """Stop journaling, deleting the journal if the changes in it are no longer wanted."""
+        if self.journal is not None:
+            if discard:
+                self.journal.discard()
+            else:
+                self.journal.close()
+            self.journal = None
+
+    @work(thread=True)
+    def recover_buffer(self, snapshot: Path) -> None:
+        try:
+            recovered = recover(snapshot)
+        except (OSError, ValueError, KeyError) as error:
+            self.app.call_from_thread(self.recovery_failed, snapshot, error)
+            return
+        self.app.call_from_thread(self.restore, recovered)
+
+    async def restore(self, recovered: Recovered) -> None:
+        large = len(recovered.table) > LARGE_FILE_SIZE
+        await self.swap_editor(large)
+        if large:
+            self.editor.load_table(recovered.table)
+        else:
+            with self.editor.prevent(TextArea.Changed):
+                self.editor.load_text(recovered.table.text())
+
+        path = recovered.meta.get('path')
+        self.path = Path(path) if path else None
+        self.modified = True
+        if self.path is not None:
+            self.query_one('#file-name', Input).value = self.path.name
+        self.set_language(recovered.meta.get('language'))
+        self.update_title()
+        self.start_journal(recovered)
+        name = self.path.name if self.path is not None else 'a new file'
+        if recovered.stale:
+            self.notify(
+                f'{name} has changed since it was edited, so some changes may be in the wrong place.',
+                title='Recovered unsaved changes',
+                severity='warning',
+            )
+        else:
+            self.notify(f'Reopened the unsaved changes to {name}.', title='Recovered unsaved changes')
+
+    def recovery_failed(self, snapshot: Path, error: Exception) -> None:
+        self.notify(str(error), title="Couldn't recover unsaved changes", severity='error')
+        # Take over the unreadable journal, so it is deleted rather than retried at every boot
+        self.journal = Journal(self.journal_folder, {}, id=snapshot.stem)
+        self.start_journal()
 
 
 class Notepad(OSApp):
@@ -37,3 +327,47 @@ class Notepad(OSApp):
     def launch(os: TermOS) -> None:
         instance = Notepad(os)
         instance.create_window(NotepadWidget(), 'notepad', width=50, height=20)
+
+    @classmethod
+    def restore(cls, os: TermOS, state: dict[str, str | None] | None) -> None:
+        state = state or {}
+        snapshot = None
+        if state.get('journal'):
+            snapshot = recovery_dir(cls.NAME) / f"{state['journal']}{SNAPSHOT_SUFFIX}"
+        path = state.get('path')
+        if snapshot is not None and snapshot.is_file():
+            content = NotepadWidget(snapshot)
+        else:
+            content = NotepadWidget(path=Path(path) if path else None)
+        Notepad(os).create_window(content, 'notepad', width=50, height=20)
+
+    def window_state(self, window: Window) -> dict[str, str | None]:
+        content: NotepadWidget = window.content
+        return {'path': content.path and str(content.path), 'journal': content.journal_id}
+
+    @classmethod
+    def recover(cls, os: TermOS) -> None:
+        # Journals of windows reopened from the last session are recovered by those windows
+        claimed = {
+            window.content.journal_id for window in os.window_manager.windows
+            if isinstance(window.content, NotepadWidget)
+        }
+        snapshots = [
+            snapshot for snapshot in pending_journals(recovery_dir(cls.NAME)) if snapshot.stem not in claimed
+        ]
+        if snapshots:
+            instance = Notepad(os)
+            for snapshot in snapshots:
+                instance.create_window(NotepadWidget(snapshot), 'notepad', width=50, height=20)
+
+    async def on_window_close(self, window: Window) -> None:
+        # Closing a window abandons its unsaved changes
+        window.content.end_journal(discard=True)
+        await super().on_window_close(window)
+
+    async def kill(self) -> None:
+        # Killed rather than closed, e.g. by powering off, so unsaved changes are kept for the next boot
+        for window in self.os.window_manager.windows_of(self):
+            window.content.end_journal(discard=False)
+        await asyncio.to_thread(journal_writer.flush)
+        await super().kill()
@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import accumulate, chain, islice, repeat
+from operator import add
+from typing import Iterator, NamedTuple
+
+ADD_BUFFER_SIZE = 64 * 1024
+"""Characters inserted into one buffer before starting another, as adding to a buffer copies its text."""
+
+
+def _newlines(text: str, start: int = 0) -> Iterator[int]:
+    """The offsets of the line breaks in `text`, counting from `start`."""
+    line_lengths = map(add, map(len, text.split('\n')[:-1]), repeat(1))
+    return islice(accumulate(line_lengths, initial=start - 1), 1, None)
+
+
+class Buffer:
+    """Text which pieces point into, with the positions of its line breaks.
+
+    Text is only ever added to the end, so the text a piece points into never changes.
+    """
+
+    __slots__ = ('text', 'newlines')
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self.newlines = array('q', _newlines(text))
+
+    def extend(self, text: str) -> None:
+        self.newlines.extend(_newlines(text, len(self.text)))
+        self.text += text
+
+    def count_newlines(self, start: int, end: int) -> int:
+        return bisect_left(self.newlines, end) - bisect_left(self.newlines, start)
+
+
+class Piece(NamedTuple):
+    buffer: Buffer
+    start: int
+    end: int
+
+    @property
+    def text(self) -> str:
+        return self.buffer.text[self.start:self.end]
+
+
+class PieceTable:
+    """Text built from pieces of immutable buffers, so edits never copy the text around them.
+
+    The file as loaded is one or more `Buffer`s, and inserted text is added to another. The
+    text is the pieces of them in order: inserting adds a piece, or extends the last one
+    inserted when typing carries on from its end, and deleting trims or drops pieces.
+    Positions are character offsets; lines are found through per-piece running totals of
+    offsets and line breaks, which each edit only recounts for the pieces it changed, shifting
+    the totals after them.
+    """
+
+    def __init__(self, text: str = '') -> None:
+        self.pieces: list[Piece] = []
+        self._offsets = array('q', [0])
+        self._lines = array('q', [0])
+        self._add: Buffer | None = None
+        """The buffer inserted text is added to."""
+        if text:
+            self.append(Buffer(text))
+
+    def __len__(self) -> int:
+        return self._offsets[-1]
+
+    @property
+    def line_count(self) -> int:
+        return self._lines[-1] + 1
+
+    def append(self, buffer: Buffer) -> None:
+        """Add a buffer to the end, e.g. the next chunk of a file being loaded."""
+        if not buffer.text:
+            return
+        self.pieces.append(Piece(buffer, 0, len(buffer.text)))
+        self._offsets.append(self._offsets[-1] + len(buffer.text))
+        self._lines.append(self._lines[-1] + len(buffer.newlines))
+
+    def _replace_pieces(self, first: int, last: int, pieces: list[Piece]) -> None:
+        """Replace the pieces from `first` up to `last` with `pieces`, updating the running totals."""
+        lengths = [piece.end - piece.start for piece in pieces]
+        newlines = [piece.buffer.count_newlines(piece.start, piece.end) for piece in pieces]
+        same_count = len(pieces) == last - first
+        self.pieces[first:last] = pieces
+        for totals, sizes in (self._offsets, lengths), (self._lines, newlines):
+            change = sum(sizes) - (totals[last] - totals[first])
+            head = islice(accumulate(sizes, initial=totals[first]), 1, None)
+            if same_count and not change:
+                # e.g. the line totals while typing on one line
+                totals[first + 1:last + 1] = array('q', head)
+            else:
+                # The totals after the change all shift by the same amount, added without a Python loop
+                totals[first + 1:] = array('q', chain(head, map(add, islice(totals, last + 1, None), repeat(change))))
+
+    def _piece_at(self, offset: int) -> int:
+        """The number of the piece containing `offset`, or `len(self.pieces)` at the end."""
+        return min(bisect_right(self._offsets, offset) - 1, len(self.pieces))
+
+    def text(self, start: int = 0, end: int | None = None) -> str:
+        end = len(self) if end is None else end
+        if start >= end:
+            return ''
+        parts = []
+        for number in range(self._piece_at(start), len(self.pieces)):
+            piece_offset = self._offsets[number]
+            if piece_offset >= end:
+                break
+            piece = self.pieces[number]
+            parts.append(piece.buffer.text[
+                piece.start + max(0, start - piece_offset):piece.start + min(piece.end - piece.start, end - piece_offset)
+            ])
+        return ''.join(parts)
+
+    def chunks(self) -> Iterator[str]:
+        for piece in self.pieces:
+            yield piece.text
+
+    def line_start(self, line: int) -> int:
+        if line <= 0:
+            return 0
+        if line >= self.line_count:
+            return len(self)
+        # The piece holding the line break which ends the previous line
+        number = bisect_left(self._lines, line) - 1
+        piece = self.pieces[number]
+        newlines = piece.buffer.newlines
+        newline = newlines[bisect_left(newlines, piece.start) + line - self._lines[number] - 1]
+        return self._offsets[number] + newline - piece.start + 1
+
+    def line(self, line: int) -> str:
+        """The text of a line, without its line ending."""
+        start = self.line_start(line)
+        end = self.line_start(line + 1) - 1 if line + 1 < self.line_count else len(self)
+        text = self.text(start, end)
+        return text[:-1] if text.endswith('\r') else text
+
+    def offset_to_location(self, offset: int) -> tuple[int, int]:
+        offset = max(0, min(offset, len(self)))
+        number = self._piece_at(offset)
+        line = self._lines[number]
+        if number < len(self.pieces):
+            piece = self.pieces[number]
+            line += piece.buffer.count_newlines(piece.start, piece.start + offset - self._offsets[number])
+        return line, offset - self.line_start(line)
+
+    def location_to_offset(self, line: int, column: int) -> int:
+        line = max(0, min(line, self.line_count - 1))
+        return self.line_start(line) + max(0, min(column, len(self.line(line))))
+
+    def insert(self, offset: int, text: str) -> None:
+        if not text:
+            return
+        offset = max(0, min(offset, len(self)))
+        buffer = self._add
+        if buffer is None or len(buffer.text) + len(text) > ADD_BUFFER_SIZE:
+            buffer = self._add = Buffer('')
+        start = len(buffer.text)
+        buffer.extend(text)
+        inserted = Piece(buffer, start, start + len(text))
+        number = self._piece_at(offset)
+        if number == len(self.pieces) or offset == self._offsets[number]:
+            previous = self.pieces[number - 1] if number else None
+            if previous is not None and previous.buffer is buffer and previous.end == start:
+                # Typing on from the last insertion
+                self._replace_pieces(number - 1, number, [Piece(buffer, previous.start, inserted.end)])
+            else:
+                self._replace_pieces(number, number, [inserted])
+        else:
+            piece = self.pieces[number]
+            split = piece.start + offset - self._offsets[number]
+            self._replace_pieces(number, number + 1, [
+                Piece(piece.buffer, piece.start, split), inserted, Piece(piece.buffer, split, piece.end)
+            ])
+
+    def delete(self, start: int, end: int) -> str:
+        """Remove the text between two offsets, returning it."""
+        start, end = max(0, start), min(end, len(self))
+        if start >= end:
+            return ''
+        removed = self.text(start, end)
+        first, last = self._piece_at(start), self._piece_at(end - 1)
+        kept = []
+        first_piece, last_piece = self.pieces[first], self.pieces[last]
+        if start > self._offsets[first]:
+            kept.append(Piece(first_piece.buffer, first_piece.start, first_piece.start + start - self._offsets[first]))
+        if end < self._offsets[last + 1]:
+            kept.append(Piece(last_piece.buffer, last_piece.start + end - self._offsets[last], last_piece.end))
+        self._replace_pieces(first, last + 1, kept)
+        return removed
@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+from itertools import islice
+
+from textual.document._document import Document, EditResult, Location
+from textual.message import Message
+from textual.widgets import TextArea
+
+
+def _index(document: Document, location: Location) -> int:
+    """The offset of `location` in the document's text, summing line lengths in C rather than a loop."""
+    row, column = location
+    return sum(map(len, islice(document.lines, row))) + row * len(document.newline) + column
+
+
+class JournaledTextArea(TextArea):
+    """A `TextArea` which reports each edit, undo and redo as the range of characters it replaced.
+
+    They all end up in the document's `replace_range`, which is wrapped for each new document,
+    so a journal can record what changed without being handed the whole text every keystroke.
+    """
+
+    class Replaced(Message):
+        """Posted after the text between two offsets has been replaced."""
+
+        def __init__(self, text_area: JournaledTextArea, start: int, end: int, text: str) -> None:
+            super().__init__()
+            self.text_area = text_area
+            self.start = start
+            self.end = end
+            self.text = text
+
+    def _set_document(self, text: str, language: str | None) -> None:
+        super()._set_document(text, language)
+        document = self.document
+        replace_range = document.replace_range
+
+        def reported_replace_range(start: Location, end: Location, text: str) -> EditResult:
+            top, bottom = sorted((start, end))
+            start_index, end_index = _index(document, top), _index(document, bottom)
+            result = replace_range(start, end, text)
+            # As stored, with the document's newlines rather than the ones typed or pasted
+            inserted = document.get_text_range(top, result.end_location)
+            self.post_message(self.Replaced(self, start_index, end_index, inserted))
+            return result
+
+        document.replace_range = reported_replace_range
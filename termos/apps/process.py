@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import pickle
+import sys
+import threading
+import time
+import traceback
+from contextlib import redirect_stderr
+from itertools import count
+from multiprocessing import resource_tracker
+from multiprocessing.connection import Connection
+from typing import Any, Callable
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+
+class ProcessCrashed(Exception):
+    """Raised for calls that were still pending when an app's worker process died."""
+
+
+class RemoteError(Exception):
+    """Raised when a function running in an app's worker process raises an exception."""
+
+
+def worker_usage() -> tuple[float, int | None]:
+    """CPU seconds used and peak memory in bytes of the process calling it, e.g. a worker."""
+    peak_memory = None
+    if resource is not None:
+        # ru_maxrss is in kilobytes on Linux but bytes on macOS
+        peak_memory = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        if sys.platform != 'darwin':
+            peak_memory *= 1024
+    return time.process_time(), peak_memory
+
+
+def _worker_main(connection: Connection) -> None:
+    """Entry point of the worker process: run each requested function and send back the result."""
+    while True:
+        try:
+            request = connection.recv()
+        except (EOFError, KeyboardInterrupt):
+            return
+        if request is None:
+            return
+
+        call_id, function, args, kwargs = request
+        try:
+            response = (call_id, True, function(*args, **kwargs))
+        except Exception as error:
+            response = (call_id, False, ''.join(traceback.format_exception(error)))
+
+        try:
+            connection.send(response)
+        except (pickle.PicklingError, TypeError, AttributeError) as error:
+            connection.send((call_id, False, f'Unable to send result: {error}'))
+
+
+class _Generation:
+    """One run of an app's worker process, and the calls sent to it.
+
+    Each start makes a new one, so the reader thread of a process that was killed only fails
+    its own calls, and can't mistake a restart for its process crashing.
+    """
+
+    def __init__(self, process: multiprocessing.Process, connection: Connection) -> None:
+        self.process = process
+        self.connection = connection
+        self.pending: dict[int, asyncio.Future] = {}
+        self.stopping = False
+
+
+class AppProcess:
+    """A worker process for an OSApp, connected to the UI event loop over a pipe.
+
+    Functions (and their arguments and results) must be picklable, as the worker is started
+    with the spawn method. If the process dies, pending calls fail with `ProcessCrashed`,
+    `on_exit` is called on the event loop, and the next call starts a fresh process.
+    """
+
+    def __init__(self, name: str, on_exit: Callable[[int | None], None] | None = None) -> None:
+        self.name = name
+        self.on_exit = on_exit
+        self._context = multiprocessing.get_context('spawn')
+        self._generation: _Generation | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._lock = threading.Lock()
+        self._call_ids = count()
+
+    @property
+    def alive(self) -> bool:
+        """Whether the worker is running and not being stopped, so calls go to it rather than a new one."""
+        generation = self._generation
+        return generation is not None and not generation.stopping and generation.process.is_alive()
+
+    @property
+    def pid(self) -> int | None:
+        return self._generation.process.pid if self._generation is not None else None
+
+    def start(self) -> None:
+        if self.alive:
+            return
+        self._loop = asyncio.get_running_loop()
+
+        # Textual replaces sys.stderr with an object without a usable file descriptor,
+        # which multiprocessing tries to hand to its resource tracker process
+        with redirect_stderr(sys.__stderr__):
+            resource_tracker.ensure_running()
+
+        connection, child_connection = self._context.Pipe()
+        process = self._context.Process(
+            target=_worker_main,
+            args=(child_connection,),
+            name=f'termos: {self.name}',
+            daemon=True,
+        )
+        process.start()
+        child_connection.close()
+        self._generation = generation = _Generation(process, connection)
+
+        threading.Thread(
+            target=self._read_responses,
+            args=(generation,),
+            name=f'{self.name} process reader',
+            daemon=True,
+        ).start()
+
+    async def call(self, function: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        if not self.alive:
+            self.start()
+
+        generation = self._generation
+        future = asyncio.get_running_loop().create_future()
+        call_id = next(self._call_ids)
+        with self._lock:
+            generation.pending[call_id] = future
+        try:
+            try:
+                generation.connection.send((call_id, function, args, kwargs))
+            except OSError as error:
+                raise ProcessCrashed(f'{self.name} process is not accepting calls') from error
+            return await future
+        finally:
+            with self._lock:
+                generation.pending.pop(call_id, None)
+
+    async def stop(self, timeout: float = 1.0) -> None:
+        """Ask the worker to exit once it has finished its current call, killing it after `timeout`."""
+        if not self.alive:
+            return
+        generation = self._generation
+        generation.stopping = True
+        try:
+            generation.connection.send(None)
+        except OSError:
+            pass
+        await asyncio.to_thread(generation.process.join, timeout)
+        if generation.process.is_alive():
+            generation.process.kill()
+
+    def kill(self) -> None:
+        if self.alive:
+            self._generation.stopping = True
+            self._generation.process.kill()
+
+    def _read_responses(self, generation: _Generation) -> None:
+        """Runs on a background thread, handing results back to the event loop."""
+        while True:
+            try:
+                call_id, ok, value = generation.connection.recv()
+            except (EOFError, OSError):
+                break
+            with self._lock:
+                future = generation.pending.pop(call_id, None)
+            if future is not None:
+                self._call_soon(self._resolve, future, ok, value)
+
+        generation.process.join()
+        generation.connection.close()
+        with self._lock:
+            pending = [*generation.pending.values()]
+            generation.pending.clear()
+        for future in pending:
+            self._call_soon(self._resolve, future, False, ProcessCrashed(f'{self.name} process exited'))
+        if not generation.stopping and self.on_exit is not None:
+            self._call_soon(self.on_exit, generation.process.exitcode)
+
+    def _call_soon(self, callback: Callable, *args: Any) -> None:
+        try:
+            self._loop.call_soon_threadsafe(callback, *args)
+        except RuntimeError:
+            pass  # the event loop has already closed
+
+    @staticmethod
+    def _resolve(future: asyncio.Future, ok: bool, value: Any) -> None:
+        if future.done():
+            return
+        if ok:
+            future.set_result(value)
+        elif isinstance(value, Exception):
+            future.set_exception(value)
+        else:
+            future.set_exception(RemoteError(value))
@@ -0,0 +1,180 @@
+"""
+A task manager showing what each running app costs the desktop.
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from time import perf_counter
+from typing import TYPE_CHECKING
+
+from textual.app import ComposeResult
+from textual.containers import HorizontalGroup
+from textual.widget import Widget
+from textual.widgets import Button, DataTable, Label, Sparkline
+
+from termos.apps import OSApp
+from termos.apps.instrumentation import instrumentation
+from termos.apps.process import ProcessCrashed, RemoteError, worker_usage
+
+if TYPE_CHECKING:
+    from textual.timer import Timer
+
+    from termos.termos import TermOS
+
+LAG_INTERVAL = 0.1
+
+
+def format_bytes(size: int | None) -> str:
+    if size is None:
+        return '-'
+    for unit in ('B', 'KiB', 'MiB'):
+        if size < 1024:
+            return f'{size:.0f} {unit}'
+        size /= 1024
+    return f'{size:.1f} GiB'
+
+
+class TaskManagerWidget(Widget):
+    def __init__(self, task_manager: TaskManager) -> None:
+        super().__init__()
+        self.task_manager = task_manager
+        self.rows: list[OSApp] = []
+        self.memory: dict[str, int] = {}
+        self.lag_history: deque[float] = deque([0.0] * 60, maxlen=60)
+        self.last_tick = perf_counter()
+        self.timers: list[Timer] = []
+        self.worker_usage: dict[OSApp, tuple[float, int | None]] = {}
+        """The latest CPU time and memory reported by each app's worker process."""
+        self.sampling: set[OSApp] = set()
+
+    def compose(self) -> ComposeResult:
+        yield DataTable(cursor_type='row', zebra_stripes=True)
+        with HorizontalGroup(classes='lag'):
+            yield Label('Event loop lag: -', id='lag-label')
+            yield Sparkline(self.lag_history, id='lag')
+        yield Button('End task', variant='error', id='kill')
+
+    async def on_mount(self) -> None:
+        self.query_one(DataTable).add_columns(
+            'App', 'Windows', 'Widgets', 'Messages', 'Avg latency', 'Max latency', 'CPU', 'Memory'
+        )
+        self.timers = [
+            self.set_interval(LAG_INTERVAL, self.measure_lag),
+            self.set_interval(1, self.refresh_stats),
+            # tracemalloc snapshots are expensive, so memory is sampled less often
+            self.set_interval(5, self.snapshot_memory),
+        ]
+        self.watch(self.app, 'low_power', self.pause_sampling)
+        self.snapshot_memory()
+        await self.refresh_stats()
+
+    def pause_sampling(self, low_power: bool) -> None:
+        for timer in self.timers:
+            if low_power:
+                timer.pause()
+            else:
+                timer.resume()
+        # Idle time isn't lag
+        self.last_tick = perf_counter()
+
+    def measure_lag(self) -> None:
+        now = perf_counter()
+        self.lag_history.append(max(0.0, now - self.last_tick - LAG_INTERVAL) * 1000)
+        self.last_tick = now
+
+    def snapshot_memory(self) -> None:
+        self.memory = instrumentation.memory_by_package()
+
+    async def refresh_stats(self) -> None:
+        os = self.task_manager.os
+        table = self.query_one(DataTable)
+        cursor_row = table.cursor_row
+
+        self.rows = [*os.processes]
+        for app in [*self.worker_usage]:
+            if app not in self.rows:
+                del self.worker_usage[app]
+        table.clear()
+        for app in self.rows:
+            windows = os.window_manager.windows_of(app)
+            widgets = sum(len(window.query('*')) + 1 for window in windows)
+            package = '.'.join(type(app).__module__.split('.')[:3])
+            memory = self.memory.get(package, 0)
+            cpu_time = app.stats.cpu_time
+
+            worker = app.process is not None and app.process.alive
+            if worker:
+                self.sample_worker(app)
+            if app in self.worker_usage:
+                worker_cpu, worker_memory = self.worker_usage[app]
+                cpu_time += worker_cpu
+                memory += worker_memory or 0
+
+            table.add_row(
+                f'{app.ICON} {app.NAME}' + (f' (pid {app.process.pid})' if worker else ''),
+                len(windows),
+                widgets,
+                app.stats.messages,
+                f'{app.stats.average_latency * 1000:.2f} ms',
+                f'{app.stats.max_latency * 1000:.1f} ms',
+                f'{cpu_time:.2f} s',
+                format_bytes(memory),
+            )
+        desktop = instrumentation.desktop
+        table.add_row(
+            '🖥 Desktop', '-', len(os.screen.query('*')), desktop.messages,
+            f'{desktop.average_latency * 1000:.2f} ms', f'{desktop.max_latency * 1000:.1f} ms',
+            f'{desktop.cpu_time:.2f} s', '-',
+        )
+        table.move_cursor(row=min(cursor_row, len(self.rows)))
+
+        self.query_one(Sparkline).data = [*self.lag_history]
+        self.query_one('#lag-label', Label).update(f'Event loop lag: {max(self.lag_history):.1f} ms')
+
+    def sample_worker(self, app: OSApp) -> None:
+        """Ask `app`'s worker for its usage in the background, unless it hasn't answered the last request.
+
+        A busy worker only answers once its current work is done, and the table shouldn't wait for it.
+        """
+        if app in self.sampling:
+            return
+        self.sampling.add(app)
+
+        async def sample() -> None:
+            try:
+                self.worker_usage[app] = await app.process.call(worker_usage)
+            except (ProcessCrashed, RemoteError):
+                self.worker_usage.pop(app, None)
+            finally:
+                self.sampling.discard(app)
+
+        self.run_worker(sample(), exit_on_error=False)
+
+    async def on_button_pressed(self) -> None:
+        row = self.query_one(DataTable).cursor_row
+        if 0 <= row < len(self.rows):
+            app = self.rows[row]
+            if app in app.os.processes:
+                await app.kill()
+            if app is not self.task_manager:
+                await self.refresh_stats()
+
+
+class TaskManager(OSApp):
+    NAME = 'Task Manager'
+    ICON = '📊'
+    DESCRIPTION = 'See what each app is costing'
+
+    def __init__(self, os: TermOS) -> None:
+        super().__init__(os)
+        instrumentation.enable()
+
+    async def kill(self) -> None:
+        instrumentation.disable()
+        await super().kill()
+
+    @staticmethod
+    def launch(os: TermOS) -> None:
+        instance = TaskManager(os)
+        instance.create_window(TaskManagerWidget(instance), 'task-manager', width=110, height=20)
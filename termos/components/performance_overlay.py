@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+from time import perf_counter
+from typing import TYPE_CHECKING
+
+from rich.table import Table
+from rich.text import Text
+from textual.app import RenderResult
+from textual.widget import Widget
+
+from termos.profiling import RenderStats, render_profiler
+
+if TYPE_CHECKING:
+    from termos.termos import TermOS
+
+
+class PerformanceOverlay(Widget):
+    """Frame times and the costliest widgets, from `render_profiler`, which records while this is shown.
+
+    Also the bytes TermOS writes to the terminal, per second and per frame, from its `remote_output`.
+    The overlay leaves itself out of the widget timings, but its repaints count towards the frames and output.
+    """
+
+    app: TermOS
+
+    UPDATE_INTERVAL = 0.5
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.stats: RenderStats | None = None
+        self.bytes_per_second = 0.0
+        self.bytes_per_frame = 0.0
+        self._output_counted = (perf_counter(), 0, 0)
+
+    def on_mount(self) -> None:
+        render_profiler.enable(self.app, ignore=self)
+        output = self.app.remote_output
+        self._output_counted = (perf_counter(), output.bytes_written, output.frames_written)
+        self.set_interval(self.UPDATE_INTERVAL, self.update_stats)
+
+    def on_unmount(self) -> None:
+        render_profiler.disable()
+
+    def update_stats(self) -> None:
+        self.stats = render_profiler.stats()
+        output = self.app.remote_output
+        now, bytes_written, frames_written = perf_counter(), output.bytes_written, output.frames_written
+        then, bytes_before, frames_before = self._output_counted
+        self.bytes_per_second = (bytes_written - bytes_before) / max(now - then, 1e-9)
+        self.bytes_per_frame = (bytes_written - bytes_before) / max(frames_written - frames_before, 1)
+        self._output_counted = (now, bytes_written, frames_written)
+        self.refresh(layout=True)
+
+    def render(self) -> RenderResult:
+        stats = self.stats
+        if stats is None:
+            return Text('Measuring…', style='italic')
+
+        table = Table.grid(padding=(0, 1), expand=True)
+        table.add_column(ratio=1, no_wrap=True, overflow='ellipsis')
+        table.add_column(justify='right', no_wrap=True)
+        table.add_row('Frame', f'{stats.frame_ms:.1f} ms (max {stats.max_frame_ms:.1f})')
+        table.add_row('Updates', f'{stats.updates_per_second:.1f}/s')
+        table.add_row('Dirty', f'{stats.dirty_cells:,.0f} cells')
+        mode = ' (remote)' if self.app.remote_output.enabled else ''
+        table.add_row(f'Output{mode}', f'{self.bytes_per_second / 1024:,.1f} KiB/s')
+        table.add_row('Per frame', f'{self.bytes_per_frame:,.0f} bytes')
+        for heading, timings in ('Render', stats.render_ms), ('Layout', stats.layout_ms):
+            table.add_row(Text(heading, style='bold'), '')
+            for name, milliseconds in timings:
+                table.add_row(f' {name}', f'{milliseconds:.2f} ms')
+        return table
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import os
 import sys
+from pathlib import Path
 from typing import TYPE_CHECKING
 
 from rich.text import Text
@@ -10,11 +11,16 @@ from textual.containers import HorizontalGroup
 from textual.geometry import Offset
 from textual.reactive import var
 from textual.widget import Widget
-from textual.widgets import Select, Label, Rule, Button
+from textual.widgets import Select, Label, Rule, Button, Switch
+
+from termos.profiling import render_profiler
 
 if TYPE_CHECKING:
     from termos.termos import TermOS
 
+TRACE_FILE = Path('termos-trace.json')
+"""Where traces are exported, to load into a Chrome trace viewer such as Perfetto."""
+
 
 class QuickSettings(Widget):
     app: TermOS
@@ -37,6 +43,12 @@ class QuickSettings(Widget):
             )
         yield Label(f'Themes installed: {len(self.app.available_themes)}', classes='muted')
         yield Rule()
+        with HorizontalGroup():
+            yield Label('Performance overlay: ')
+            yield Switch(self.app.show_performance_overlay)
+        yield Button('Export trace', id='export-trace')
+        yield Rule()
+        yield Button('Reload apps', id='reload-apps')
         yield Button('Restart', variant='warning', id='restart')
         yield Button('Power Off', variant='error', id='poweroff')
 
@@ -44,6 +56,7 @@ class QuickSettings(Widget):
         if new:
             self.styles.offset = (45, 0)
             self.styles.display = 'block'
+            self.app.ticker.wake()
             self.focus()
             self.animate('offset', value=Offset(), duration=0.5, easing='out_quad')
         else:
@@ -51,12 +64,44 @@ class QuickSettings(Widget):
                 self.styles.display = 'none'
             self.animate('offset', value=Offset(45), duration=0.5, easing='in_quad', on_complete=hide)
 
+    def on_mount(self) -> None:
+        def show_performance_overlay(show: bool) -> None:
+            self.query_one(Switch).value = show
+        # F12 toggles the overlay too
+        self.watch(self.app, 'show_performance_overlay', show_performance_overlay, init=False)
+
     def on_select_changed(self, message: Select.Changed) -> None:
         self.app.theme = message.value
 
+    def on_switch_changed(self, message: Switch.Changed) -> None:
+        self.app.show_performance_overlay = message.value
+
+    def export_trace(self) -> None:
+        if not render_profiler.events:
+            self.notify('Turn on the performance overlay to record one.', title='Nothing to export')
+            return
+        try:
+            count = render_profiler.export(TRACE_FILE)
+        except OSError as error:
+            self.notify(str(error), title="Couldn't export trace", severity='error')
+        else:
+            self.notify(f'{count} events written to {TRACE_FILE.resolve()}', title='Exported trace')
+
     async def on_button_pressed(self, message: Button.Pressed) -> None:
-        for process in self.app.processes:
+        if message.button.id == 'reload-apps':
+            self.visible = False
+            await self.app.reload_apps()
+            return
+        if message.button.id == 'export-trace':
+            self.export_trace()
+            return
+        # Before the windows close
+        self.app.session.save(self.app)
+        for process in [*self.app.processes]:
             await process.kill()
+        await self.app.network.aclose()
+        self.app.file_watcher.stop()
+        self.app.settings.flush()
         if message.button.id == 'poweroff':
             self.app.exit()
         elif message.button.id == 'restart':
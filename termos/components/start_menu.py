@@ -20,8 +20,8 @@ class StartMenu(Widget):
         with ListView():
             for app in self.app.os_apps:
                 with ListItem():
-                    yield Label(f'{app.ICON or ' '} {app.NAME}')
-                    yield Label(app.DESCRIPTION, classes='description')
+                    yield Label(f'{app.icon or " "} {app.name}')
+                    yield Label(app.description, classes='description')
 
     def watch_visible(self, new: bool) -> None:
         self.styles.display = 'block' if new else 'none'
@@ -30,4 +30,8 @@ class StartMenu(Widget):
 
     def on_list_view_selected(self, message: ListView.Selected) -> None:
         self.visible = False
-        self.app.os_apps[message.list_view.index].launch(self.app)
+        manifest = self.app.os_apps[message.list_view.index]
+        try:
+            manifest.launch(self.app)
+        except ImportError as error:
+            self.app.notify(str(error), title=f'Failed to launch {manifest.name}', severity='error')
@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-from datetime import datetime
 from typing import TYPE_CHECKING
 
 from textual import events
@@ -18,15 +17,18 @@ if TYPE_CHECKING:
 
 
 class Clock(Widget):
+    app: TermOS
+
     time = reactive(str)
 
     def on_mount(self) -> None:
-        self.update_time()  # Initial update
-        self.set_interval(1, self.update_time)  # Update every second
+        self.app.ticker.subscribe(self, '%H:%M:%S\n%d/%m/%y', self.update_time)
 
-    def update_time(self) -> None:
-        """Fetch the current time and update the display."""
-        self.time = datetime.now().strftime('%H:%M:%S\n%d/%m/%y')
+    def on_unmount(self) -> None:
+        self.app.ticker.unsubscribe(self)
+
+    def update_time(self, time: str) -> None:
+        self.time = time
 
     def render(self) -> RenderResult:
         return self.time
@@ -50,6 +52,8 @@ class StartButton(Widget):
 
 
 class WindowTab(Widget):
+    app: TermOS
+
     def __init__(self, window: Window) -> None:
         super().__init__()
         self.window = window
@@ -68,26 +72,40 @@ class WindowTab(Widget):
             parts.append(self.window.title)
         return ' '.join(parts or ['...'])
 
-    def on_click(self) -> None:
-        self.window.minimised = not self.window.minimised
+    async def on_click(self) -> None:
+        if self.window in self.app.session.deferred:
+            await self.app.session.show(self.app, self.window)
+        else:
+            self.window.minimised = not self.window.minimised
 
 
 class Taskbar(HorizontalGroup):
     app: TermOS
-    windows = reactive(list[Window], recompose=True)
 
     def __init__(self) -> None:
         super().__init__()
+        self.tabs: dict[Window, WindowTab] = {}
 
     def compose(self) -> ComposeResult:
         yield StartButton()
 
         with Horizontal(classes='tabs-container'):
-            for window in self.windows:
-                yield WindowTab(window)
+            for window in self.app.window_manager.windows:
+                self.tabs[window] = WindowTab(window)
+                yield self.tabs[window]
 
         yield Clock()
 
+    def add_tab(self, window: Window) -> None:
+        if window not in self.tabs:
+            self.tabs[window] = WindowTab(window)
+            self.query_one('.tabs-container').mount(self.tabs[window])
+
+    def remove_tab(self, window: Window) -> None:
+        tab = self.tabs.pop(window, None)
+        if tab is not None:
+            tab.remove()
+
     def _on_mouse_scroll_down(self, event: events.MouseScrollDown) -> None:
         if self.allow_horizontal_scroll:
             self._clear_anchor()
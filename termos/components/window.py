@@ -11,11 +11,13 @@ from textual.css.query import NoMatches
 from textual.geometry import Offset
 from textual.message import Message
 from textual.reactive import reactive, Reactive, var
+from textual.timer import Timer
 from textual.widget import Widget
 from textual.widgets import Label
 
 if TYPE_CHECKING:
     from termos.apps import OSApp
+    from termos.termos import TermOS
 
 
 class TitleBarButton(Widget):
@@ -65,10 +67,18 @@ class TitleBar(HorizontalGroup):
 
 
 class Window(Container):
+    DRAG_FRAME_RATE = 60
+    """Maximum number of times per second the window moves while being dragged."""
+    LOW_BANDWIDTH_DRAG_FRAME_RATE = 10
+    """As `DRAG_FRAME_RATE`, while TermOS is in low bandwidth mode."""
+
+    app: TermOS
+
     title: var[str | None] = var(str)
     icon: var[str | None] = var(str)
-    minimised = var(bool)
-    maximised = var(bool)
+    # Not run on mount, so mounting a window doesn't raise it above windows mounted after it
+    minimised = var(False, init=False)
+    maximised = var(False, init=False)
     width: var[int | str] = var('auto')
     height: var[int | str] = var('auto')
     offset: var[tuple[int, int]] = var((0, 0))
@@ -93,6 +103,11 @@ class Window(Container):
             super().__init__()
             self.window = window
 
+    class Moved(Message):
+        def __init__(self, window: Window) -> None:
+            super().__init__()
+            self.window = window
+
     class Closed(Message):
         def __init__(self, window: Window) -> None:
             super().__init__()
@@ -107,23 +122,34 @@ class Window(Container):
         icon: str | None = None,
         width: int | str = 'auto',
         height: int | str = 'auto',
+        offset: tuple[int, int] = (0, 0),
+        maximised: bool = False,
     ) -> None:
         super().__init__(classes=classes)
         self.mouse_at_drag_start: Offset | None = None
         self.offset_at_drag_start: Offset | None = None
+        self.pending_drag_position: Offset | None = None
+        self.drag_timer: Timer | None = None
+        self.dragged = False
+        self.title_bar = TitleBar(title, icon)
         self.parent_app = parent_app
         self.content = content
         self.title = title
         self.icon = icon
         self.set_reactive(Window.width, width)
         self.set_reactive(Window.height, height)
+        self.set_reactive(Window.offset, offset)
+        self.start_maximised = maximised
 
     def compose(self) -> ComposeResult:
-        yield TitleBar(self.title, self.icon)
+        yield self.title_bar
         with Container(classes="window-body"):
             yield self.content
 
     def on_mount(self) -> None:
+        # Set quietly, as posting Maximised or Restored would save the geometry of every window opened
+        self.set_reactive(Window.maximised, self.start_maximised)
+        self.apply_geometry()
         self.post_message(Window.Created(self))
 
     def watch_minimised(self, new: bool) -> None:
@@ -136,18 +162,20 @@ class Window(Container):
 
     def watch_maximised(self, new: bool) -> None:
         self.minimised = False
+        self.apply_geometry()
+        self.post_message(self.Maximised(self) if new else self.Restored(self))
+
+    def apply_geometry(self) -> None:
         with suppress(NoMatches):
-            self.query_one('.window-maximise-button', TitleBarButton).maximised = new
-        if new:
+            self.query_one('.window-maximise-button', TitleBarButton).maximised = self.maximised
+        if self.maximised:
             self.styles.width = '100%'
             self.styles.height = '100%'
             self.styles.offset = (0, 0)
-            self.post_message(self.Maximised(self))
         else:
             self.styles.width = self.width
             self.styles.height = self.height
             self.styles.offset = self.offset
-            self.post_message(self.Restored(self))
 
     def watch_width(self, new: int | str) -> None:
         self.maximised = False
@@ -170,12 +198,14 @@ class Window(Container):
             self.post_message(self.Closed(self))
 
     def bring_to_front(self) -> None:
-        if self.parent.children[-1] is not self:
-            self.parent.move_child(self, after=self.parent.children[-1])
+        self.parent_app.os.window_manager.raise_window(self)
 
     def on_focus(self) -> None:
         self.bring_to_front()
 
+    def on_descendant_focus(self) -> None:
+        self.bring_to_front()
+
     def on_mouse_down(self, event: events.MouseDown) -> None:
         self.bring_to_front()
 
@@ -185,7 +215,9 @@ class Window(Container):
 
         # continue only if mouse down on title bar
         widget, _ = self.screen.get_widget_at(*event.screen_offset)
-        if widget not in self.query('TitleBar, TitleBar Label'):
+        if widget is not self.title_bar and not (
+            isinstance(widget, Label) and widget.parent is self.title_bar
+        ):
             return
 
         self.focus()
@@ -198,27 +230,52 @@ class Window(Container):
         )
         self.capture_mouse()
         self.can_focus = False
+        frame_rate = self.LOW_BANDWIDTH_DRAG_FRAME_RATE if self.app.low_bandwidth else self.DRAG_FRAME_RATE
+        # a second mouse down without a mouse up, e.g. after losing the capture, starts a new drag
+        if self.drag_timer is not None:
+            self.drag_timer.stop()
+        self.drag_timer = self.set_interval(1 / frame_rate, self.apply_drag)
+        self.dragged = False
 
     def on_mouse_move(self, event: events.MouseMove) -> None:
+        # only remember the latest position; the drag timer applies it at most once per frame
+        if self.mouse_at_drag_start is not None:
+            self.pending_drag_position = event.screen_offset
+
+    def apply_drag(self) -> None:
+        position = self.pending_drag_position
         if (
-            self.mouse_at_drag_start is not None
-            and self.offset_at_drag_start is not None
+            position is None
+            or self.mouse_at_drag_start is None
+            or self.offset_at_drag_start is None
         ):
-            # adjust window position when snapping out of maximised mode
-            if self.maximised:
-                x_ratio = event.screen_x / self.screen.size.width
-                x_offset = x_ratio * self.size.width
-                self.offset_at_drag_start = Offset(
-                    int(event.screen_x - x_offset),
-                    self.offset_at_drag_start.y,
-                )
-
-            self.offset = (
-                self.offset_at_drag_start.x + event.screen_x - self.mouse_at_drag_start.x,
-                self.offset_at_drag_start.y + event.screen_y - self.mouse_at_drag_start.y,
+            return
+        self.pending_drag_position = None
+
+        # adjust window position when snapping out of maximised mode
+        if self.maximised:
+            x_ratio = position.x / self.screen.size.width
+            x_offset = x_ratio * self.size.width
+            self.offset_at_drag_start = Offset(
+                int(position.x - x_offset),
+                self.offset_at_drag_start.y,
             )
 
+        self.offset = (
+            self.offset_at_drag_start.x + position.x - self.mouse_at_drag_start.x,
+            self.offset_at_drag_start.y + position.y - self.mouse_at_drag_start.y,
+        )
+        self.dragged = True
+
     def on_mouse_up(self) -> None:
+        if self.drag_timer is not None:
+            self.drag_timer.stop()
+            self.drag_timer = None
+            self.apply_drag()
+        # once per drag, not every frame, as it saves the window's position
+        if self.dragged:
+            self.dragged = False
+            self.post_message(self.Moved(self))
         self.mouse_at_drag_start = None
         self.offset_at_drag_start = None
         self.remove_class('dragging')
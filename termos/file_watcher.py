@@ -0,0 +1,275 @@
+from __future__ import annotations
+
+import asyncio
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+from collections import defaultdict
+from pathlib import Path
+from typing import Callable, NamedTuple
+
+POLL_INTERVAL = 1.0
+"""Seconds between directory scans when inotify isn't available."""
+
+# Flags from <sys/inotify.h>
+IN_ATTRIB = 0x4
+IN_CLOSE_WRITE = 0x8
+IN_MOVED_FROM = 0x40
+IN_MOVED_TO = 0x80
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_Q_OVERFLOW = 0x4000
+IN_IGNORED = 0x8000
+IN_ISDIR = 0x40000000
+WATCH_MASK = IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+EVENT_HEADER = struct.Struct('iIII')
+
+
+class Change(NamedTuple):
+    """One change to a watched folder.
+
+    `kind` is 'added', 'modified', 'removed' or 'renamed' (from `old_path`), or 'rescan' when
+    events were lost and the folder at `path` should be read again. `stat` is set for files
+    which exist.
+    """
+
+    kind: str
+    path: Path
+    stat: os.stat_result | None = None
+    old_path: Path | None = None
+
+
+ChangeCallback = Callable[[list[Change]], None]
+
+
+def _stat(path: Path) -> os.stat_result | None:
+    try:
+        return path.stat()
+    except OSError:
+        return None
+
+
+def _load_inotify() -> ctypes.CDLL | None:
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        libc.inotify_init1, libc.inotify_add_watch, libc.inotify_rm_watch
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+class FileWatcher:
+    """Reports files added, changed, renamed and removed in watched folders.
+
+    Uses inotify where it's available, and otherwise compares directory listings every
+    `POLL_INTERVAL` seconds. Changes are read on a background thread and callbacks are run on
+    the event loop which called `watch`, with every change read at once batched together.
+    """
+
+    def __init__(self) -> None:
+        self._callbacks: defaultdict[Path, list[ChangeCallback]] = defaultdict(list)
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+        self._wake_read, self._wake_write = -1, -1
+
+        self._libc = _load_inotify()
+        self._fd = -1
+        self._watch_descriptors: dict[int, Path] = {}
+        self._snapshots: dict[Path, dict[str, tuple[int, int]]] = {}
+        self._folder_mtimes: dict[Path, int | None] = {}
+
+    @property
+    def uses_inotify(self) -> bool:
+        return self._libc is not None
+
+    def watch(self, folder: Path, callback: ChangeCallback) -> None:
+        """Call `callback` with the changes in `folder` until `unwatch` is called. Must be called from the event loop."""
+        self._loop = asyncio.get_running_loop()
+        with self._lock:
+            new_folder = folder not in self._callbacks
+            self._callbacks[folder].append(callback)
+        if new_folder:
+            self._start()
+            self._add_watch(folder)
+
+    def unwatch(self, folder: Path, callback: ChangeCallback) -> None:
+        with self._lock:
+            callbacks = self._callbacks.get(folder, [])
+            if callback in callbacks:
+                callbacks.remove(callback)
+            if callbacks:
+                return
+            self._callbacks.pop(folder, None)
+            self._snapshots.pop(folder, None)
+            self._folder_mtimes.pop(folder, None)
+            descriptors = [wd for wd, path in self._watch_descriptors.items() if path == folder]
+        for wd in descriptors:
+            self._libc.inotify_rm_watch(self._fd, wd)
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        os.write(self._wake_write, b'\0')
+        self._thread.join()
+        self._thread = None
+        for fd in (self._fd, self._wake_read, self._wake_write):
+            if fd >= 0:
+                os.close(fd)
+        self._fd = self._wake_read = self._wake_write = -1
+        with self._lock:
+            self._watch_descriptors.clear()
+            self._snapshots.clear()
+            self._folder_mtimes.clear()
+
+    def _start(self) -> None:
+        if self._thread is not None:
+            return
+        if self._libc is not None:
+            self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+            if self._fd < 0:
+                self._libc = None
+        self._stop.clear()
+        self._wake_read, self._wake_write = os.pipe()
+        target = self._read_inotify if self._libc is not None else self._poll
+        self._thread = threading.Thread(target=target, name='file-watcher', daemon=True)
+        self._thread.start()
+
+    def _add_watch(self, folder: Path) -> None:
+        if self._libc is None:
+            # The polling thread takes its first snapshot straight away, and asks for a rescan if
+            # the folder's entries changed before then
+            stat = _stat(folder)
+            with self._lock:
+                self._folder_mtimes[folder] = stat.st_mtime_ns if stat else None
+            os.write(self._wake_write, b'\0')
+            return
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(folder), WATCH_MASK)
+        if wd >= 0:
+            with self._lock:
+                self._watch_descriptors[wd] = folder
+
+    def _dispatch(self, changes: list[Change]) -> None:
+        by_folder: defaultdict[Path, list[Change]] = defaultdict(list)
+        for change in changes:
+            by_folder[change.path if change.kind == 'rescan' else change.path.parent].append(change)
+            if change.old_path is not None and change.old_path.parent != change.path.parent:
+                by_folder[change.old_path.parent].append(change)
+
+        with self._lock:
+            calls = [
+                (callback, folder_changes)
+                for folder, folder_changes in by_folder.items()
+                for callback in self._callbacks.get(folder, ())
+            ]
+        for callback, folder_changes in calls:
+            try:
+                self._loop.call_soon_threadsafe(callback, folder_changes)
+            except RuntimeError:
+                pass  # the event loop has closed
+
+    def _read_inotify(self) -> None:
+        while True:
+            select.select([self._fd, self._wake_read], [], [])
+            if self._stop.is_set():
+                return
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                continue
+            self._dispatch(self._parse_events(data))
+
+    def _parse_events(self, data: bytes) -> list[Change]:
+        changes: list[Change] = []
+        moves: dict[int, Path] = {}
+        offset = 0
+        while offset < len(data):
+            wd, mask, cookie, length = EVENT_HEADER.unpack_from(data, offset)
+            name = data[offset + EVENT_HEADER.size:offset + EVENT_HEADER.size + length].rstrip(b'\0')
+            offset += EVENT_HEADER.size + length
+
+            if mask & IN_Q_OVERFLOW:
+                with self._lock:
+                    folders = [*self._callbacks]
+                changes.extend(Change('rescan', folder) for folder in folders)
+                continue
+            with self._lock:
+                folder = self._watch_descriptors.get(wd)
+                if mask & IN_IGNORED:
+                    self._watch_descriptors.pop(wd, None)
+            if folder is None or not name or mask & IN_ISDIR:
+                continue
+
+            path = folder / os.fsdecode(name)
+            if mask & IN_MOVED_FROM:
+                moves[cookie] = path
+            elif mask & IN_MOVED_TO and cookie in moves:
+                changes.append(Change('renamed', path, _stat(path), moves.pop(cookie)))
+            elif mask & (IN_CREATE | IN_MOVED_TO):
+                changes.append(Change('added', path, _stat(path)))
+            elif mask & (IN_CLOSE_WRITE | IN_ATTRIB):
+                changes.append(Change('modified', path, _stat(path)))
+            elif mask & IN_DELETE:
+                changes.append(Change('removed', path))
+
+        # Moved to somewhere that isn't watched
+        changes.extend(Change('removed', path) for path in moves.values())
+        return changes
+
+    def _poll(self) -> None:
+        while True:
+            with self._lock:
+                folders = [*self._callbacks]
+            changes = []
+            for folder in folders:
+                changes.extend(self._poll_folder(folder))
+            if changes:
+                self._dispatch(changes)
+            readable, _, _ = select.select([self._wake_read], [], [], POLL_INTERVAL)
+            if self._stop.is_set():
+                return
+            if readable:
+                os.read(self._wake_read, 1024)
+
+    def _poll_folder(self, folder: Path) -> list[Change]:
+        snapshot = {}
+        try:
+            with os.scandir(folder) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_file():
+                            stat = entry.stat()
+                            snapshot[entry.name] = (stat.st_mtime_ns, stat.st_size)
+                    except OSError:
+                        continue
+        except OSError:
+            pass
+
+        with self._lock:
+            previous = self._snapshots.get(folder)
+            if folder in self._callbacks:
+                self._snapshots[folder] = snapshot
+            watched_mtime = self._folder_mtimes.pop(folder, None)
+        if previous is None:
+            stat = _stat(folder)
+            if stat is not None and stat.st_mtime_ns != watched_mtime:
+                return [Change('rescan', folder)]
+            return []
+
+        changes = []
+        for name, signature in snapshot.items():
+            if name not in previous:
+                changes.append(Change('added', folder / name, _stat(folder / name)))
+            elif previous[name] != signature:
+                changes.append(Change('modified', folder / name, _stat(folder / name)))
+        changes.extend(Change('removed', folder / name) for name in previous.keys() - snapshot.keys())
+        return changes
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import asyncio
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from importlib.util import find_spec
+from typing import Any, AsyncGenerator, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import httpx
+
+
+class TrafficStats:
+    def __init__(self) -> None:
+        self.requests = 0
+        self.bytes_received = 0
+
+    def __repr__(self) -> str:
+        return f'TrafficStats(requests={self.requests}, bytes_received={self.bytes_received})'
+
+
+class NetworkService:
+    """A single pooled HTTP client which every app borrows, instead of each opening its own.
+
+    Connections are kept alive and (when `h2` is installed) multiplexed over HTTP/2, so windows
+    talking to the same host share handshakes. Requests are limited globally and per host, and
+    the bytes received are accounted per host and per app. httpx is only imported once the
+    first request is made, to keep it out of startup.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 64,
+        max_requests_per_host: int = 6,
+        max_concurrent_requests: int = 32,
+    ) -> None:
+        self.max_connections = max_connections
+        self.max_requests_per_host = max_requests_per_host
+        self.total = TrafficStats()
+        self.by_host: defaultdict[str, TrafficStats] = defaultdict(TrafficStats)
+        self.by_app: defaultdict[str, TrafficStats] = defaultdict(TrafficStats)
+        self._client: httpx.AsyncClient | None = None
+        self._requests = asyncio.Semaphore(max_concurrent_requests)
+        self._host_requests: defaultdict[str, asyncio.Semaphore] = defaultdict(
+            lambda: asyncio.Semaphore(max_requests_per_host)
+        )
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            import httpx
+
+            self._client = httpx.AsyncClient(
+                http2=find_spec('h2') is not None,
+                follow_redirects=True,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                    keepalive_expiry=30,
+                ),
+            )
+        return self._client
+
+    @asynccontextmanager
+    async def stream(
+        self, method: str, url: str, app: str | None = None, **kwargs: Any
+    ) -> AsyncGenerator[httpx.Response, None]:
+        """Like `httpx.AsyncClient.stream`, waiting for a free slot for the host first."""
+        client = self.client
+        host = client.build_request(method, url).url.host
+        async with self._requests, self._host_requests[host]:
+            async with client.stream(method, url, **kwargs) as response:
+                try:
+                    yield response
+                finally:
+                    self._account(host, app, response.num_bytes_downloaded)
+
+    async def request(self, method: str, url: str, app: str | None = None, **kwargs: Any) -> httpx.Response:
+        async with self.stream(method, url, app, **kwargs) as response:
+            await response.aread()
+        return response
+
+    def _account(self, host: str, app: str | None, size: int) -> None:
+        stats = [self.total, self.by_host[host]]
+        if app is not None:
+            stats.append(self.by_app[app])
+        for stat in stats:
+            stat.requests += 1
+            stat.bytes_received += size
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
@@ -0,0 +1,39 @@
+import os
+import tempfile
+from pathlib import Path
+
+
+def cache_dir() -> Path:
+    """Directory for data which TermOS can regenerate, such as the app manifest."""
+    path = Path(os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache') / 'termos'
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def termos_folders() -> list[Path]:
+    """The folders users keep their files in, the main folder and the Bin, created if missing."""
+    # TEMP is usually only set on Windows
+    root = Path(os.environ.get('TEMP') or tempfile.gettempdir()) / 'TermOS'
+    folders = [root / 'mainFolder', root / 'Bin']
+    for folder in folders:
+        folder.mkdir(parents=True, exist_ok=True)
+    return folders
+
+
+def state_dir() -> Path:
+    """Directory for data TermOS can't regenerate but users don't manage, such as unsaved work."""
+    path = Path(os.environ.get('XDG_STATE_HOME') or Path.home() / '.local' / 'state') / 'termos'
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def recovery_dir(app_name: str) -> Path:
+    """Where an app keeps what it needs to reopen unsaved work after TermOS stops unexpectedly."""
+    return state_dir() / 'recovery' / app_name
+
+
+def config_dir() -> Path:
+    """Directory for the user's settings."""
+    path = Path(os.environ.get('XDG_CONFIG_HOME') or Path.home() / '.config') / 'termos'
+    path.mkdir(parents=True, exist_ok=True)
+    return path
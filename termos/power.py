@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+from time import monotonic
+from typing import TYPE_CHECKING
+
+from termos.settings import IDLE_TIMEOUT
+
+if TYPE_CHECKING:
+    from textual.timer import Timer
+
+    from termos.termos import TermOS
+
+
+class IdleMonitor:
+    """Switches TermOS to low power mode once no input has arrived for the `IDLE_TIMEOUT` setting.
+
+    Input only records the time, so a stream of mouse moves costs nothing extra. A single timer
+    is due when the timeout would end, and checks whether there was input since. The first
+    input in low power mode switches back.
+    """
+
+    def __init__(self, os: TermOS) -> None:
+        self.os = os
+        self.last_input = monotonic()
+        self._timer: Timer | None = None
+
+    def start(self) -> None:
+        self._arm(self.os.settings.get(IDLE_TIMEOUT))
+
+    def input(self) -> None:
+        self.last_input = monotonic()
+        if self.os.low_power:
+            self.os.low_power = False
+            self._arm(self.os.settings.get(IDLE_TIMEOUT))
+
+    def _arm(self, delay: float) -> None:
+        if self._timer is not None:
+            self._timer.stop()
+            self._timer = None
+        if self.os.settings.get(IDLE_TIMEOUT) > 0:
+            self._timer = self.os.set_timer(delay, self._check)
+
+    def _check(self) -> None:
+        self._timer = None
+        timeout = self.os.settings.get(IDLE_TIMEOUT)
+        idle = monotonic() - self.last_input
+        if timeout <= 0:
+            return
+        if idle >= timeout:
+            self.os.low_power = True
+        else:
+            self._arm(timeout - idle)
@@ -0,0 +1,346 @@
+from __future__ import annotations
+
+import builtins
+import json
+import os
+import sys
+import threading
+from collections import Counter, deque
+from contextlib import contextmanager
+from pathlib import Path
+from time import perf_counter
+from typing import Any, Callable, Generator, NamedTuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from textual.app import App
+    from textual.widget import Widget
+
+MAX_TRACE_EVENTS = 200_000
+"""Events kept for a trace, after which the oldest are dropped."""
+TOP_WIDGETS = 5
+
+
+class Span:
+    """A timed phase of startup. Spans nest, forming the tree shown in the summary."""
+
+    def __init__(self, name: str, start: float) -> None:
+        self.name = name
+        self.start = start
+        self.end: float | None = None
+        self.import_time = 0.0
+        self.modules_imported = 0
+        self.children: list[Span] = []
+
+    @property
+    def duration(self) -> float:
+        return (self.end if self.end is not None else perf_counter()) - self.start
+
+    def to_dict(self, origin: float) -> dict[str, Any]:
+        return {
+            'name': self.name,
+            'start_ms': round((self.start - origin) * 1000, 3),
+            'duration_ms': round(self.duration * 1000, 3),
+            'import_ms': round(self.import_time * 1000, 3),
+            'modules_imported': self.modules_imported,
+            'children': [child.to_dict(origin) for child in self.children],
+        }
+
+
+class StartupTracer:
+    """Records wall-clock and import time for each phase between `main()` and the first paint.
+
+    The tracer does nothing until `enable` is called, so the hooks scattered through startup
+    cost a single attribute check in normal runs.
+    """
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.root = Span('startup', perf_counter())
+        self._stack = [self.root]
+        self._import_depth = 0
+        self._thread_id = threading.get_ident()
+        self._original_import = builtins.__import__
+
+    def enable(self) -> None:
+        self.enabled = True
+        self.root = Span('startup', perf_counter())
+        self._stack = [self.root]
+        self._thread_id = threading.get_ident()
+        self._original_import = builtins.__import__
+        builtins.__import__ = self._timed_import
+
+    def finish(self) -> None:
+        if not self.enabled:
+            return
+        self.root.end = perf_counter()
+        builtins.__import__ = self._original_import
+        self.enabled = False
+
+    def _timed_import(self, name, *args, **kwargs):
+        # Only the outermost import is timed, so nested imports aren't counted twice
+        if self._import_depth or threading.get_ident() != self._thread_id:
+            return self._original_import(name, *args, **kwargs)
+
+        span = self._stack[-1]
+        modules_before = len(sys.modules)
+        self._import_depth += 1
+        start = perf_counter()
+        try:
+            return self._original_import(name, *args, **kwargs)
+        finally:
+            span.import_time += perf_counter() - start
+            span.modules_imported += len(sys.modules) - modules_before
+            self._import_depth -= 1
+
+    def begin(self, name: str) -> Span:
+        span = Span(name, perf_counter())
+        self._stack[-1].children.append(span)
+        return span
+
+    @staticmethod
+    def end(span: Span) -> None:
+        span.end = perf_counter()
+
+    @contextmanager
+    def phase(self, name: str) -> Generator[None, None, None]:
+        if not self.enabled:
+            yield
+            return
+
+        span = self.begin(name)
+        self._stack.append(span)
+        try:
+            yield
+        finally:
+            self._stack.pop()
+            self.end(span)
+            # Imports made inside a phase also count towards every enclosing phase
+            self._stack[-1].import_time += span.import_time
+            self._stack[-1].modules_imported += span.modules_imported
+
+    def wrap(self, name: str, function: Callable) -> Callable:
+        def wrapper(*args, **kwargs):
+            with self.phase(name):
+                return function(*args, **kwargs)
+        return wrapper
+
+    def track_mount(self, widget: Widget) -> Widget:
+        """Time a widget from its creation until it (and its children) have been mounted."""
+        if self.enabled:
+            span = self.begin(f'mount {type(widget).__name__}')
+            # Compose and Mount are dispatched before the message queue is read,
+            # so this callback runs as soon as the widget has finished mounting
+            widget.call_later(self.end, span)
+        return widget
+
+    def report(self) -> dict[str, Any]:
+        return {
+            'python': sys.version.split()[0],
+            'total_ms': round(self.root.duration * 1000, 3),
+            'phases': self.root.to_dict(self.root.start),
+        }
+
+    def dump(self, path: Path) -> None:
+        path.write_text(json.dumps(self.report(), indent=2), encoding='utf-8')
+
+    def summary(self, width: int = 30) -> str:
+        """Render the phases as an indented flame graph, merging sibling spans with the same name."""
+        total = self.root.duration or 1
+        lines = []
+
+        def visit(spans: list[Span], depth: int) -> None:
+            duration = sum(span.duration for span in spans)
+            import_time = sum(span.import_time for span in spans)
+            modules = sum(span.modules_imported for span in spans)
+            label = '  ' * depth + spans[0].name
+            if len(spans) > 1:
+                label += f' (×{len(spans)})'
+            bar = '█' * max(1, round(duration / total * width))
+            lines.append(
+                f'{label:<40} {duration * 1000:>9.1f} ms'
+                f'  imports {import_time * 1000:>8.1f} ms ({modules:>4} modules)'
+                f'  {bar}'
+            )
+
+            groups: dict[str, list[Span]] = {}
+            for span in spans:
+                for child in span.children:
+                    groups.setdefault(child.name, []).append(child)
+            for group in groups.values():
+                visit(group, depth + 1)
+
+        visit([self.root], 0)
+        return '\n'.join(lines)
+
+
+tracer = StartupTracer()
+
+
+class RenderStats(NamedTuple):
+    frame_ms: float
+    """The mean time taken to lay out and render an update to the screen."""
+    max_frame_ms: float
+    updates_per_second: float
+    dirty_cells: float
+    """The mean number of cells each update changed."""
+    render_ms: list[tuple[str, float]]
+    """The widgets which took longest to render, with the time they took in total."""
+    layout_ms: list[tuple[str, float]]
+    """The widgets which took longest to arrange their children, with the time they took in total."""
+
+
+def _widget_name(widget: Widget) -> str:
+    return f'{type(widget).__name__}#{widget.id}' if widget.id else type(widget).__name__
+
+
+def _cells(update: Any) -> int:
+    # A full `LayoutUpdate` has a region, a partial `ChopsUpdate` has spans of lines,
+    # and remote mode's `ChangedLines` has the segments which changed
+    region = getattr(update, 'region', None)
+    if region is not None:
+        return region.area
+    if hasattr(update, 'changes'):
+        return sum(segment.cell_length for _, _, segments in update.changes for segment in segments)
+    return sum(x2 - x1 for _, x1, x2 in getattr(update, 'spans', ()))
+
+
+def _classes_defining(cls: type, name: str) -> Generator[type, None, None]:
+    if name in vars(cls):
+        yield cls
+    for subclass in cls.__subclasses__():
+        yield from _classes_defining(subclass, name)
+
+
+class RenderProfiler:
+    """Times screen updates, and the widgets rendered and arranged for them, while enabled.
+
+    Enabling wraps the screen methods producing updates and every `render_lines` and
+    `arrange` (`_arrange` in older Textual) of the widget classes, so nothing is paid while
+    it's off. Each call is summed for `stats` and kept as a Chrome trace event for `export`.
+    """
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.events: deque[dict[str, Any]] = deque(maxlen=MAX_TRACE_EVENTS)
+        self._origin = perf_counter()
+        self._restore: list[Callable[[], None]] = []
+        self._timing: set[Widget] = set()
+        self._ignored: Widget | None = None
+        self._update_cells: int | None = None
+        self._reset_stats()
+
+    def _reset_stats(self) -> None:
+        self._stats_start = perf_counter()
+        self._frames: list[tuple[float, int]] = []
+        self._widget_time: dict[str, Counter[str]] = {'render': Counter(), 'layout': Counter()}
+
+    def enable(self, app: App, ignore: Widget | None = None) -> None:
+        """Start recording, leaving `ignore`, such as the widget showing the stats, out of the widget timings."""
+        from textual.widget import Widget
+
+        if self.enabled:
+            return
+        self.enabled = True
+        self._ignored = ignore
+        self._reset_stats()
+        self._patch(app, '_display', self._wrap_display)
+        for name in ('_refresh_layout', '_compositor_refresh'):
+            self._patch(app.screen, name, self._wrap_update)
+        for cls in _classes_defining(Widget, 'render_lines'):
+            self._patch(cls, 'render_lines', lambda function: self._wrap_widget(function, 'render'))
+        arrange = 'arrange' if 'arrange' in vars(Widget) else '_arrange'
+        for cls in _classes_defining(Widget, arrange):
+            self._patch(cls, arrange, lambda function: self._wrap_widget(function, 'layout'))
+
+    def disable(self) -> None:
+        for restore in reversed(self._restore):
+            restore()
+        self._restore.clear()
+        self._ignored = None
+        self.enabled = False
+
+    def _patch(self, owner: Any, name: str, wrap: Callable[[Callable], Callable]) -> None:
+        original = vars(owner).get(name)
+        setattr(owner, name, wrap(getattr(owner, name)))
+        if original is None:
+            # A method of the instance's class
+            self._restore.append(lambda: delattr(owner, name))
+        else:
+            self._restore.append(lambda: setattr(owner, name, original))
+
+    def _event(self, name: str, category: str, start: float, end: float, **args: Any) -> None:
+        self.events.append({
+            'name': name,
+            'cat': category,
+            'ph': 'X',
+            'ts': round((start - self._origin) * 1_000_000, 3),
+            'dur': round((end - start) * 1_000_000, 3),
+            'pid': os.getpid(),
+            'tid': threading.get_ident(),
+            'args': args,
+        })
+
+    def _wrap_display(self, function: Callable) -> Callable:
+        def display(screen, update) -> None:
+            if update is not None:
+                self._update_cells = (self._update_cells or 0) + _cells(update)
+            function(screen, update)
+        return display
+
+    def _wrap_update(self, function: Callable) -> Callable:
+        name = function.__name__.strip('_').replace('_', ' ')
+
+        def update(*args, **kwargs):
+            self._update_cells = None
+            start = perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                end = perf_counter()
+                cells = self._update_cells
+                self._event(name, 'update', start, end, cells=cells or 0)
+                if cells is not None:
+                    self._frames.append((end - start, cells))
+        return update
+
+    def _wrap_widget(self, function: Callable, category: str) -> Callable:
+        def timed(widget: Widget, *args, **kwargs):
+            # Overrides calling the method they override are timed once
+            if widget in self._timing or widget is self._ignored:
+                return function(widget, *args, **kwargs)
+            self._timing.add(widget)
+            start = perf_counter()
+            try:
+                return function(widget, *args, **kwargs)
+            finally:
+                end = perf_counter()
+                self._timing.discard(widget)
+                name = _widget_name(widget)
+                self._widget_time[category][name] += end - start
+                self._event(f'{category} {name}', category, start, end)
+        return timed
+
+    def stats(self) -> RenderStats:
+        """Summarise the updates since the last call."""
+        elapsed = max(perf_counter() - self._stats_start, 1e-9)
+        durations = [duration for duration, _ in self._frames]
+        count = len(self._frames)
+        stats = RenderStats(
+            frame_ms=sum(durations) / count * 1000 if count else 0.0,
+            max_frame_ms=max(durations, default=0.0) * 1000,
+            updates_per_second=count / elapsed,
+            dirty_cells=sum(cells for _, cells in self._frames) / count if count else 0.0,
+            render_ms=[(name, time * 1000) for name, time in self._widget_time['render'].most_common(TOP_WIDGETS)],
+            layout_ms=[(name, time * 1000) for name, time in self._widget_time['layout'].most_common(TOP_WIDGETS)],
+        )
+        self._reset_stats()
+        return stats
+
+    def export(self, path: Path) -> int:
+        """Write the events recorded in Chrome's trace format, returning how many there were."""
+        events = [*self.events]
+        path.write_text(json.dumps({'traceEvents': events, 'displayTimeUnit': 'ms'}), encoding='utf-8')
+        return len(events)
+
+
+render_profiler = RenderProfiler()
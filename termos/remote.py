@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+from os import environ
+from time import monotonic
+from typing import TYPE_CHECKING
+
+from rich.control import Control
+from rich.segment import Segment
+from textual._compositor import CompositorUpdate
+from textual.strip import Strip
+
+from termos.settings import REMOTE_BYTE_BUDGET
+
+if TYPE_CHECKING:
+    from rich.console import Console, ConsoleOptions, RenderableType, RenderResult
+    from textual.screen import Screen
+    from textual.timer import Timer
+
+    from termos.termos import TermOS
+
+RECOVERY_TIME = 5.0
+"""Seconds output must stay within budget before TermOS leaves low bandwidth mode."""
+
+
+def is_ssh_session() -> bool:
+    return 'SSH_CONNECTION' in environ or 'SSH_TTY' in environ
+
+
+def changed_span(old: list[Segment], new: list[Segment]) -> tuple[int, int, int] | None:
+    """The cell where `new` starts to differ from `old`, and the range of its segments which do, or None if none do.
+
+    Both are lines the width of the screen, so segments after the change line up from the right.
+    """
+    if old == new:
+        return None
+    start = x = 0
+    while start < min(len(old), len(new)) and old[start] == new[start]:
+        x += new[start].cell_length
+        start += 1
+    end, old_end = len(new), len(old)
+    while end > start and old_end > start and old[old_end - 1] == new[end - 1]:
+        end -= 1
+        old_end -= 1
+    return (x, start, end) if end > start else None
+
+
+class ChangedLines(CompositorUpdate):
+    """The parts of lines which differ from what the terminal shows, each as `(y, x, segments)`."""
+
+    def __init__(self, changes: list[tuple[int, int, list[Segment]]]) -> None:
+        self.changes = changes
+
+    def __rich_console__(self, console: Console, options: ConsoleOptions) -> RenderResult:
+        for y, x, segments in self.changes:
+            yield Control.move_to(x, y).segment
+            yield from segments
+
+    def render_segments(self, console: Console) -> str:
+        move_to = Control.move_to
+        return ''.join(
+            move_to(x, y).segment.text + Strip(segments).render(console) for y, x, segments in self.changes
+        )
+
+
+class RemoteOutput:
+    """Counts the bytes TermOS writes to the terminal and, in remote mode, keeps them few.
+
+    Counting is always on, for the performance overlay's bytes per second. Remote mode is on by
+    default over SSH. Each update Textual would send is replaced by just the parts of lines which
+    differ from those last sent, however small the change that caused it. Output also stays within
+    the `REMOTE_BYTE_BUDGET` setting: an update while over budget is held back, with any after it
+    merged in, until the budget allows it. Holding one back sets TermOS's `low_bandwidth`, which
+    turns off animations and drags windows at a lower frame rate, until `RECOVERY_TIME` passes
+    without any held back.
+    """
+
+    def __init__(self, os: TermOS, enabled: bool) -> None:
+        self.os = os
+        self.enabled = enabled
+        self.bytes_written = 0
+        """Bytes written to the terminal since TermOS started."""
+        self.frames_written = 0
+        self._lines: list[list[Segment]] = []
+        """What the terminal shows, as the segments of each line."""
+        self._allowance = float(os.settings.get(REMOTE_BYTE_BUDGET))
+        self._refilled = monotonic()
+        self._last_held = 0.0
+        self._flush_timer: Timer | None = None
+
+    def attach(self) -> None:
+        """Count what the driver writes from now on."""
+        driver = self.os._driver
+        if driver is None:
+            return
+        write = driver.write
+
+        def counted_write(data: str) -> None:
+            size = len(data.encode('utf-8', 'replace'))
+            self.bytes_written += size
+            self._allowance -= size
+            write(data)
+
+        driver.write = counted_write
+
+    def invalidate(self) -> None:
+        """Forget what the terminal shows, so the next update sends every line, e.g. after a resize."""
+        self._lines = []
+
+    def prepare(self, screen: Screen, renderable: RenderableType) -> RenderableType | None:
+        """What to write for `screen`'s update `renderable`, or None to write nothing for now."""
+        if self.enabled and isinstance(renderable, CompositorUpdate):
+            renderable = self._changed_lines(screen)
+        if renderable is not None:
+            self.frames_written += 1
+        return renderable
+
+    def _changed_lines(self, screen: Screen) -> ChangedLines | None:
+        now = monotonic()
+        budget = self.os.settings.get(REMOTE_BYTE_BUDGET)
+        if budget > 0:
+            self._allowance = min(budget, self._allowance + (now - self._refilled) * budget)
+            self._refilled = now
+            if self._allowance < 0:
+                self._hold(-self._allowance / budget)
+                return None
+        if self.os.low_bandwidth and now - self._last_held > RECOVERY_TIME:
+            self.os.low_bandwidth = False
+
+        full = screen._compositor.render_update(full=True, screen_stack=self.os._background_screens)
+        # Each line is a strip in older Textual, and the strips of its chops in newer
+        lines: list[list[Segment]] = [
+            [*(line if isinstance(line, Strip) else Strip.join(line))] for line in full.strips
+        ]
+        if len(lines) != len(self._lines):
+            self._lines = [[] for _ in lines]
+        changes = []
+        for y, (old, new) in enumerate(zip(self._lines, lines), full.region.y):
+            span = changed_span(old, new)
+            if span is not None:
+                x, start, end = span
+                changes.append((y, x, new[start:end]))
+        self._lines = lines
+        return ChangedLines(changes) if changes else None
+
+    def _hold(self, delay: float) -> None:
+        self._last_held = monotonic()
+        self.os.low_bandwidth = True
+        if self._flush_timer is None:
+            self._flush_timer = self.os.set_timer(delay, self._flush)
+
+    def _flush(self) -> None:
+        self._flush_timer = None
+        # Repainting sends everything held back, as each update is diffed against the whole screen
+        self.os.screen.refresh()
@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any, TYPE_CHECKING
+
+from termos.components.taskbar import Taskbar
+from termos.components.window import Window
+
+if TYPE_CHECKING:
+    from termos.termos import TermOS
+
+
+class Session:
+    """Saves the open windows when TermOS exits and reopens them at the next boot.
+
+    Each window is saved with its app, geometry, place in the stacking order and whatever
+    its app's `window_state` returns. At boot the apps' `restore` reopen them, and while
+    they do `restoring` holds the window's entry, so `OSApp.create_window` hands the window
+    here rather than mounting it. Visible windows are then mounted bottom to top. Minimised
+    windows only get a taskbar tab, and are mounted when it is first clicked.
+
+    Headless, as under `run_test`, nothing is restored or saved, so tests start from an empty
+    desktop and leave the user's session alone.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.restoring: dict[str, Any] | None = None
+        """The entry of the window being restored, while an app's `restore` runs."""
+        self.deferred: dict[Window, dict[str, Any]] = {}
+        """Minimised windows which haven't been mounted yet, and their entries."""
+        self._created: list[Window] = []
+
+    def entries(self, os: TermOS, windows: list[Window]) -> list[dict[str, Any]]:
+        """What's needed to reopen `windows`, as they are now."""
+        stacking = {window: z for z, window in enumerate(os.window_manager.stacking_order)}
+        entries = []
+        for window in windows:
+            entry = self.deferred.get(window)
+            if entry is None:
+                app = window.parent_app
+                entry = {
+                    'app': [type(app).__module__, type(app).__name__],
+                    'offset': [*window.offset],
+                    'width': window.width,
+                    'height': window.height,
+                    'minimised': window.minimised,
+                    'maximised': window.maximised,
+                    'state': app.window_state(window),
+                }
+            entries.append({**entry, 'z': stacking.get(window, 0)})
+        return entries
+
+    def save(self, os: TermOS) -> None:
+        if os.is_headless:
+            return
+        entries = self.entries(os, os.window_manager.windows)
+        temporary = self.path.with_name(f'.{self.path.name}.tmp')
+        try:
+            temporary.write_text(json.dumps({'windows': entries}), encoding='utf-8')
+            temporary.replace(self.path)
+        except OSError as error:
+            os.notify(str(error), title="Couldn't save the open windows", severity='error')
+
+    def created(self, window: Window) -> None:
+        """Called by `OSApp.create_window` for each window made while `restoring`."""
+        self._created.append(window)
+
+    def restore(self, os: TermOS) -> None:
+        if os.is_headless:
+            return
+        try:
+            entries = json.loads(self.path.read_text(encoding='utf-8'))['windows']
+        except (OSError, ValueError, KeyError, TypeError):
+            return
+        self.reopen(os, entries)
+
+    def reopen(self, os: TermOS, entries: list[dict[str, Any]]) -> None:
+        """Reopen windows from their `entries`, above any already open."""
+        manifests = {(manifest.module, manifest.entry_point): manifest for manifest in os.os_apps}
+        restored: list[tuple[dict[str, Any], Window]] = []
+        for entry in entries:
+            manifest = manifests.get(tuple(entry['app']))
+            if manifest is None:
+                continue  # uninstalled since
+            self.restoring = entry
+            try:
+                manifest.load().restore(os, entry.get('state'))
+            finally:
+                self.restoring = None
+            restored.extend((entry, window) for window in self._created)
+            self._created.clear()
+
+        # Tabs in the order the windows were opened
+        taskbar = os.query_one(Taskbar)
+        for entry, window in restored:
+            if entry['minimised']:
+                window.set_reactive(Window.minimised, True)
+                self.deferred[window] = entry
+            os.window_manager.add(window)
+            taskbar.add_tab(window)
+
+        # Then the visible windows from the bottom up, so the last mounted is on top and focused
+        container = os.query_one('#window-container')
+        visible = sorted((entry['z'], number) for number, (entry, _) in enumerate(restored) if not entry['minimised'])
+        for _, number in visible:
+            window = restored[number][1]
+            container.mount(window)
+            os.window_manager.raise_window(window)
+        if visible:
+            window.focus()
+
+    async def show(self, os: TermOS, window: Window) -> None:
+        """Mount a minimised window from the last session, restoring it."""
+        del self.deferred[window]
+        await os.query_one('#window-container').mount(window)
+        # Raises and focuses it, and updates its tab
+        window.minimised = False
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import atexit
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Generic, NamedTuple, TypeVar
+
+T = TypeVar('T')
+
+WRITE_DELAY = 0.5
+"""Seconds without changes before they're written, so dragging a window writes the file once."""
+
+
+class Setting(NamedTuple, Generic[T]):
+    """A key in the settings store, and the value used when it's unset or not a `T`.
+
+    Apps define their own at module level, named `'<app>.<key>'`, e.g.
+    `WORD_WRAP = Setting('notepad.word_wrap', False)`. Values must be JSON serialisable,
+    and tuples come back as lists.
+    """
+
+    name: str
+    default: T
+
+
+THEME = Setting('theme', 'textual-dark')
+WINDOW_GEOMETRY: Setting[dict[str, Any]] = Setting('window_geometry', {})
+"""Where each app's windows open, keyed by app name: `{'offset': [x, y], 'maximised': bool}`."""
+IDLE_TIMEOUT = Setting('idle_timeout', 300)
+"""Seconds without input after which TermOS switches to low power mode, or 0 to never."""
+REMOTE_BYTE_BUDGET = Setting('remote_byte_budget', 65536)
+"""Bytes per second TermOS writes to the terminal at most in remote mode, or 0 for no limit."""
+
+
+class Settings:
+    """Settings read once from a JSON file, then served from memory.
+
+    `set` only updates memory. A background thread writes the file `WRITE_DELAY` after the last
+    change, to a temporary file which is renamed over the old one so a crash can't leave it
+    half written. Values are shared, so replace them rather than changing them in place.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._values = self._read()
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._changed = threading.Event()
+        self._version = 0
+        self._written_version = 0
+        self._thread: threading.Thread | None = None
+
+    def _read(self) -> dict[str, Any]:
+        try:
+            values = json.loads(self.path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return {}
+        return values if isinstance(values, dict) else {}
+
+    def get(self, setting: Setting[T]) -> T:
+        value = self._values.get(setting.name, setting.default)
+        return value if isinstance(value, type(setting.default)) else setting.default
+
+    def set(self, setting: Setting[T], value: T) -> None:
+        if self._values.get(setting.name) == value:
+            return
+        with self._lock:
+            self._values[setting.name] = value
+            self._version += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='settings-writer', daemon=True)
+                self._thread.start()
+                atexit.register(self.flush)
+        self._changed.set()
+
+    def flush(self) -> None:
+        """Write any unwritten changes now, e.g. before exiting."""
+        try:
+            self._write()
+        except OSError:
+            pass
+
+    def _run(self) -> None:
+        while True:
+            self._changed.wait()
+            # Wait for the changes to settle
+            while self._changed.is_set():
+                self._changed.clear()
+                time.sleep(WRITE_DELAY)
+            try:
+                self._write()
+            except OSError:
+                # Kept in memory, and tried again on the next change
+                pass
+
+    def _write(self) -> None:
+        with self._write_lock:
+            with self._lock:
+                version = self._version
+                if version == self._written_version:
+                    return
+                data = json.dumps(self._values, indent=2)
+            temporary = self.path.with_name(f'.{self.path.name}.tmp')
+            with temporary.open('w', encoding='utf-8') as file:
+                file.write(data)
+                file.flush()
+                os.fsync(file.fileno())
+            temporary.replace(self.path)
+            self._written_version = version
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import atexit
+import hashlib
+import json
+import pickle
+import threading
+from pathlib import Path
+
+import textual
+from textual.css.model import RuleSet
+from textual.css.stylesheet import Stylesheet
+
+from termos.paths import cache_dir
+
+CACHE_FOLDER = 'stylesheets'
+MAX_UNUSED_ENTRIES = 256
+"""Rules from sources no longer in use kept in a cache file, e.g. for apps not opened lately."""
+
+
+def _hash(value: object) -> str:
+    return hashlib.sha256(json.dumps(value).encode('utf-8', 'surrogatepass')).hexdigest()
+
+
+class RuleCache:
+    """Parsed CSS rules, kept on disk so CSS which hasn't changed is never parsed again.
+
+    Rules depend on the variables substituted into them, so each set of variables, which in
+    practice means each theme, has its own file. It maps a hash of a source's CSS and how it
+    was added to the stylesheet to its rules. A file is loaded the first time its variables
+    are used, and new rules are written back when TermOS exits.
+    """
+
+    def __init__(self) -> None:
+        self._rules: dict[str, dict[str, list[RuleSet]]] = {}
+        self._used: dict[str, set[str]] = {}
+        self._dirty: set[str] = set()
+        self._lock = threading.Lock()
+        self._registered = False
+
+    @staticmethod
+    def variables_key(variables: dict[str, str]) -> str:
+        # Rules are pickled, so they're only valid for the Textual version which made them
+        return _hash([textual.__version__, sorted(variables.items())])
+
+    def _path(self, variables_key: str) -> Path:
+        return cache_dir() / CACHE_FOLDER / f'{variables_key}.pickle'
+
+    def _load(self, variables_key: str) -> dict[str, list[RuleSet]]:
+        rules = self._rules.get(variables_key)
+        if rules is None:
+            try:
+                with self._path(variables_key).open('rb') as file:
+                    rules = pickle.load(file)
+            except Exception:
+                # Missing or unreadable, so it's rebuilt
+                rules = {}
+            self._rules[variables_key] = rules
+            self._used[variables_key] = set()
+        return rules
+
+    def get(self, variables_key: str, source_key: str) -> list[RuleSet] | None:
+        with self._lock:
+            rules = self._load(variables_key).get(source_key)
+            if rules is not None:
+                self._used[variables_key].add(source_key)
+            return rules
+
+    def put(self, variables_key: str, source_key: str, rules: list[RuleSet]) -> None:
+        with self._lock:
+            self._load(variables_key)[source_key] = rules
+            self._used[variables_key].add(source_key)
+            self._dirty.add(variables_key)
+            if not self._registered:
+                atexit.register(self.save)
+                self._registered = True
+
+    def save(self) -> None:
+        """Write the files with new rules, dropping the oldest unused ones."""
+        with self._lock:
+            for variables_key in self._dirty:
+                rules = self._rules[variables_key]
+                used = self._used[variables_key]
+                unused = [key for key in rules if key not in used]
+                for key in unused[:max(0, len(unused) - MAX_UNUSED_ENTRIES)]:
+                    del rules[key]
+                path = self._path(variables_key)
+                temporary = path.with_suffix('.tmp')
+                try:
+                    path.parent.mkdir(parents=True, exist_ok=True)
+                    with temporary.open('wb') as file:
+                        pickle.dump(rules, file, protocol=pickle.HIGHEST_PROTOCOL)
+                    temporary.replace(path)
+                except (OSError, pickle.PicklingError):
+                    pass  # Parsed again next time
+            self._dirty.clear()
+
+
+rule_cache = RuleCache()
+
+
+class CachedStylesheet(Stylesheet):
+    """A stylesheet parsing each source only if `rule_cache` doesn't have its rules.
+
+    Switching theme reparses every source with the theme's variables, so switching back to a
+    theme used before, in this or any earlier session, costs no parsing.
+    """
+
+    def __init__(self, *, variables: dict[str, str] | None = None) -> None:
+        super().__init__(variables=variables)
+        self._variables_key = rule_cache.variables_key(self._variables)
+
+    def set_variables(self, variables: dict[str, str]) -> None:
+        super().set_variables(variables)
+        self._variables_key = rule_cache.variables_key(variables)
+
+    def _parse_rules(
+        self,
+        css: str,
+        read_from: tuple[str, str],
+        is_default_rules: bool = False,
+        tie_breaker: int = 0,
+        scope: str = '',
+    ) -> list[RuleSet]:
+        source_key = _hash([css, read_from, is_default_rules, tie_breaker, scope])
+        rules = rule_cache.get(self._variables_key, source_key)
+        if rules is None:
+            rules = super()._parse_rules(css, read_from, is_default_rules, tie_breaker, scope)
+            # Invalid CSS is parsed again, so its errors are reported
+            if not any(rule.errors for rule in rules):
+                rule_cache.put(self._variables_key, source_key, rules)
+        return rules
+
+    def reparse(self) -> None:
+        # As `Stylesheet.reparse`, which parses into a plain `Stylesheet` that doesn't use the cache
+        stylesheet = CachedStylesheet(variables=self._variables)
+        stylesheet.source = self.source.copy()
+        try:
+            stylesheet.parse()
+        except Exception:
+            self._invalid_css.update(stylesheet._invalid_css)
+            raise
+        self._rules = stylesheet.rules
+        self._rules_map = None
+        self._require_parse = False
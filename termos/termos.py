@@ -1,36 +1,245 @@
+import importlib
+import sys
+from typing import Any, NamedTuple
+
+from rich.console import RenderableType
+from textual import events, on
+from textual.binding import Binding
 from textual.app import App as TextualApp
 from textual.app import ComposeResult
 from textual.containers import Container
+from textual.css.stylesheet import Stylesheet
 from textual.reactive import var
+from textual.screen import Screen
+from textual.theme import Theme
+from textual.types import AnimationLevel
+from textual.widget import Widget
 
 from termos.apps import OSApp
-from termos.apps.base import tcss_paths, apps
+from termos.apps.base import AppManifest, app_versions, apps, dependent_packages, tcss_paths
 from termos.components.menu_bar import MenuBar
+from termos.components.performance_overlay import PerformanceOverlay
 from termos.components.quick_settings import QuickSettings
 from termos.components.start_menu import StartMenu
 from termos.components.taskbar import Taskbar
 from termos.components.window import Window
+from termos.file_watcher import FileWatcher
+from termos.network import NetworkService
+from termos.paths import config_dir, state_dir
+from termos.profiling import tracer
+from termos.power import IdleMonitor
+from termos.remote import RemoteOutput, is_ssh_session
+from termos.session import Session
+from termos.settings import Settings, THEME, WINDOW_GEOMETRY
+from termos.stylesheet import CachedStylesheet
+from termos.ticker import Ticker
+from termos.window_manager import WindowManager
+
+
+class WarmStart(NamedTuple):
+    """What a restart carries over from the previous `TermOS`, rather than loading again."""
+
+    manifests: list[AppManifest]
+    app_versions: dict[str, list[list[Any]]]
+    stylesheet: Stylesheet
+    settings: Settings
+
+
+def reuse_stylesheet(stylesheet: Stylesheet) -> Stylesheet:
+    """Let a new app use a stylesheet parsed by a previous one, parsing again only if its sources have changed.
+
+    Textual reads every CSS file at startup and so marks the stylesheet for parsing, but
+    the files usually haven't changed since.
+    """
+    parsed_source = stylesheet.source.copy()
+
+    def parse() -> None:
+        nonlocal parsed_source
+        if stylesheet.source != parsed_source:
+            Stylesheet.parse(stylesheet)
+            parsed_source = stylesheet.source.copy()
+
+    stylesheet.parse = parse
+    return stylesheet
 
 
 class TermOS(TextualApp):
     TITLE = 'TermOS'
-    CSS_PATH = ['style.tcss', *tcss_paths()]
+    with tracer.phase('collect tcss'):
+        CSS_PATH = ['style.tcss', *tcss_paths()]
     ALLOW_SELECT = False
+    BINDINGS = [Binding('f12', 'toggle_performance_overlay', 'Performance overlay', show=False)]
 
-    windows: var[list[Window]] = var(list)
+    show_performance_overlay = var(False)
+    low_power = var(False)
+    """Set after a while without input. Widgets with timers that aren't essential watch this to pause them."""
+    low_bandwidth = var(False)
+    """Set in remote mode while output is over its byte budget."""
 
-    def __init__(self):
+    _theme_variables: dict[str, tuple[Theme, dict[str, str]]] = {}
+    """CSS variables by theme name, shared by every instance so restarts reuse them too."""
+
+    def __init__(self, warm_start: WarmStart | None = None, remote: bool | None = None):
+        """Pass the previous instance's `warm_start()` when restarting, to reuse what it loaded.
+
+        `remote` turns remote mode, for slow links, on or off. By default it's on over SSH.
+        """
         super().__init__()
-        self.os_apps: list[type[OSApp]] = [*apps()]
+        self.stylesheet = CachedStylesheet(variables=self.stylesheet._variables)
+        if tracer.enabled:
+            self.stylesheet.read_all = tracer.wrap('read css', self.stylesheet.read_all)
+            self.stylesheet.parse = tracer.wrap('parse css', self.stylesheet.parse)
+        if warm_start is not None:
+            self.os_apps = warm_start.manifests
+            self.app_versions = warm_start.app_versions
+            self.stylesheet = reuse_stylesheet(warm_start.stylesheet)
+            self.settings = warm_start.settings
+        else:
+            with tracer.phase('discover apps'):
+                self.os_apps: list[AppManifest] = [*apps()]
+                self.app_versions = app_versions()
+            self.settings = Settings(config_dir() / 'settings.json')
         self.processes: list[OSApp] = []
-        self.windows: list[Window]
+        self.window_manager = WindowManager()
+        self.network = NetworkService()
+        self.file_watcher = FileWatcher()
+        self.ticker = Ticker(self)
+        self.idle_monitor = IdleMonitor(self)
+        self.remote_output = RemoteOutput(self, is_ssh_session() if remote is None else remote)
+        self._blinking: list[Widget] = []
+        self._animation_level: AnimationLevel = self.animation_level
+        self.session = Session(state_dir() / 'session.json')
+        if self.settings.get(THEME) in self.available_themes:
+            self.theme = self.settings.get(THEME)
+
+    @property
+    def windows(self) -> list[Window]:
+        return self.window_manager.windows
+
+    def get_css_variables(self) -> dict[str, str]:
+        theme = self.current_theme
+        cached = self._theme_variables.get(theme.name)
+        # A theme registered again under the same name is computed again
+        if cached is None or cached[0] is not theme:
+            cached = self._theme_variables[theme.name] = (theme, super().get_css_variables())
+        self.theme_variables = cached[1]
+        return cached[1]
+
+    def warm_start(self) -> WarmStart:
+        return WarmStart(self.os_apps, self.app_versions, self.stylesheet, self.settings)
+
+    async def reload_apps(self) -> None:
+        """Reimport the apps whose source has changed, reopening their windows. Other windows stay open.
+
+        Apps using a changed app's modules are reloaded too, so none keep using the old code.
+        """
+        versions = app_versions()
+        changed = {name for name, version in versions.items() if self.app_versions.get(name) != version}
+        if not changed:
+            self.notify('No apps have changed.', title='Reload apps')
+            return
+        packages = dependent_packages(changed)
+        prefixes = tuple(f'termos.apps.{package}.' for package in packages)
+
+        def is_reloaded(module: str) -> bool:
+            return f'{module}.'.startswith(prefixes)
+
+        reloaded_windows = [window for window in self.windows if is_reloaded(type(window.parent_app).__module__)]
+        entries = self.session.entries(self, reloaded_windows)
+        for process in [*self.processes]:
+            if is_reloaded(type(process).__module__):
+                await process.kill()
+        for module in [*sys.modules]:
+            if is_reloaded(module):
+                del sys.modules[module]
+        importlib.invalidate_caches()
+
+        self.os_apps = [*apps()]
+        self.app_versions = versions
+        for path in tcss_paths():
+            if path.parent.name in packages:
+                self.stylesheet.read(path)
+        self.refresh_css()
+        await self.query_one(StartMenu).recompose()
+        self.session.reopen(self, entries)
+        self.notify(', '.join(sorted(packages)), title='Reloaded apps')
 
     def compose(self) -> ComposeResult:
-        yield MenuBar()
+        yield tracer.track_mount(MenuBar())
         yield Container(id='window-container', classes='desktop')
-        yield StartMenu()
-        yield QuickSettings()
-        yield Taskbar().data_bind(TermOS.windows)
+        yield tracer.track_mount(StartMenu())
+        yield tracer.track_mount(QuickSettings())
+        yield tracer.track_mount(Taskbar())
+
+    def on_mount(self) -> None:
+        self.idle_monitor.start()
+        self.remote_output.attach()
+        self.app_resume_signal.subscribe(self, lambda app: self.remote_output.invalidate())
+        if tracer.enabled:
+            # End the profile once the first frame has been painted
+            self.call_after_refresh(self.exit)
+            return
+        self.session.restore(self)
+        # After the session, which may reopen some of the work apps would recover
+        for manifest in self.os_apps:
+            if manifest.has_recovery_data():
+                manifest.load().recover(self)
+
+    async def action_quit(self) -> None:
+        self.session.save(self)
+        await super().action_quit()
+
+    async def on_event(self, event: events.Event) -> None:
+        if isinstance(event, events.InputEvent):
+            self.idle_monitor.input()
+        await super().on_event(event)
+
+    def on_resize(self) -> None:
+        self.remote_output.invalidate()
+
+    def _display(self, screen: Screen, renderable: RenderableType | None) -> None:
+        # Textual writes every update to the terminal from here, so remote mode can replace them
+        if renderable is not None and not self._batch_count:
+            renderable = self.remote_output.prepare(screen, renderable)
+        super()._display(screen, renderable)
+
+    def watch_low_power(self, low_power: bool) -> None:
+        """Update clocks once a minute, and stop animations and blinking cursors."""
+        self.limit_animations()
+        if low_power:
+            self.ticker.set_period(60)
+            self._blinking = [widget for widget in self.query('Input, TextArea') if widget.cursor_blink]
+            for widget in self._blinking:
+                widget.cursor_blink = False
+        else:
+            self.ticker.set_period(1)
+            for widget in self._blinking:
+                widget.cursor_blink = True
+            self._blinking = []
+
+    def watch_low_bandwidth(self) -> None:
+        self.limit_animations()
+
+    def limit_animations(self) -> None:
+        """Turn animations off in low power or low bandwidth mode, and back to their level before in neither."""
+        if self.low_power or self.low_bandwidth:
+            if self.animation_level != 'none':
+                self._animation_level = self.animation_level
+                self.animation_level = 'none'
+        else:
+            self.animation_level = self._animation_level
+
+    def watch_theme(self, theme: str) -> None:
+        self.settings.set(THEME, theme)
+
+    def action_toggle_performance_overlay(self) -> None:
+        self.show_performance_overlay = not self.show_performance_overlay
+
+    async def watch_show_performance_overlay(self, show: bool) -> None:
+        if show:
+            await self.mount(PerformanceOverlay())
+        else:
+            await self.query(PerformanceOverlay).remove()
 
     def on_app_launched(self, app: type[OSApp]) -> None:
         pass
@@ -39,12 +248,36 @@ class TermOS(TextualApp):
         pass
 
     def on_window_created(self, message: Window.Created) -> None:
-        self.windows.append(message.window)
-        self.mutate_reactive(TermOS.windows)
+        self.window_manager.add(message.window)
+        self.query_one(Taskbar).add_tab(message.window)
+        message.stop()
+
+    def on_window_minimised(self, message: Window.Minimised) -> None:
+        self.window_manager.set_minimised(message.window, message.window.minimised)
+        if message.window.minimised:
+            self.window_manager.focus_next()
+        else:
+            self.ticker.wake()
+        message.stop()
+
+    @on(Window.Moved)
+    @on(Window.Maximised)
+    @on(Window.Restored)
+    def remember_geometry(self, message: Window.Moved | Window.Maximised | Window.Restored) -> None:
+        """Open the app's next window where this one is."""
+        window = message.window
+        geometry = {**self.settings.get(WINDOW_GEOMETRY)}
+        geometry[window.parent_app.NAME] = {'offset': [*window.offset], 'maximised': window.maximised}
+        self.settings.set(WINDOW_GEOMETRY, geometry)
         message.stop()
 
+    def forget_window(self, window: Window) -> None:
+        self.window_manager.remove(window)
+        self.session.deferred.pop(window, None)
+        self.query_one(Taskbar).remove_tab(window)
+
     async def on_window_closed(self, message: Window.Closed) -> None:
-        self.windows.remove(message.window)
-        self.mutate_reactive(TermOS.windows)
+        self.forget_window(message.window)
         await message.window.parent_app.on_window_close(message.window)
+        self.window_manager.focus_next()
         message.stop()
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Callable, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from textual.timer import Timer
+    from textual.widget import Widget
+
+    from termos.termos import TermOS
+
+TICK_DELAY = 0.002
+"""Seconds after each second starts that the tick is due, so it's never early."""
+
+
+class Ticker:
+    """A single timer, aligned to the start of each second (or minute), updating every clock in TermOS.
+
+    Each subscriber gives a `strftime` format and a callback. Every tick the time is read
+    once, formatted once per format, and handed to the subscribers on screen. Ones which are
+    hidden, e.g. in a minimised window or closed quick settings, are skipped, and when none
+    are on screen the timer stops. `wake` restarts it, and TermOS calls it whenever a window
+    is restored or quick settings opens. In low power mode TermOS ticks once a minute.
+    """
+
+    def __init__(self, os: TermOS) -> None:
+        self.os = os
+        self.period = 1
+        """Seconds between ticks, which start when the wall clock's seconds are a multiple of it."""
+        self._subscribers: dict[Widget, tuple[str, Callable[[str], None]]] = {}
+        self._timer: Timer | None = None
+
+    def subscribe(self, widget: Widget, format: str, callback: Callable[[str], None]) -> None:
+        """Call `callback` with the time in `format` now and each second while `widget` is on screen."""
+        self._subscribers[widget] = (format, callback)
+        self.wake()
+
+    def unsubscribe(self, widget: Widget) -> None:
+        self._subscribers.pop(widget, None)
+
+    def set_period(self, period: int) -> None:
+        """Tick every `period` seconds from now on, e.g. 60 to update clocks once a minute."""
+        self.period = period
+        if self._timer is not None:
+            self._timer.stop()
+            self._timer = None
+        self.wake()
+
+    def wake(self) -> None:
+        """Update subscribers which have just been shown, restarting the timer if it had stopped."""
+        if self._deliver(datetime.now()) and self._timer is None:
+            self._schedule()
+
+    def _schedule(self) -> None:
+        now = datetime.now()
+        elapsed = now.second % self.period + now.microsecond / 1_000_000
+        self._timer = self.os.set_timer(self.period - elapsed + TICK_DELAY, self._tick)
+
+    def _tick(self) -> None:
+        self._timer = None
+        if self._deliver(datetime.now()):
+            self._schedule()
+
+    def _deliver(self, now: datetime) -> bool:
+        """Give subscribers on screen the time, returning whether there were any."""
+        formatted: dict[str, str] = {}
+        shown = False
+        for widget, (format, callback) in [*self._subscribers.items()]:
+            if not widget.is_attached:
+                del self._subscribers[widget]
+                continue
+            if not all(node.display for node in widget.ancestors_with_self):
+                continue
+            shown = True
+            if format not in formatted:
+                formatted[format] = now.strftime(format)
+            callback(formatted[format])
+        return shown
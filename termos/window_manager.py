@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from termos.apps import OSApp
+    from termos.components.window import Window
+
+
+class WindowManager:
+    """Keeps track of every open window and how they are stacked.
+
+    All bookkeeping uses insertion-ordered dicts as ordered sets, so opening, closing,
+    raising and focusing a window, and checking whether an app still has windows, are O(1).
+    """
+
+    def __init__(self) -> None:
+        # windows in the order they were opened, as shown on the taskbar
+        self._windows: dict[Window, None] = {}
+        # windows from bottom to top, matching the order of #window-container's children
+        self._z_order: dict[Window, None] = {}
+        # non-minimised windows, least to most recently focused
+        self._focus_stack: dict[Window, None] = {}
+        self._app_windows: dict[OSApp, dict[Window, None]] = {}
+
+    def __len__(self) -> int:
+        return len(self._windows)
+
+    def __contains__(self, window: Window) -> bool:
+        return window in self._windows
+
+    @property
+    def windows(self) -> list[Window]:
+        """Open windows in the order they were opened."""
+        return [*self._windows]
+
+    @property
+    def stacking_order(self) -> list[Window]:
+        """Open windows from bottom to top."""
+        return [*self._z_order]
+
+    @property
+    def top(self) -> Window | None:
+        """The window drawn above all others."""
+        return next(reversed(self._z_order), None)
+
+    @property
+    def focused(self) -> Window | None:
+        """The most recently focused window which isn't minimised."""
+        return next(reversed(self._focus_stack), None)
+
+    def windows_of(self, app: OSApp) -> list[Window]:
+        return [*self._app_windows.get(app, ())]
+
+    def has_windows(self, app: OSApp) -> bool:
+        return bool(self._app_windows.get(app))
+
+    def add(self, window: Window) -> None:
+        self._windows[window] = None
+        self._z_order[window] = None
+        if not window.minimised:
+            self._focus_stack[window] = None
+        self._app_windows.setdefault(window.parent_app, {})[window] = None
+
+    def remove(self, window: Window) -> None:
+        self._windows.pop(window, None)
+        self._z_order.pop(window, None)
+        self._focus_stack.pop(window, None)
+        app_windows = self._app_windows.get(window.parent_app)
+        if app_windows is not None:
+            app_windows.pop(window, None)
+            if not app_windows:
+                del self._app_windows[window.parent_app]
+
+    def raise_window(self, window: Window) -> None:
+        """Draw the window above all others and mark it as the most recently focused."""
+        if window not in self._windows:
+            return
+
+        self._focus_stack.pop(window, None)
+        self._focus_stack[window] = None
+
+        if self.top is window:
+            return
+        self._z_order.pop(window)
+        self._z_order[window] = None
+        # Textual has no z-index, so stacking follows DOM order within the windows layer
+        container = window.parent
+        if container is not None and container.children[-1] is not window:
+            container.move_child(window, after=container.children[-1])
+
+    def set_minimised(self, window: Window, minimised: bool) -> None:
+        if window not in self._windows:
+            return
+        if minimised:
+            self._focus_stack.pop(window, None)
+        else:
+            self.raise_window(window)
+
+    def focus_next(self) -> None:
+        """Give focus to the most recently focused window that is still visible."""
+        window = self.focused
+        if window is not None:
+            self.raise_window(window)
+            window.focus()